@@ -0,0 +1,274 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+"""
+End-to-end throughput benchmark of jormungandr, the krakens being replaced by KrakenReplay
+
+The queries go through the whole WSGI app (flask's test client, without http server), sent by 'concurrency'
+greenlets during 'duration' seconds. Only /journeys depends on the scenario, it is run for each of them.
+For each query are reported:
+ - the number of requests by second,
+ - the latency percentiles (in ms),
+ - the number of python objects allocated by request: the objects tracked by the garbage collector created during
+   a sequential run, the gc being disabled. The objects freed by their reference count are not counted, it's a
+   measure of the pressure on the gc more than of all the allocations.
+
+The responses of the krakens are recorded first, with a kraken of the integration tests running
+($KRAKEN_BUILD_DIR/tests/main_routing_test listens on ipc:///tmp/main_routing_test):
+    python benchmark.py --recording main_routing_test=/tmp/main_routing_test.jsonl \\
+        --upstream main_routing_test=ipc:///tmp/main_routing_test --duration 1
+then they are replayed without kraken:
+    python benchmark.py --recording main_routing_test=/tmp/main_routing_test.jsonl --latency 0.005
+
+(from source/jormungandr/benchmark, with source/jormungandr and source/navitiacommon in the PYTHONPATH)
+"""
+from __future__ import absolute_import, print_function, unicode_literals, division
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+import gevent
+from kraken_replay import KrakenReplay, Recording
+
+# queries on the data of the integration tests (main_routing_test), {region} is the benchmarked region
+DEFAULT_QUERIES = OrderedDict([
+    ('journeys', '/v1/coverage/{region}/journeys?from=0.0000898312;0.0000898312&to=0.00188646;0.00071865'
+                 '&datetime=20120614T080000&_current_datetime=20120614T080000'),
+    ('departures', '/v1/coverage/{region}/stop_areas/stopA/departures?from_datetime=20120614T080000'
+                   '&_current_datetime=20120614T080000'),
+    ('places_nearby', '/v1/coverage/{region}/coords/0.00107797;0.00071865/places_nearby'),
+    ('coverage', '/v1/coverage'),
+])
+
+SCENARIO_QUERIES = {'journeys'}
+
+DEFAULT_SCENARIOS = ['new_default', 'distributed']
+
+
+def percentile(values, p):
+    """
+    nearest-rank percentile of sorted values
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    >>> percentile([], 50) is None
+    True
+    """
+    if not values:
+        return None
+    rank = max(int(math.ceil(p / 100. * len(values))), 1)
+    return values[rank - 1]
+
+
+def parse_named_values(values):
+    """
+    >>> sorted(parse_named_values(['a=b', 'c=d=e']).items()) == [('a', 'b'), ('c', 'd=e')]
+    True
+    """
+    return dict(v.split('=', 1) for v in values or [])
+
+
+def run_load(client, url, duration, concurrency):
+    """
+    :return: the measures of the load, the query is 'failed' if no request has been completed, there is no
+    latency then
+    """
+    latencies = []
+    nb_errors = [0]
+    nb_exceptions = [0]
+    deadline = time.time() + duration
+
+    def worker():
+        while time.time() < deadline:
+            start = time.time()
+            try:
+                response = client.get(url)
+            except Exception:
+                # only the first one is logged, the others are likely the same
+                if not nb_exceptions[0]:
+                    logging.exception('error on %s', url)
+                nb_exceptions[0] += 1
+                nb_errors[0] += 1
+                continue
+            latencies.append(time.time() - start)
+            if response.status_code != 200:
+                nb_errors[0] += 1
+
+    start = time.time()
+    gevent.joinall([gevent.spawn(worker) for _ in range(concurrency)])
+    elapsed = time.time() - start
+
+    latencies.sort()
+    if not latencies:
+        logging.error('no request completed on %s', url)
+
+    def to_ms(latency):
+        return latency * 1000 if latency is not None else None
+
+    return OrderedDict([
+        ('failed', not latencies),
+        ('requests', len(latencies)),
+        ('errors', nb_errors[0]),
+        ('requests_per_s', len(latencies) / elapsed if elapsed > 0 else 0.),
+        ('latency_p50_ms', to_ms(percentile(latencies, 50))),
+        ('latency_p90_ms', to_ms(percentile(latencies, 90))),
+        ('latency_p99_ms', to_ms(percentile(latencies, 99))),
+        ('latency_max_ms', to_ms(latencies[-1] if latencies else None)),
+    ])
+
+
+def count_allocations(client, url, nb_requests):
+    gc.collect()
+    gc.disable()
+    try:
+        before = len(gc.get_objects())
+        for _ in range(nb_requests):
+            client.get(url)
+        after = len(gc.get_objects())
+    finally:
+        gc.enable()
+    return (after - before) / nb_requests
+
+
+def load_app(replays):
+    """
+    import jormungandr with an instance for each replay, jormungandr reads its configuration on import
+    """
+    os.environ.setdefault('JORMUNGANDR_CONFIG_FILE',
+                          os.path.join(os.path.dirname(os.path.realpath(__file__)), 'benchmark_settings.py'))
+    for name, replay in replays.items():
+        os.environ['JORMUNGANDR_INSTANCE_{}'.format(name.upper())] = json.dumps({'key': name,
+                                                                                 'zmq_socket': replay.address})
+    from jormungandr import app
+    return app
+
+
+def get_queries(regions, scenarios):
+    """
+    :return: the list of (name, scenario, url) to benchmark
+    """
+    queries = []
+    for name, query in DEFAULT_QUERIES.items():
+        if '{region}' not in query:
+            queries.append((name, None, query))
+            continue
+        for region in regions:
+            url = query.format(region=region)
+            if name not in SCENARIO_QUERIES:
+                queries.append((name, None, url))
+                continue
+            for scenario in scenarios:
+                queries.append((name, scenario, url + '&_override_scenario={}'.format(scenario)))
+    return queries
+
+
+def benchmark(client, queries, duration, concurrency, nb_warm_up, nb_allocation_requests):
+    results = []
+    for name, scenario, url in queries:
+        for _ in range(nb_warm_up):
+            response = client.get(url)
+            if response.status_code != 200:
+                logging.warning('%s answered %s during the warm up', url, response.status_code)
+        result = OrderedDict([('query', name), ('scenario', scenario or '-'), ('url', url)])
+        result.update(run_load(client, url, duration, concurrency))
+        if not result['failed']:
+            result['objects_per_request'] = count_allocations(client, url, nb_allocation_requests)
+        else:
+            result['objects_per_request'] = None
+        results.append(result)
+    return results
+
+
+def print_results(results):
+    header = '{:<15} {:<12} {:>9} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}'
+    line = '{:<15} {:<12} {:>9} {:>7} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.0f}'
+    print(header.format('query', 'scenario', 'requests', 'errors', 'req/s', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+                        'objects'))
+    failed_line = '{:<15} {:<12} {:>9} {:>7} failed, no request completed'
+    for r in results:
+        if r['failed']:
+            print(failed_line.format(r['query'], r['scenario'], r['requests'], r['errors']))
+            continue
+        print(line.format(r['query'], r['scenario'], r['requests'], r['errors'], r['requests_per_s'],
+                          r['latency_p50_ms'], r['latency_p90_ms'], r['latency_p99_ms'], r['objects_per_request']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='throughput benchmark of jormungandr on recorded kraken responses')
+    parser.add_argument('--recording', action='append', required=True,
+                        help='<region>=<file of the recorded responses>, one by region')
+    parser.add_argument('--upstream', action='append',
+                        help='<region>=<zmq address of a kraken>, to record the responses of the region')
+    parser.add_argument('--scenario', action='append', help='scenarios of the journeys (default: {})'
+                        .format(', '.join(DEFAULT_SCENARIOS)))
+    parser.add_argument('--latency', type=float, default=0., help='latency of the replayed krakens, in seconds')
+    parser.add_argument('--jitter', type=float, default=0., help='max random delay added to the latency')
+    parser.add_argument('--duration', type=float, default=10., help='duration of the load of each query (s)')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of concurrent requests')
+    parser.add_argument('--warm-up', type=int, default=5, help='number of requests before the measures')
+    parser.add_argument('--allocation-requests', type=int, default=20,
+                        help='number of requests to count the allocations')
+    parser.add_argument('--output', help='json file for the results')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    upstreams = parse_named_values(args.upstream)
+    replays = OrderedDict()
+    for region, path in sorted(parse_named_values(args.recording).items()):
+        replays[region] = KrakenReplay('ipc:///tmp/{}_replay'.format(region), Recording(path),
+                                       latency=args.latency, jitter=args.jitter, upstream=upstreams.get(region))
+        replays[region].start()
+
+    try:
+        app = load_app(replays)
+        client = app.test_client(use_cookies=False)
+        results = benchmark(client, get_queries(replays.keys(), args.scenario or DEFAULT_SCENARIOS),
+                            args.duration, args.concurrency, args.warm_up, args.allocation_requests)
+    finally:
+        for replay in replays.values():
+            replay.stop()
+
+    print_results(results)
+    for region, replay in replays.items():
+        status = replay.status()
+        print('{}: {} responses replayed, {} missing, {} recorded'.format(region, status['hits'], status['misses'],
+                                                                           status['recorded']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'replays': {r: replay.status() for r, replay in replays.items()}},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+# settings of jormungandr for the benchmarks: the defaults of production without any external service
+from __future__ import absolute_import
+
+START_MONITORING_THREAD = False
+
+SAVE_STAT = False
+
+DISABLE_DATABASE = True
+
+PUBLIC = True
+
+LOGGER = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '[%(asctime)s] [%(levelname)5s] [%(process)5s] [%(name)10s] %(message)s',
+        },
+    },
+    'handlers': {
+        'default': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'loggers': {
+        '': {
+            'handlers': ['default'],
+            'level': 'WARNING',
+            'propagate': True
+        },
+    }
+}
+
+# an in-process cache instead of redis
+CACHE_CONFIGURATION = {
+    'CACHE_TYPE': 'simple',
+    'TIMEOUT_PTOBJECTS': 600,
+    'TIMEOUT_AUTHENTICATION': 600,
+    'TIMEOUT_PARAMS': 600,
+    'TIMEOUT_TIMEO': 60,
+    'TIMEOUT_SYNTHESE': 30,
+    'TIMEOUT_DIRECT_PATH': 3600,
+}
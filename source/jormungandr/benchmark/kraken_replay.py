@@ -0,0 +1,237 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+"""
+A stand-in for kraken replaying recorded responses, to run jormungandr without the kraken binaries
+
+The responses are served by request fingerprint (the serialized request without its volatile fields), after an
+injected latency. Unlike a REP socket, the requests are answered out of order, once their latency is elapsed, so a
+slow response doesn't delay the others as it is the case with the several workers of a real kraken.
+
+With an upstream kraken, the unknown requests are forwarded to it and its responses are added to the recording.
+
+usage (with navitiacommon in the PYTHONPATH):
+    python kraken_replay.py --address ipc:///tmp/main_routing_test_replay --recording main_routing_test.jsonl \\
+        [--upstream ipc:///tmp/main_routing_test] [--latency 0.005] [--jitter 0.002]
+"""
+from __future__ import absolute_import, print_function, unicode_literals, division
+import argparse
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zmq
+from navitiacommon import request_pb2, response_pb2, type_pb2
+
+# these fields change from one run to another without changing the response
+VOLATILE_FIELDS = ('request_id', '_current_datetime')
+
+
+def fingerprint(request):
+    req = request_pb2.Request()
+    req.CopyFrom(request)
+    for field in VOLATILE_FIELDS:
+        req.ClearField(field)
+    return hashlib.sha1(req.SerializeToString()).hexdigest()
+
+
+class Recording(object):
+    """
+    The recorded responses by request fingerprint
+
+    They are stored in a file, one json by line: {"fingerprint": ..., "api": ..., "response": <base64>}
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.responses = {}
+        if path and os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.responses[record['fingerprint']] = base64.b64decode(record['response'])
+
+    def get(self, request_fingerprint):
+        return self.responses.get(request_fingerprint)
+
+    def add(self, request_fingerprint, api, response):
+        self.responses[request_fingerprint] = response
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'fingerprint': request_fingerprint,
+                                    'api': api,
+                                    'response': base64.b64encode(response).decode('ascii')}) + '\n')
+
+    def __len__(self):
+        return len(self.responses)
+
+
+class KrakenReplay(object):
+    """
+    serve the responses of a Recording on a zmq address
+
+    :param latency: the min time before responding, in seconds
+    :param jitter: a random delay up to 'jitter' seconds is added to the latency
+    :param upstream: address of a real kraken for the requests not in the recording
+    """
+    def __init__(self, address, recording, latency=0., jitter=0., upstream=None, upstream_timeout=10000):
+        self.address = address
+        self.recording = recording
+        self.latency = latency
+        self.jitter = jitter
+        self.upstream = upstream
+        self.upstream_timeout = upstream_timeout
+        self.nb_hits = 0
+        self.nb_misses = 0
+        self.nb_recorded = 0
+        self._context = zmq.Context()
+        self._upstream_socket = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        serve in a background thread, the socket is bound when this returns
+        """
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self.serve, kwargs={'ready': ready})
+        self._thread.daemon = True
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def serve(self, ready=None):
+        socket = self._context.socket(zmq.ROUTER)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.bind(self.address)
+        if ready:
+            ready.set()
+        # the responses waiting for their latency to elapse: (due time, sequence, frames)
+        pending = []
+        sequence = itertools.count()
+        try:
+            while not self._stopped.is_set():
+                timeout = 100
+                if pending:
+                    timeout = max(0, int((pending[0][0] - time.time()) * 1000))
+                if socket.poll(timeout=timeout):
+                    frames = socket.recv_multipart()
+                    # the frames are the envelope of the REQ socket followed by the request
+                    response = self.respond(frames[-1])
+                    due = time.time() + self.latency + random.uniform(0, self.jitter)
+                    heapq.heappush(pending, (due, next(sequence), frames[:-1] + [response]))
+                now = time.time()
+                while pending and pending[0][0] <= now:
+                    socket.send_multipart(heapq.heappop(pending)[2])
+        finally:
+            socket.close()
+            if self._upstream_socket:
+                self._upstream_socket.close()
+
+    def respond(self, payload):
+        request = request_pb2.Request()
+        request.ParseFromString(payload)
+        request_fingerprint = fingerprint(request)
+        response = self.recording.get(request_fingerprint)
+        if response is None and self.upstream:
+            response = self._forward(payload)
+            if response is not None:
+                self.recording.add(request_fingerprint, type_pb2.API.Name(request.requested_api), response)
+                self.nb_recorded += 1
+                return response
+        if response is None:
+            self.nb_misses += 1
+            logging.getLogger(__name__).warning('no recorded response for the %s request %s',
+                                                type_pb2.API.Name(request.requested_api), request_fingerprint)
+            error = response_pb2.Response()
+            error.error.id = response_pb2.Error.error_id.Value('internal_error')
+            error.error.message = 'no recorded response for this request'
+            return error.SerializeToString()
+        self.nb_hits += 1
+        return response
+
+    def _forward(self, payload):
+        if self._upstream_socket is None:
+            self._upstream_socket = self._context.socket(zmq.REQ)
+            self._upstream_socket.setsockopt(zmq.LINGER, 0)
+            self._upstream_socket.connect(self.upstream)
+        self._upstream_socket.send(payload)
+        if self._upstream_socket.poll(timeout=self.upstream_timeout):
+            return self._upstream_socket.recv()
+        # the REQ socket is stuck waiting for its response, we need a new one
+        logging.getLogger(__name__).error('timeout on the upstream kraken %s', self.upstream)
+        self._upstream_socket.close()
+        self._upstream_socket = None
+        return None
+
+    def status(self):
+        return {
+            'address': self.address,
+            'recorded_responses': len(self.recording),
+            'hits': self.nb_hits,
+            'misses': self.nb_misses,
+            'recorded': self.nb_recorded,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay the recorded responses of a kraken')
+    parser.add_argument('--address', required=True, help='zmq address to bind')
+    parser.add_argument('--recording', required=True, help='file of the recorded responses')
+    parser.add_argument('--upstream', help='address of a kraken to record the unknown requests')
+    parser.add_argument('--latency', type=float, default=0., help='latency of the responses, in seconds')
+    parser.add_argument('--jitter', type=float, default=0., help='max random delay added to the latency')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    replay = KrakenReplay(args.address, Recording(args.recording), latency=args.latency, jitter=args.jitter,
+                          upstream=args.upstream)
+    logging.info('replaying %s responses on %s', len(replay.recording), args.address)
+    try:
+        replay.serve()
+    except KeyboardInterrupt:
+        logging.info('%s', replay.status())
+
+
+if __name__ == '__main__':
+    main()
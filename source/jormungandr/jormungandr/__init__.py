@@ -77,6 +77,10 @@ from navitiacommon.models import db
 db.init_app(app)
 cache = Cache(app, config=app.config['CACHE_CONFIGURATION'])
 
+from jormungandr.http_connection_pool import HttpConnectionPool
+http_pool = HttpConnectionPool(nb_hosts=app.config.get('HTTP_POOL_NB_HOSTS', 20),
+                               pool_maxsize=app.config.get('HTTP_POOL_MAX_SIZE', 10))
+
 if app.config['AUTOCOMPLETE_SYSTEMS'] is not None:
     global_autocomplete = {k: utils.create_object(v) for k, v in app.config['AUTOCOMPLETE_SYSTEMS'].items()}
 else:
@@ -34,7 +34,7 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 import importlib
 from flask_restful.representations import json
 from flask import request, make_response
-from jormungandr import rest_api, app
+from jormungandr import rest_api, app, tracing
 from jormungandr.index import index
 from jormungandr.modules_loader import ModulesLoader
 import ujson
@@ -70,11 +70,22 @@ def output_jsonp(data, code, headers=None):
 @rest_api.representation("text/json")
 @rest_api.representation("application/json")
 def output_json(data, code, headers=None):
-    resp = make_response(ujson.dumps(data), code)
+    with tracing.span('serialization.json'):
+        resp = make_response(ujson.dumps(data), code)
     resp.headers.extend(headers or {})
     return resp
 
 
+@app.before_request
+def start_tracing():
+    tracing.tracer.start_request(request.endpoint)
+
+
+@app.teardown_request
+def finish_tracing(exception=None):
+    tracing.tracer.finish_request()
+
+
 @app.after_request
 def access_log(response, *args, **kwargs):
     logger = logging.getLogger('jormungandr.access')
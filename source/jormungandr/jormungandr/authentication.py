@@ -40,6 +40,12 @@ import datetime
 import base64
 from navitiacommon.models import User, Instance, Key
 from jormungandr import cache, app as current_app
+from jormungandr.authorization_table import AuthorizationTable
+
+
+# the authorizations are kept in memory, the requests are authenticated without any i/o
+authorization_table = AuthorizationTable(current_app, current_app.config.get('AUTHORIZATION_TABLE_REFRESH_S', 0),
+                                         current_app.config.get('AUTHORIZATION_TABLE_FULL_RELOAD_S', 3600))
 
 
 def authentication_required(func):
@@ -104,13 +110,19 @@ def get_token():
         return auth
 
 
-@cache.memoize(current_app.config['CACHE_CONFIGURATION'].get('TIMEOUT_AUTHENTICATION', 300))
+def get_authorization_snapshot():
+    """
+    return the in-memory authorizations, None if they are not available (we then use the db)
+    """
+    if current_app.config.get('DISABLE_DATABASE', False):
+        return None
+    return authorization_table.get_snapshot()
+
+
 def has_access(region, api, abort, user):
     """
     Check the Authorization of the current user for this region and this API.
     If abort is True, the request is aborted with the appropriate HTTP code.
-    Warning: Please this function is cached therefore it should not be
-    dependent of the request context, so keep it as a pure function.
     """
     if current_app.config.get('PUBLIC', False):
         #if jormungandr is on public mode we skip the authentification process
@@ -120,14 +132,18 @@ def has_access(region, api, abort, user):
         #no user --> no need to continue, we can abort, a user is mandatory even for free region
         abort_request(user=user)
 
-    model_instance = Instance.get_by_name(region)
+    snapshot = get_authorization_snapshot()
+    if snapshot is not None:
+        access = snapshot.has_access(user, region, api)
+    else:
+        access = cache_has_access(region, api, user)
 
-    if not model_instance:
+    if access is None:
         if abort:
             raise RegionNotFound(region)
         return False
 
-    if (model_instance.is_free and user.have_access_to_free_instances) or user.has_access(model_instance.id, api):
+    if access:
         return True
     else:
         if abort:
@@ -136,6 +152,21 @@ def has_access(region, api, abort, user):
             return False
 
 
+@cache.memoize(current_app.config['CACHE_CONFIGURATION'].get('TIMEOUT_AUTHENTICATION', 300))
+def cache_has_access(region, api, user):
+    """
+    Check in the db the Authorization of the user for this region and this API, None if the region doesn't exist
+    Warning: Please this function is cached therefore it should not be
+    dependent of the request context, so keep it as a pure function.
+    """
+    model_instance = Instance.get_by_name(region)
+
+    if not model_instance:
+        return None
+
+    return (model_instance.is_free and user.have_access_to_free_instances) or user.has_access(model_instance.id, api)
+
+
 @cache.memoize(current_app.config['CACHE_CONFIGURATION'].get('TIMEOUT_AUTHENTICATION', 300))
 def cache_get_user(token):
     """
@@ -191,15 +222,28 @@ def get_user(token, abort_if_no_token=True):
                 g.user = User(login="unknown_user")
                 g.user.id = 0
         else:
-            g.user = cache_get_user(token)
+            g.user = get_user_from_token(token)
 
         return g.user
 
+
+def get_user_from_token(token):
+    snapshot = get_authorization_snapshot()
+    if snapshot is not None and snapshot.get_token(token) is not None:
+        return snapshot.get_user(token, datetime.date.today())
+    # the token is unknown or has been created since the last load of the authorizations
+    return cache_get_user(token)
+
+
 def get_app_name(token):
     """
     return the app_name for the token
     """
     if token:
+        snapshot = get_authorization_snapshot()
+        token_entry = snapshot.get_token(token) if snapshot is not None else None
+        if token_entry is not None:
+            return token_entry.app_name
         key = cache_get_key(token)
         if key:
             return key.app_name
@@ -0,0 +1,275 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from collections import namedtuple
+import copy
+import datetime
+import logging
+import random
+import time
+import gevent
+from sqlalchemy import or_
+from sqlalchemy.orm import noload
+from navitiacommon.models import db, User, Key, Instance, Api, Authorization
+
+
+TokenEntry = namedtuple('TokenEntry', ['user_id', 'valid_until', 'app_name'])
+
+InstanceEntry = namedtuple('InstanceEntry', ['index', 'is_free'])
+
+# the rows changed a bit before the last refresh are read again, for the clock skew between tyr and jormungandr
+# and the transactions committed after the refresh
+_UPDATE_MARGIN = datetime.timedelta(minutes=5)
+
+# the refresh period of each worker is randomized by this ratio, so the workers don't query the db at the same time
+_REFRESH_JITTER = 0.2
+
+
+class AuthorizationSnapshot(object):
+    """
+    in-memory copy of the authorizations of the tyr database
+
+    the grants of a user are a bitset: the bit 'instance index * number of apis + api index' is set
+    if the user is authorized to use this api on this instance
+
+    >>> class User(object):
+    ...     def __init__(self, id, type='with_free_instances', block_until=None):
+    ...         self.id = id
+    ...         self.type = type
+    ...         self.block_until = block_until
+    ...     have_access_to_free_instances = property(lambda self: self.type != 'without_free_instances')
+    ...     is_super_user = property(lambda self: self.type == 'super_user')
+    >>> snapshot = AuthorizationSnapshot(users=[User(1), User(2, 'without_free_instances')],
+    ...                                  keys=[('tok1', 1, None, 'app'), ('tok2', 2, datetime.date(2000, 1, 1), None)],
+    ...                                  instances=[(10, 'fr-idf', False), (11, 'fr-bre', True)],
+    ...                                  apis=[(1, 'ALL')],
+    ...                                  authorizations=[(1, 10, 1)])
+    >>> snapshot.get_token('tok1').app_name == 'app'
+    True
+    >>> snapshot.get_user('tok1', today=datetime.date(2018, 1, 1)).id
+    1
+    >>> snapshot.get_user('tok2', today=datetime.date(2018, 1, 1)) is None
+    True
+    >>> snapshot.has_access(snapshot.users[1], 'fr-idf', 'ALL'), snapshot.has_access(snapshot.users[1], 'fr-bre', 'ALL')
+    (True, True)
+    >>> snapshot.has_access(snapshot.users[2], 'fr-idf', 'ALL'), snapshot.has_access(snapshot.users[2], 'fr-bre', 'ALL')
+    (False, False)
+    >>> snapshot.has_access(snapshot.users[1], 'fr-nw', 'ALL') is None
+    True
+    >>> new_snapshot = snapshot.updated(users=[User(3)], keys=[('tok3', 3, None, None)],
+    ...                                 user_ids=[2, 3], tokens=['tok2', 'tok3'], authorizations=[(2, 10, 1)])
+    >>> new_snapshot.has_access(new_snapshot.users[2], 'fr-idf', 'ALL'), new_snapshot.get_user('tok3', None).id
+    (True, 3)
+    >>> sorted(new_snapshot.users), sorted(new_snapshot.tokens) == ['tok2', 'tok3']
+    ([2, 3], True)
+    >>> snapshot.has_access(snapshot.users[2], 'fr-idf', 'ALL'), snapshot.get_token('tok3') is None
+    (False, True)
+    """
+    def __init__(self, users, keys, instances, apis, authorizations):
+        self.users = {user.id: user for user in users}
+        self.tokens = {token: TokenEntry(user_id, valid_until, app_name)
+                       for token, user_id, valid_until, app_name in keys}
+        self.instance_rows = [tuple(i) for i in instances]
+        self.instances = {}
+        self._instance_indexes = {}
+        for index, (instance_id, name, is_free) in enumerate(self.instance_rows):
+            self.instances[name] = InstanceEntry(index, is_free)
+            self._instance_indexes[instance_id] = index
+        self.api_rows = [tuple(a) for a in apis]
+        self.api_indexes = {}
+        self._api_indexes_by_id = {}
+        for index, (api_id, name) in enumerate(self.api_rows):
+            self.api_indexes[name] = index
+            self._api_indexes_by_id[api_id] = index
+        self.nb_apis = len(apis)
+
+        self.grants = self._make_grants(authorizations)
+
+    def _make_grants(self, authorizations):
+        grants = {}
+        for user_id, instance_id, api_id in authorizations:
+            instance_index = self._instance_indexes.get(instance_id)
+            api_index = self._api_indexes_by_id.get(api_id)
+            if instance_index is None or api_index is None:
+                # authorization on a discarded instance
+                continue
+            grants[user_id] = grants.get(user_id, 0) | 1 << (instance_index * self.nb_apis + api_index)
+        return grants
+
+    def updated(self, users, keys, user_ids, tokens, authorizations):
+        """
+        return a new snapshot with the changes of the db, the current snapshot is left untouched as it
+        can be read by the requests
+
+        :param users, keys: the rows created or modified
+        :param user_ids, tokens: the ids of all the users and the tokens of all the keys of the db, the deleted ones
+        are removed from the snapshot
+        :param authorizations: all the authorizations of the db
+        """
+        snapshot = copy.copy(self)
+        user_ids = set(user_ids)
+        snapshot.users = {user_id: user for user_id, user in self.users.items() if user_id in user_ids}
+        snapshot.users.update((user.id, user) for user in users)
+        tokens = set(tokens)
+        snapshot.tokens = {token: entry for token, entry in self.tokens.items() if token in tokens}
+        snapshot.tokens.update((token, TokenEntry(user_id, valid_until, app_name))
+                               for token, user_id, valid_until, app_name in keys)
+        snapshot.grants = snapshot._make_grants(authorizations)
+        return snapshot
+
+    def get_token(self, token):
+        return self.tokens.get(token)
+
+    def get_user(self, token, today):
+        """
+        return the user of a valid token, None if the token is expired
+        the token must be known by the snapshot
+        """
+        entry = self.tokens[token]
+        if entry.valid_until is not None and entry.valid_until <= today:
+            return None
+        return self.users.get(entry.user_id)
+
+    def has_access(self, user, region, api):
+        """
+        return None if the region doesn't exist
+        """
+        instance = self.instances.get(region)
+        if instance is None:
+            return None
+        if user.is_super_user or (instance.is_free and user.have_access_to_free_instances):
+            return True
+        api_index = self.api_indexes.get(api)
+        if api_index is None:
+            return False
+        return bool(self.grants.get(user.id, 0) >> (instance.index * self.nb_apis + api_index) & 1)
+
+
+class AuthorizationTable(object):
+    """
+    keep the authorizations of the tyr database in memory, so the authentication of a request needs no i/o
+
+    the whole table is loaded in bulk, then a background greenlet reads the users and keys created or modified since
+    the last refresh every 'refresh_period' seconds. The rows have no deletion date, so the ids of the users, the
+    tokens of the keys and the authorizations, all cheap columns, are read completely to find the deleted ones.
+    If the instances or apis have changed, and every 'full_reload_period' seconds, the whole table is loaded again.
+    The requests always read a complete snapshot.
+    """
+    def __init__(self, app, refresh_period, full_reload_period=3600):
+        self.app = app
+        self.refresh_period = refresh_period
+        self.full_reload_period = full_reload_period
+        self.snapshot = None
+        self.last_update = None
+        self.last_full_update = None
+        self.refresher = None
+
+    @staticmethod
+    def _query_instances():
+        return db.session.query(Instance.id, Instance.name, Instance.is_free)\
+            .filter(Instance.discarded == False).order_by(Instance.id).all()
+
+    @staticmethod
+    def _query_apis():
+        return db.session.query(Api.id, Api.name).order_by(Api.id).all()
+
+    def _load(self):
+        with self.app.app_context():
+            # the authorizations are read below as tuples, no need to load them with each user
+            users = User.query.options(noload(User.authorizations)).all()
+            keys = db.session.query(Key.token, Key.user_id, Key.valid_until, Key.app_name).all()
+            authorizations = db.session.query(Authorization.user_id,
+                                              Authorization.instance_id,
+                                              Authorization.api_id).all()
+            # the users stay usable once the session is closed at the end of the app context
+            return AuthorizationSnapshot(users, keys, self._query_instances(), self._query_apis(), authorizations)
+
+    def _load_changes(self, snapshot, since):
+        """
+        return the snapshot updated with the rows created or modified since 'since',
+        None if it cannot be updated and must be loaded again
+        """
+        with self.app.app_context():
+            instances = [tuple(i) for i in self._query_instances()]
+            apis = [tuple(a) for a in self._query_apis()]
+            if instances != snapshot.instance_rows or apis != snapshot.api_rows:
+                return None
+            users = User.query.options(noload(User.authorizations))\
+                .filter(or_(User.created_at > since, User.updated_at > since)).all()
+            keys = db.session.query(Key.token, Key.user_id, Key.valid_until, Key.app_name)\
+                .filter(or_(Key.created_at > since, Key.updated_at > since)).all()
+            # the deleted rows are the ones missing from the db
+            user_ids = [user_id for user_id, in db.session.query(User.id)]
+            tokens = [token for token, in db.session.query(Key.token)]
+            authorizations = db.session.query(Authorization.user_id,
+                                              Authorization.instance_id,
+                                              Authorization.api_id).all()
+            return snapshot.updated(users, keys, user_ids, tokens, authorizations)
+
+    def update(self):
+        start = time.time()
+        now = datetime.datetime.utcnow()
+        snapshot = None
+        if self.snapshot is not None and \
+                (now - self.last_full_update).total_seconds() < self.full_reload_period:
+            snapshot = self._load_changes(self.snapshot, self.last_update - _UPDATE_MARGIN)
+        if snapshot is None:
+            snapshot = self._load()
+            self.last_full_update = now
+        self.snapshot = snapshot
+        self.last_update = now
+        logging.getLogger(__name__).debug('authorization table %s in %.3fs: %s users, %s tokens',
+                                          'reloaded' if self.last_full_update == now else 'updated',
+                                          time.time() - start, len(self.snapshot.users),
+                                          len(self.snapshot.tokens))
+
+    def _refresh_loop(self):
+        while True:
+            gevent.sleep(self.refresh_period * random.uniform(1 - _REFRESH_JITTER, 1 + _REFRESH_JITTER))
+            try:
+                self.update()
+            except Exception:
+                # we keep the previous snapshot
+                logging.getLogger(__name__).exception('impossible to reload the authorization table')
+
+    def get_snapshot(self):
+        """
+        return the current snapshot, None if the table is deactivated or has never been loaded
+        """
+        if not self.refresh_period:
+            return None
+        if self.refresher is None or self.refresher.dead:
+            # the refresher is started lazily to have one in each worker
+            self.refresher = gevent.spawn(self._refresh_loop)
+            if self.snapshot is None:
+                try:
+                    self.update()
+                except Exception:
+                    logging.getLogger(__name__).exception('impossible to load the authorization table')
+        return self.snapshot
@@ -33,6 +33,7 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 import logging
 
 import jormungandr
+from jormungandr import http_pool
 from jormungandr.autocomplete.abstract_autocomplete import AbstractAutocomplete
 from jormungandr.utils import get_lon_lat as get_lon_lat_from_id, get_house_number
 import requests
@@ -509,10 +510,10 @@ class GeocodeJson(AbstractAutocomplete):
         url = self.make_url('autocomplete')
 
         kwargs = {"params": params, "timeout": self.timeout}
-        method = requests.get
+        method = http_pool.get
         if shape:
             kwargs["json"] = {"shape": shape}
-            method = requests.post
+            method = http_pool.post
 
         raw_response = self.call_bragi(url, method, **kwargs)
         depth = request.get('depth', 1)
@@ -542,7 +543,7 @@ class GeocodeJson(AbstractAutocomplete):
         else:
             url = self.make_url('features', uri)
 
-        raw_response = self.call_bragi(url, requests.get, timeout=self.timeout, params=params)
+        raw_response = self.call_bragi(url, http_pool.get, timeout=self.timeout, params=params)
         return self.response_marshaler(raw_response, uri)
 
     def status(self):
@@ -11,6 +11,18 @@ INSTANCES_DIR = os.getenv('JORMUNGANDR_INSTANCES_DIR', '/etc/jormungandr.d')
 # Start the thread at startup, True in production, False for test environments
 START_MONITORING_THREAD = boolean(os.getenv('JORMUNGANDR_START_MONITORING_THREAD', True))
 
+# The monitoring thread probes all the krakens with this period (in seconds, 0 to deactivate it): their health is
+# recorded and their metadata are refreshed. /coverage is served from these metadata while they are younger than
+# COVERAGE_METADATA_MAX_AGE_S, the krakens are queried again otherwise
+KRAKEN_MONITORING_PERIOD_S = int(os.getenv('JORMUNGANDR_KRAKEN_MONITORING_PERIOD_S', 10))
+COVERAGE_METADATA_MAX_AGE_S = int(os.getenv('JORMUNGANDR_COVERAGE_METADATA_MAX_AGE_S', 60))
+
+# A kraken is considered unhealthy after this number of consecutive failed probes (or when it has no usable
+# data), it is then avoided when choosing an instance. The round trip time percentiles of the instances are
+# computed on their last KRAKEN_HEALTH_NB_SAMPLES probes
+KRAKEN_HEALTH_MAX_FAILURES = int(os.getenv('JORMUNGANDR_KRAKEN_HEALTH_MAX_FAILURES', 2))
+KRAKEN_HEALTH_NB_SAMPLES = int(os.getenv('JORMUNGANDR_KRAKEN_HEALTH_NB_SAMPLES', 100))
+
 #URI for postgresql
 # postgresql://<user>:<password>@<host>:<port>/<dbname>
 #http://docs.sqlalchemy.org/en/rel_0_9/dialects/postgresql.html#psycopg2
@@ -87,6 +99,23 @@ STAT_CONNECTION_TIMEOUT = float(os.getenv('JORMUNGANDR_STAT_CONNECTION_TIMEOUT',
 STAT_CIRCUIT_BREAKER_MAX_FAIL = int(os.getenv('JORMUNGANDR_STAT_CIRCUIT_BREAKER_MAX_FAIL', 5))
 # the circuit breaker retries after this timeout (in seconds)
 STAT_CIRCUIT_BREAKER_TIMEOUT_S = int(os.getenv('JORMUNGANDR_STAT_CIRCUIT_BREAKER_TIMEOUT_S', 60))
+# the stats are published in background, max number of stats waiting to be published (0 to publish them
+# synchronously in the requests)
+STAT_QUEUE_SIZE = int(os.getenv('JORMUNGANDR_STAT_QUEUE_SIZE', 1000))
+# max number of stats published at once
+STAT_BATCH_SIZE = int(os.getenv('JORMUNGANDR_STAT_BATCH_SIZE', 100))
+# when the queue is full, the stat is dropped, unless we block the request until there is some room in the queue
+# (for at most STAT_QUEUE_PUT_TIMEOUT seconds)
+STAT_BLOCK_WHEN_QUEUE_FULL = boolean(os.getenv('JORMUNGANDR_STAT_BLOCK_WHEN_QUEUE_FULL', False))
+STAT_QUEUE_PUT_TIMEOUT = float(os.getenv('JORMUNGANDR_STAT_QUEUE_PUT_TIMEOUT', 0.1))
+
+# the durations of the main stages of the requests (kraken calls, street network, realtime proxies, scenario,
+# serialization) are aggregated in memory by endpoint and exposed on /v1/tracing
+TRACING_ENABLED = boolean(os.getenv('JORMUNGANDR_TRACING_ENABLED', True))
+# one request out of TRACING_PROFILING_SAMPLE_RATE is profiled with cProfile (0 to deactivate it), the
+# TRACING_PROFILING_NB_FUNCTIONS most expensive functions of each endpoint are exposed
+TRACING_PROFILING_SAMPLE_RATE = int(os.getenv('JORMUNGANDR_TRACING_PROFILING_SAMPLE_RATE', 0))
+TRACING_PROFILING_NB_FUNCTIONS = int(os.getenv('JORMUNGANDR_TRACING_PROFILING_NB_FUNCTIONS', 30))
 
 #Cache configuration, see https://pythonhosted.org/Flask-Cache/ for more information
 default_cache = {
@@ -96,10 +125,47 @@ default_cache = {
     'TIMEOUT_PARAMS': 600,
     'TIMEOUT_TIMEO': 60,
     'TIMEOUT_SYNTHESE': 30,
+    'TIMEOUT_DIRECT_PATH': 3600,
 }
 
 CACHE_CONFIGURATION = json.loads(os.getenv('JORMUNGANDR_CACHE_CONFIGURATION', '{}')) or default_cache
 
+# the parameters of the instances are kept in memory and read again from the db after this delay (in seconds)
+# or when kraken loads new data
+INSTANCE_PARAMETERS_REFRESH_S = int(os.getenv('JORMUNGANDR_INSTANCE_PARAMETERS_REFRESH_S', 60))
+
+# the users, tokens and authorizations of the db are kept in memory to authenticate the requests without any i/o,
+# the rows modified since the last refresh are read again from the db after this delay (in seconds, randomized by
+# 20% in each worker). 0 to deactivate it and query the db (and cache)
+AUTHORIZATION_TABLE_REFRESH_S = int(os.getenv('JORMUNGANDR_AUTHORIZATION_TABLE_REFRESH_S', 60))
+# the whole table is loaded again after this delay (in seconds) or as soon as the instances or apis have changed,
+# the deleted rows are found at each refresh
+AUTHORIZATION_TABLE_FULL_RELOAD_S = int(os.getenv('JORMUNGANDR_AUTHORIZATION_TABLE_FULL_RELOAD_S', 3600))
+
+# In-process cache of the street network fallback durations (distributed scenario), shared by all the requests of
+# a worker. The size is the max number of entries kept (0 to deactivate it), the ttl is in seconds
+FALLBACK_DURATIONS_CACHE_SIZE = int(os.getenv('JORMUNGANDR_FALLBACK_DURATIONS_CACHE_SIZE', 1000))
+FALLBACK_DURATIONS_CACHE_TTL = int(os.getenv('JORMUNGANDR_FALLBACK_DURATIONS_CACHE_TTL', 300))
+
+# In-process cache of the region and uri of the external codes queried without region, an entry is also
+# invalidated when the data of its region are reloaded. The size is the max number of entries kept (0 to
+# deactivate it), the ttl is in seconds
+EXTERNAL_CODES_CACHE_SIZE = int(os.getenv('JORMUNGANDR_EXTERNAL_CODES_CACHE_SIZE', 10000))
+EXTERNAL_CODES_CACHE_TTL = int(os.getenv('JORMUNGANDR_EXTERNAL_CODES_CACHE_TTL', 600))
+
+# In-process cache of the crow fly proximities (the stop_points around the origin/destination of the journeys,
+# distributed scenario). The coord of the place is rounded to CROW_FLY_CACHE_COORD_PRECISION decimals (4 is about
+# 10 meters) to share an entry between close places. The size is the max number of entries kept (0 to deactivate
+# it), the ttl is in seconds
+CROW_FLY_CACHE_SIZE = int(os.getenv('JORMUNGANDR_CROW_FLY_CACHE_SIZE', 1000))
+CROW_FLY_CACHE_TTL = int(os.getenv('JORMUNGANDR_CROW_FLY_CACHE_TTL', 300))
+CROW_FLY_CACHE_COORD_PRECISION = int(os.getenv('JORMUNGANDR_CROW_FLY_CACHE_COORD_PRECISION', 4))
+
+# In-process cache of the places found by kraken for the pickups and dropoffs of the ridesharing offers. The size is
+# the max number of entries kept (0 to deactivate it), the ttl is in seconds
+RIDESHARING_PLACES_CACHE_SIZE = int(os.getenv('JORMUNGANDR_RIDESHARING_PLACES_CACHE_SIZE', 1000))
+RIDESHARING_PLACES_CACHE_TTL = int(os.getenv('JORMUNGANDR_RIDESHARING_PLACES_CACHE_TTL', 600))
+
 # List of enabled modules
 MODULES = {
     'v1': {  # API v1 of Navitia
@@ -159,10 +225,33 @@ PATCH_WITH_GEVENT_SOCKET = bool(os.getenv('JORMUNGANDR_PATCH_WITH_GEVENT_SOCKET'
 
 GREENLET_POOL_SIZE = int(os.getenv('JORMUNGANDR_GEVENT_POOL_SIZE', 10))
 
+# the http connections to the external services are kept alive and shared, max number of hosts in the pool and
+# max number of connections kept by host
+HTTP_POOL_NB_HOSTS = int(os.getenv('JORMUNGANDR_HTTP_POOL_NB_HOSTS', 20))
+HTTP_POOL_MAX_SIZE = int(os.getenv('JORMUNGANDR_HTTP_POOL_MAX_SIZE', 10))
+
+# deadline (in seconds) for all the calls to the realtime proxies of a request, the route points whose proxy
+# has not answered in time are displayed with their base schedule. 0 means no deadline
+REALTIME_PROXY_GLOBAL_TIMEOUT_S = float(os.getenv('JORMUNGANDR_REALTIME_PROXY_GLOBAL_TIMEOUT_S', 5))
+
+# max number of idle zmq sockets kept for each kraken (and asgard), the extra sockets are closed after use
+ZMQ_SOCKET_POOL_MAX_IDLE = int(os.getenv('JORMUNGANDR_ZMQ_SOCKET_POOL_MAX_IDLE', 10))
+
+# number of sockets connected in advance to each kraken when it is probed
+ZMQ_SOCKET_POOL_WARM_UP = int(os.getenv('JORMUNGANDR_ZMQ_SOCKET_POOL_WARM_UP', 1))
+
+# size (in degrees) of the cells of the grid used to find the coverages containing a coord
+INSTANCES_SPATIAL_INDEX_CELL_SIZE = float(os.getenv('JORMUNGANDR_INSTANCES_SPATIAL_INDEX_CELL_SIZE', 0.5))
+
 USE_SERPY = boolean(os.getenv('JORMUNGANDR_USE_SERPY', False))
+# the serpy serializers of the endpoints are replaced at startup by generated code (same output, less overhead)
+COMPILE_SERIALIZERS = boolean(os.getenv('JORMUNGANDR_COMPILE_SERIALIZERS', True))
 
 PARSER_MAX_COUNT = int(os.getenv('JORMUNGANDR_PARSER_MAX_COUNT', 1000))
 
+# max number of combinations visited when culling the journeys (max_nb_journeys), it bounds the cpu time spent
+CULLING_MAX_NB_SEARCH_NODES = int(os.getenv('JORMUNGANDR_CULLING_MAX_NB_SEARCH_NODES', 100000))
+
 if boolean(os.getenv('JORMUNGANDR_DISABLE_SQLPOOLING', False)):
     from sqlalchemy.pool import NullPool
     SQLALCHEMY_POOLCLASS = NullPool
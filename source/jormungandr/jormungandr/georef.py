@@ -30,7 +30,8 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
 from navitiacommon import request_pb2, response_pb2, type_pb2
 import logging
-from jormungandr import utils
+import gevent.pool
+from jormungandr import utils, app, tracing
 
 
 class Kraken(object):
@@ -59,6 +60,28 @@ class Kraken(object):
             return p
         return None
 
+    def places(self, uris):
+        """
+        Get several places at once
+
+        kraken only handles one place by request, but the distinct uris are requested concurrently
+        instead of one after the other
+        :return: a dict {uri: place or None if not found}
+        """
+        distinct_uris = set(uris)
+        if not distinct_uris:
+            return {}
+        # the request context is copied in the greenlets for the logs (request_id) of the kraken requests
+        reqctx = utils.copy_flask_request_context()
+
+        def worker(uri):
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                return self.place(uri)
+
+        pool = gevent.pool.Pool(app.config.get('GREENLET_POOL_SIZE', 3))
+        futures = {uri: pool.spawn(tracing.bind(worker), uri) for uri in distinct_uris}
+        return {uri: future.get() for uri, future in futures.items()}
+
     def get_car_co2_emission_on_crow_fly(self, origin, destination):
         logger = logging.getLogger(__name__)
         req = request_pb2.Request()
@@ -0,0 +1,77 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves import http_cookiejar
+
+
+class HttpConnectionPool(object):
+    """
+    Shared http client of the external services (street network, autocomplete, realtime proxies, ...)
+
+    The connections are kept alive and reused between the calls instead of opening a new tcp/tls connection
+    for each call like requests.get does. The pool keeps at most 'pool_maxsize' connections by host for
+    'nb_hosts' hosts, if more connections are needed they are opened and closed after use (the calls never
+    wait for a free connection, there is no blocking with gevent).
+
+    The timeouts are still given for each call, and the circuit breakers are still handled by the connectors.
+    """
+    def __init__(self, nb_hosts=20, pool_maxsize=10):
+        self.session = requests.Session()
+        # the connectors are not supposed to share any state between calls
+        self.session.cookies.set_policy(http_cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self.adapter = HTTPAdapter(pool_connections=nb_hosts, pool_maxsize=pool_maxsize, pool_block=False)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def request(self, method, url, **kwargs):
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request('POST', url, data=data, **kwargs)
+
+    def status(self):
+        pools = self.adapter.poolmanager.pools
+        result = []
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            result.append({
+                'host': '{}://{}:{}'.format(pool.scheme, pool.host, pool.port),
+                'connections_created': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': sum(1 for c in list(pool.pool.queue) if c is not None) if pool.pool else 0,
+            })
+        return result
@@ -30,21 +30,20 @@
 # www.navitia.io
 
 from __future__ import absolute_import, print_function, unicode_literals, division
-from contextlib import contextmanager
-import queue
 from threading import Lock
 from flask.ext.restful import abort
-from zmq import green as zmq
 
 from jormungandr.exceptions import TechnicalError
 from navitiacommon import response_pb2, request_pb2, type_pb2
 from navitiacommon.default_values import get_value_or_default
 from jormungandr.timezone import set_request_instance_timezone
+from jormungandr.zmq_socket_pool import ZmqSocketPool
+from jormungandr.instance_health import InstanceHealth
 import logging
 from .exceptions import DeadSocketException
 from navitiacommon import models
 from importlib import import_module
-from jormungandr import cache, app, global_autocomplete
+from jormungandr import cache, app, global_autocomplete, tracing, utils
 from shapely import wkt
 from shapely.geos import ReadingError
 from shapely import geometry
@@ -55,6 +54,9 @@ from jormungandr import georef, planner, schedule, realtime_schedule, ptref, str
 from jormungandr.scenarios.ridesharing import ridesharing_service
 import itertools
 import six
+import time
+import gevent.pool
+from collections import namedtuple
 
 type_to_pttype = {
       "stop_area": request_pb2.PlaceCodeRequest.StopArea,
@@ -69,6 +71,19 @@ type_to_pttype = {
 
 STREET_NETWORK_MODES = ('walking', 'car', 'bss', 'bike')
 
+# the parameters of an instance, with their default values if they are not set in the db
+INSTANCE_PARAMETERS = ('journey_order', 'max_walking_duration_to_pt', 'max_bss_duration_to_pt',
+                       'max_bike_duration_to_pt', 'max_car_duration_to_pt', 'max_car_no_park_duration_to_pt',
+                       'walking_speed', 'bss_speed', 'bike_speed', 'car_speed', 'car_no_park_speed',
+                       'max_nb_transfers', 'min_tc_with_car', 'min_tc_with_bike', 'min_tc_with_bss',
+                       'min_bike', 'min_bss', 'min_car', 'factor_too_long_journey',
+                       'successive_physical_mode_to_limit_id', 'min_duration_too_long_journey',
+                       'max_duration_criteria', 'max_duration_fallback_mode', 'priority', 'bss_provider',
+                       'car_park_provider', 'max_additional_connections', 'max_duration',
+                       'walking_transfer_penalty', 'night_bus_filter_max_factor',
+                       'night_bus_filter_base_factor', 'realtime_pool_size', 'is_free', 'is_open_data')
+InstanceParameters = namedtuple('InstanceParameters', INSTANCE_PARAMETERS)
+
 @app.before_request
 def _init_g():
     g.instances_model = {}
@@ -102,8 +117,10 @@ class Instance(object):
                  zmq_socket_type,
                  autocomplete_type):
         self.geom = None
-        self._sockets = queue.Queue()
         self.socket_path = zmq_socket
+        self.socket_pool = ZmqSocketPool(context, zmq_socket,
+                                         max_idle_sockets=app.config.get('ZMQ_SOCKET_POOL_MAX_IDLE', 10),
+                                         transient=(zmq_socket_type == 'transient'))
         self._scenario = None
         self._scenario_name = None
         self.lock = Lock()
@@ -111,9 +128,12 @@ class Instance(object):
         self.name = name
         self.timezone = None  # timezone will be fetched from the kraken
         self.publication_date = -1
+        self._parameters = (None, None)
         self.is_initialized = False #kraken hasn't been called yet we don't have geom nor timezone
         self.breaker = pybreaker.CircuitBreaker(fail_max=app.config['CIRCUIT_BREAKER_MAX_INSTANCE_FAIL'],
                                                 reset_timeout=app.config['CIRCUIT_BREAKER_INSTANCE_TIMEOUT_S'])
+        self.health = InstanceHealth(nb_samples=app.config.get('KRAKEN_HEALTH_NB_SAMPLES', 100),
+                                     max_failures=app.config.get('KRAKEN_HEALTH_MAX_FAILURES', 2))
         self.georef = georef.Kraken(self)
         self.planner = planner.Kraken(self)
 
@@ -137,6 +157,27 @@ class Instance(object):
 
         self.zmq_socket_type = zmq_socket_type
 
+    def get_parameters(self):
+        """
+        Get an immutable snapshot of the parameters of the instance.
+
+        The snapshot is kept in the process and reading it doesn't need any I/O, it is rebuilt from the db
+        every INSTANCE_PARAMETERS_REFRESH_S seconds or when new data are loaded by kraken
+        """
+        expiration, parameters = self._parameters
+        if parameters is None or expiration < time.time():
+            parameters = self._build_parameters()
+            self._parameters = (time.time() + app.config.get('INSTANCE_PARAMETERS_REFRESH_S', 60), parameters)
+        return parameters
+
+    def _build_parameters(self):
+        instance_db = self.get_models()
+        values = {attr: get_value_or_default(attr, instance_db, self.name)
+                  for attr in INSTANCE_PARAMETERS if attr not in ('is_free', 'is_open_data')}
+        values['is_free'] = instance_db.is_free if instance_db else False
+        values['is_open_data'] = instance_db.is_open_data if instance_db else False
+        return InstanceParameters(**values)
+
     def get_models(self):
         if self.name not in g.instances_model:
             g.instances_model[self.name] = self._get_models()
@@ -192,202 +233,139 @@ class Instance(object):
 
     @property
     def journey_order(self):
-        instance_db = self.get_models()
-        return get_value_or_default('journey_order', instance_db, self.name)
+        return self.get_parameters().journey_order
 
     @property
     def max_walking_duration_to_pt(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_walking_duration_to_pt', instance_db, self.name)
+        return self.get_parameters().max_walking_duration_to_pt
 
     @property
     def max_bss_duration_to_pt(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_bss_duration_to_pt', instance_db, self.name)
+        return self.get_parameters().max_bss_duration_to_pt
 
     @property
     def max_bike_duration_to_pt(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_bike_duration_to_pt', instance_db, self.name)
+        return self.get_parameters().max_bike_duration_to_pt
 
     @property
     def max_car_duration_to_pt(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_car_duration_to_pt', instance_db, self.name)
+        return self.get_parameters().max_car_duration_to_pt
 
     @property
     def max_car_no_park_duration_to_pt(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_car_no_park_duration_to_pt', instance_db, self.name)
+        return self.get_parameters().max_car_no_park_duration_to_pt
 
     @property
     def walking_speed(self):
-        instance_db = self.get_models()
-        return get_value_or_default('walking_speed', instance_db, self.name)
+        return self.get_parameters().walking_speed
 
     @property
     def bss_speed(self):
-        instance_db = self.get_models()
-        return get_value_or_default('bss_speed', instance_db, self.name)
+        return self.get_parameters().bss_speed
 
     @property
     def bike_speed(self):
-        instance_db = self.get_models()
-        return get_value_or_default('bike_speed', instance_db, self.name)
+        return self.get_parameters().bike_speed
 
     @property
     def car_speed(self):
-        instance_db = self.get_models()
-        return get_value_or_default('car_speed', instance_db, self.name)
+        return self.get_parameters().car_speed
 
     @property
     def car_no_park_speed(self):
-        instance_db = self.get_models()
-        return get_value_or_default('car_no_park_speed', instance_db, self.name)
+        return self.get_parameters().car_no_park_speed
 
     @property
     def max_nb_transfers(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_nb_transfers', instance_db, self.name)
+        return self.get_parameters().max_nb_transfers
 
     @property
     def min_tc_with_car(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_tc_with_car', instance_db, self.name)
+        return self.get_parameters().min_tc_with_car
 
     @property
     def min_tc_with_bike(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_tc_with_bike', instance_db, self.name)
+        return self.get_parameters().min_tc_with_bike
 
     @property
     def min_tc_with_bss(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_tc_with_bss', instance_db, self.name)
+        return self.get_parameters().min_tc_with_bss
 
     @property
     def min_bike(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_bike', instance_db, self.name)
+        return self.get_parameters().min_bike
 
     @property
     def min_bss(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_bss', instance_db, self.name)
+        return self.get_parameters().min_bss
 
     @property
     def min_car(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_car', instance_db, self.name)
+        return self.get_parameters().min_car
 
     @property
     def factor_too_long_journey(self):
-        instance_db = self.get_models()
-        return get_value_or_default('factor_too_long_journey', instance_db, self.name)
+        return self.get_parameters().factor_too_long_journey
 
     @property
     def successive_physical_mode_to_limit_id(self):
-        instance_db = self.get_models()
-        return get_value_or_default('successive_physical_mode_to_limit_id', instance_db, self.name)
+        return self.get_parameters().successive_physical_mode_to_limit_id
 
     @property
     def min_duration_too_long_journey(self):
-        instance_db = self.get_models()
-        return get_value_or_default('min_duration_too_long_journey', instance_db, self.name)
+        return self.get_parameters().min_duration_too_long_journey
 
     @property
     def max_duration_criteria(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_duration_criteria', instance_db, self.name)
+        return self.get_parameters().max_duration_criteria
 
     @property
     def max_duration_fallback_mode(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_duration_fallback_mode', instance_db, self.name)
+        return self.get_parameters().max_duration_fallback_mode
 
     @property
     def priority(self):
-        instance_db = self.get_models()
-        return get_value_or_default('priority', instance_db, self.name)
+        return self.get_parameters().priority
 
     @property
     def bss_provider(self):
-        instance_db = self.get_models()
-        return get_value_or_default('bss_provider', instance_db, self.name)
+        return self.get_parameters().bss_provider
 
     @property
     def car_park_provider(self):
-        instance_db = self.get_models()
-        return get_value_or_default('car_park_provider', instance_db, self.name)
+        return self.get_parameters().car_park_provider
 
     @property
     def max_additional_connections(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_additional_connections', instance_db, self.name)
+        return self.get_parameters().max_additional_connections
 
     @property
     def is_free(self):
-        instance_db = self.get_models()
-        if not instance_db:
-            return False
-        else:
-            return instance_db.is_free
+        return self.get_parameters().is_free
 
     @property
     def is_open_data(self):
-        instance_db = self.get_models()
-        if not instance_db:
-            return False
-        else:
-            return instance_db.is_open_data
+        return self.get_parameters().is_open_data
 
     @property
     def max_duration(self):
-        instance_db = self.get_models()
-        return get_value_or_default('max_duration', instance_db, self.name)
+        return self.get_parameters().max_duration
 
     @property
     def walking_transfer_penalty(self):
-        instance_db = self.get_models()
-        return get_value_or_default('walking_transfer_penalty', instance_db, self.name)
+        return self.get_parameters().walking_transfer_penalty
 
     @property
     def night_bus_filter_max_factor(self):
-        instance_db = self.get_models()
-        return get_value_or_default('night_bus_filter_max_factor', instance_db, self.name)
+        return self.get_parameters().night_bus_filter_max_factor
 
     @property
     def night_bus_filter_base_factor(self):
-        instance_db = self.get_models()
-        return get_value_or_default('night_bus_filter_base_factor', instance_db, self.name)
+        return self.get_parameters().night_bus_filter_base_factor
 
     @property
     def realtime_pool_size(self):
-        instance_db = self.get_models()
-        return get_value_or_default('realtime_pool_size', instance_db, self.name)
-
-    @contextmanager
-    def socket(self, context):
-        socket = None
-        if self.zmq_socket_type == 'transient':
-            socket = context.socket(zmq.REQ)
-            socket.connect(self.socket_path)
-            try:
-                yield socket
-            finally:
-                if not socket.closed:
-                    socket.close()
-        else:
-            try:
-                socket = self._sockets.get(block=False)
-            except queue.Empty:
-                socket = context.socket(zmq.REQ)
-                socket.connect(self.socket_path)
-            try:
-                yield socket
-            finally:
-                if not socket.closed:
-                    self._sockets.put(socket)
+        return self.get_parameters().realtime_pool_size
 
     def send_and_receive(self, *args, **kwargs):
         """
@@ -403,28 +381,24 @@ class Instance(object):
                          timeout=app.config.get('INSTANCE_TIMEOUT', 10000),
                          quiet=False,
                          **kwargs):
-        logger = logging.getLogger(__name__)
-        with self.socket(self.context) as socket:
-            try:
-                request.request_id = flask.request.id
-            except RuntimeError:
-                # we aren't in a flask context, so there is no request
-
-                if 'flask_request_id' in kwargs:
-                    request.request_id = kwargs['flask_request_id']
-            socket.send(request.SerializeToString())
-            if socket.poll(timeout=timeout) > 0:
-                pb = socket.recv()
-                resp = response_pb2.Response()
-                resp.ParseFromString(pb)
-                self.update_property(resp)#we update the timezone and geom of the instances at each request
-                return resp
-            else:
-                socket.setsockopt(zmq.LINGER, 0)
-                socket.close()
-                if not quiet:
-                    logger.error('request on %s failed: %s', self.socket_path, six.text_type(request))
-                raise DeadSocketException(self.name, self.socket_path)
+        try:
+            request.request_id = flask.request.id
+        except RuntimeError:
+            # we aren't in a flask context, so there is no request
+
+            if 'flask_request_id' in kwargs:
+                request.request_id = kwargs['flask_request_id']
+        with tracing.span('kraken.{}'.format(type_pb2.API.Name(request.requested_api))):
+            pb = self.socket_pool.send_and_receive(request.SerializeToString(), timeout)
+        if pb is None:
+            if not quiet:
+                logging.getLogger(__name__).error('request on %s failed: %s',
+                                                  self.socket_path, six.text_type(request))
+            raise DeadSocketException(self.name, self.socket_path)
+        resp = response_pb2.Response()
+        resp.ParseFromString(pb)
+        self.update_property(resp)#we update the timezone and geom of the instances at each request
+        return resp
 
     def get_id(self, id_):
         """
@@ -498,6 +472,8 @@ class Instance(object):
                 else:
                     self.geom = None
                 self.timezone = response.metadatas.timezone
+                # new data have been loaded, the parameters will be read again from the db
+                self._parameters = (None, None)
         set_request_instance_timezone(self)
 
     def init(self):
@@ -506,11 +482,8 @@ class Instance(object):
         Returns True if we need to clear the cache, False otherwise.
         """
         pub_date = self.publication_date
-        req = request_pb2.Request()
-        req.requested_api = type_pb2.METADATAS
         try:
-            #we use _send_and_receive to avoid the circuit breaker, we don't want fast fail on init :)
-            resp = self._send_and_receive(req, timeout=1000, quiet=True)
+            self.probe(timeout=1000)
             #the instance is automatically updated on a call
             if self.publication_date != pub_date:
                 return True
@@ -520,6 +493,33 @@ class Instance(object):
             logging.getLogger(__name__).debug('timeout on init for %s', self.name)
         return False
 
+    def probe(self, timeout=1000):
+        """
+        Query the metadata of the kraken and record its health (round trip time, status, publication date)
+
+        the circuit breaker is bypassed, this way a kraken back to life is detected and its breaker is closed
+        before a user request has to try it. Some sockets are also connected in advance for the next requests.
+        Raises DeadSocketException if the kraken doesn't answer
+        """
+        req = request_pb2.Request()
+        req.requested_api = type_pb2.METADATAS
+        start = time.time()
+        try:
+            resp = self._send_and_receive(req, timeout=timeout, quiet=True)
+        except DeadSocketException:
+            self.health.add_failure()
+            raise
+        self.health.add_success(time.time() - start, resp.metadatas.status, self.publication_date)
+        if self.breaker.current_state != 'closed':
+            logging.getLogger(__name__).info('%s answers again, closing its circuit breaker', self.name)
+            self.breaker.close()
+        self.socket_pool.warm_up(app.config.get('ZMQ_SOCKET_POOL_WARM_UP', 1))
+        return resp
+
+    @property
+    def is_healthy(self):
+        return self.health.is_healthy
+
     def get_street_network(self, mode, request):
         overriden_sn_id = request.get('_street_network')
         if overriden_sn_id:
@@ -538,12 +538,13 @@ class Instance(object):
         service = self.get_street_network(mode, request)
         if not service:
             return None
-        return service.get_street_network_routing_matrix(origins,
-                                                         destinations,
-                                                         mode,
-                                                         max_duration_to_pt,
-                                                         request,
-                                                         **kwargs)
+        with tracing.span('street_network.matrix.{}'.format(type(service).__name__)):
+            return service.get_street_network_routing_matrix(origins,
+                                                             destinations,
+                                                             mode,
+                                                             max_duration_to_pt,
+                                                             request,
+                                                             **kwargs)
 
     def direct_path(self, mode, pt_object_origin, pt_object_destination, fallback_extremity, request, direct_path_type):
         """
@@ -552,12 +553,13 @@ class Instance(object):
         service = self.get_street_network(mode, request)
         if not service:
             return None
-        return service.direct_path_with_fp(mode,
-                                           pt_object_origin,
-                                           pt_object_destination,
-                                           fallback_extremity,
-                                           request,
-                                           direct_path_type)
+        with tracing.span('street_network.direct_path.{}'.format(type(service).__name__)):
+            return service.direct_path_with_fp(mode,
+                                               pt_object_origin,
+                                               pt_object_destination,
+                                               fallback_extremity,
+                                               request,
+                                               direct_path_type)
 
     def get_autocomplete(self, requested_autocomplete):
         if not requested_autocomplete:
@@ -568,10 +570,20 @@ class Instance(object):
         return autocomplete
 
     def get_ridesharing_journeys_with_feed_publishers(self, from_coord, to_coord, period_extremity, limit=None):
+        # the services are requested concurrently, the journeys are kept in the order of the services
+        # the request context is copied in the greenlets for the logs (request_id) of the services
+        reqctx = utils.copy_flask_request_context()
+
+        def worker(service):
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                return service.request_journeys_with_feed_publisher(from_coord, to_coord, period_extremity, limit)
+
+        pool = gevent.pool.Pool(app.config.get('GREENLET_POOL_SIZE', 3))
+        futures = [pool.spawn(tracing.bind(worker), service) for service in self.ridesharing_services]
         res = []
         fps = set()
-        for service in self.ridesharing_services:
-            rsjs, fp = service.request_journeys_with_feed_publisher(from_coord, to_coord, period_extremity, limit)
+        for future in futures:
+            rsjs, fp = future.get()
             res.extend(rsjs)
             fps.add(fp)
         return res, fps
@@ -0,0 +1,118 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from collections import deque
+import time
+
+
+class InstanceHealth(object):
+    """
+    Health of a kraken as seen by the probes of the monitoring thread.
+
+    The round trip times of the last 'nb_samples' successful probes are kept to compute percentiles.
+    An instance is unhealthy after 'max_failures' consecutive failed probes, or when its kraken has no usable data
+    (still loading or nothing loaded). An instance that has never been probed is considered healthy.
+
+    >>> h = InstanceHealth(nb_samples=4, max_failures=2, timer=lambda: 42)
+    >>> h.is_healthy
+    True
+    >>> for rtt in (0.01, 0.02, 0.03, 0.04, 0.05):
+    ...     h.add_success(rtt, 'running', '20180101T000000')
+    >>> h.rtt_percentile(50), h.rtt_percentile(100)
+    (0.03, 0.05)
+    >>> h.add_failure()
+    >>> h.is_healthy
+    True
+    >>> h.add_failure()
+    >>> h.is_healthy
+    False
+    >>> h.add_success(0.01, 'loading_data', '20180101T000000')
+    >>> h.is_healthy
+    False
+    """
+    usable_statuses = ('running',)
+
+    def __init__(self, nb_samples=100, max_failures=2, timer=time.time):
+        self.max_failures = max_failures
+        self._timer = timer
+        self._rtts = deque(maxlen=nb_samples)
+        self.consecutive_failures = 0
+        self.nb_probes = 0
+        self.nb_failures = 0
+        self.kraken_status = None
+        self.publication_date = None
+        self.last_probe_at = None
+        self.last_success_at = None
+
+    def add_success(self, rtt, kraken_status, publication_date):
+        self.nb_probes += 1
+        self.consecutive_failures = 0
+        self._rtts.append(rtt)
+        self.kraken_status = kraken_status
+        self.publication_date = publication_date
+        self.last_probe_at = self.last_success_at = self._timer()
+
+    def add_failure(self):
+        self.nb_probes += 1
+        self.nb_failures += 1
+        self.consecutive_failures += 1
+        self.last_probe_at = self._timer()
+
+    @property
+    def is_healthy(self):
+        if self.consecutive_failures >= self.max_failures:
+            return False
+        return self.kraken_status is None or self.kraken_status in self.usable_statuses
+
+    def rtt_percentile(self, percentile):
+        """
+        :return: the round trip time (in seconds) below which are 'percentile' % of the samples, None without sample
+        """
+        if not self._rtts:
+            return None
+        rtts = sorted(self._rtts)
+        # nearest-rank method
+        rank = max(int(-(-percentile * len(rtts) // 100)), 1)
+        return rtts[min(rank, len(rtts)) - 1]
+
+    def status(self):
+        return {
+            'is_healthy': self.is_healthy,
+            'kraken_status': self.kraken_status,
+            'publication_date': self.publication_date,
+            'probes': self.nb_probes,
+            'failures': self.nb_failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_probe_at': self.last_probe_at,
+            'last_success_at': self.last_success_at,
+            'rtt_p50': self.rtt_percentile(50),
+            'rtt_p90': self.rtt_percentile(90),
+            'rtt_p99': self.rtt_percentile(99),
+        }
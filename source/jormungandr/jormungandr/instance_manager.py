@@ -29,7 +29,7 @@
 # https://groups.google.com/d/forum/navitia
 # www.navitia.io
 from __future__ import absolute_import, print_function, unicode_literals, division
-from flask import json
+from flask import json, has_request_context
 
 from shapely import geometry
 from zmq import green as zmq
@@ -39,10 +39,15 @@ import logging
 from jormungandr.protobuf_to_dict import protobuf_to_dict
 from jormungandr.exceptions import ApiNotFound, RegionNotFound,\
     DeadSocketException, InvalidArguments
-from jormungandr import authentication, cache, app
+from jormungandr import authentication, cache, app, utils, tracing
 from jormungandr.instance import Instance
+from jormungandr.instances_spatial_index import InstancesSpatialIndex
+from jormungandr.local_cache import LocalCache
 import gevent
+import gevent.pool
 import os
+from collections import OrderedDict
+import time
 
 def instances_comparator(instance1, instance2):
     """
@@ -65,9 +70,11 @@ def instances_comparator(instance1, instance2):
 def choose_best_instance(instances):
     """
     get the best instance in term of the instances_comparator
+
+    the instances found unhealthy by the monitoring thread are only chosen when no instance is healthy
     """
     best = None
-    for i in instances:
+    for i in [i for i in instances if i.is_healthy] or instances:
         if not best or instances_comparator(i, best) > 0:
             best = i
     return best
@@ -86,6 +93,12 @@ class InstanceManager(object):
         self.start_ping = start_ping
         self.instances = {}
         self.context = zmq.Context()
+        self.spatial_index = InstancesSpatialIndex(cell_size=app.config.get('INSTANCES_SPATIAL_INDEX_CELL_SIZE', 0.5))
+        # (type, external code) -> (region, kraken uri, publication date of the region)
+        self.external_codes_cache = LocalCache(app.config.get('EXTERNAL_CODES_CACHE_SIZE', 0),
+                                               app.config.get('EXTERNAL_CODES_CACHE_TTL', 600))
+        # region -> (metadata of the region, timestamp of their fetch), refreshed by the ping thread
+        self.metadata_snapshot = {}
 
     def __repr__(self):
         return '<InstanceManager>'
@@ -175,12 +188,74 @@ class InstanceManager(object):
     def thread_ping(self, timer=10):
         """
         fetch krakens metadata
+
+        the uninitialized instances are initialized, then all the instances are probed every
+        KRAKEN_MONITORING_PERIOD_S seconds: their health is recorded and their metadata are kept to serve
+        /coverage from memory
         """
+        refresh_period = app.config.get('KRAKEN_MONITORING_PERIOD_S', 10)
         while [i for i in self.instances.values() if not i.is_initialized]:
             self.init_kraken_instances()
             gevent.sleep(timer)
+        while refresh_period:
+            try:
+                self.refresh_metadata(probe=True)
+            except Exception:
+                logging.getLogger(__name__).exception('impossible to refresh the metadata of the krakens')
+            gevent.sleep(refresh_period)
         logging.getLogger(__name__).debug('end of ping thread')
 
+    def _fetch_metadata(self, region, probe=False):
+        instance = self.instances[region]
+        try:
+            if probe:
+                resp = instance.probe(timeout=1000)
+            else:
+                req = request_pb2.Request()
+                req.requested_api = type_pb2.METADATAS
+                resp = instance.send_and_receive(req, timeout=1000)
+            return protobuf_to_dict(resp.metadatas)
+        except DeadSocketException:
+            return {
+                "status": "dead",
+                "error": {
+                    "code": "dead_socket",
+                    "value": "The region {} is dead".format(region)
+                }
+            }
+
+    def refresh_metadata(self, regions=None, probe=False):
+        """
+        fetch concurrently the metadata of the regions (all of them by default) and store them in the snapshot
+
+        like on init, the cache is purged if the data of a region have been reloaded.
+        With 'probe' the krakens are queried with Instance.probe (no circuit breaker, health recorded)
+        :return: dict region -> metadata
+        """
+        if regions is None:
+            regions = list(self.instances.keys())
+        publication_dates = {r: self.instances[r].publication_date for r in regions}
+        # for /coverage the request context is copied in the greenlets for the logs (request_id) of the kraken
+        # requests, the monitoring thread has no request context
+        reqctx = utils.copy_flask_request_context() if has_request_context() else None
+
+        def worker(region):
+            if reqctx is None:
+                return self._fetch_metadata(region, probe)
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                return self._fetch_metadata(region, probe)
+
+        futures = {r: gevent.spawn(tracing.bind(worker), r) for r in regions}
+        gevent.wait(list(futures.values()))
+        now = time.time()
+        metadata = {}
+        for region, future in futures.items():
+            metadata[region] = future.get()
+            self.metadata_snapshot[region] = (metadata[region], now)
+        if any(self.instances[r].publication_date != d for r, d in publication_dates.items()):
+            self._clear_cache()
+        return metadata
+
     def stop(self):
         if not self.thread_event.is_set():
             self.thread_event.set()
@@ -221,13 +296,21 @@ class InstanceManager(object):
         return instances
 
     def _all_keys_of_coord(self, lon, lat):
-        p = geometry.Point(lon, lat)
-        instances = [i.name for i in self.instances.values() if i.has_point(p)]
+        instances = self._all_keys_of_coords([(lon, lat)])[0]
         logging.getLogger(__name__).debug("all_keys_of_coord(self, {}, {}) returns {}".format(lon, lat, instances))
         if not instances:
             raise RegionNotFound(lon=lon, lat=lat)
         return instances
 
+    def _all_keys_of_coords(self, coords):
+        """
+        find the instances containing several coords at once
+        :param coords: list of (lon, lat)
+        :return: for each coord, the list of the keys of the instances containing it
+        """
+        points = [geometry.Point(lon, lat) for lon, lat in coords]
+        return self.spatial_index.instances_containing(list(self.instances.values()), points)
+
     def get_region(self, region_str=None, lon=None, lat=None, object_id=None, api='ALL'):
         return self.get_regions(region_str, lon, lat, object_id, api, only_one=True)
 
@@ -252,6 +335,70 @@ class InstanceManager(object):
         else:
             available_instances = list(self.instances.values())
 
+        return self._get_valid_instances(available_instances, api)
+
+    def get_instances_by_ids(self, object_ids, api='ALL'):
+        """
+        Same as get_instances(object_id=...) but for several objects, the instances of the distinct ids
+        are all looked for concurrently instead of one id after the other
+
+        :return: a dict {object_id: valid instances}
+        """
+        # the request context is copied in the greenlets for the logs (request_id) of the kraken requests
+        reqctx = utils.copy_flask_request_context()
+
+        def worker(object_id):
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                return self._all_keys_of_id(object_id)
+
+        object_ids = list(OrderedDict.fromkeys(object_ids))
+        futures = [gevent.spawn(worker, object_id) for object_id in object_ids]
+        try:
+            # the results are read in the order of the ids, if several ids are not found, the RegionNotFound
+            # raised is always the one of the first id
+            return {object_id: self._get_valid_instances([self.instances[k] for k in future.get()], api)
+                    for object_id, future in zip(object_ids, futures)}
+        finally:
+            gevent.killall(futures, block=False)
+
+    def find_external_code(self, type_, external_code):
+        """
+        Look for the region having an object with this external code
+
+        all the regions are asked concurrently, the first region to find it wins and the other requests are
+        cancelled. The result is cached until the data of the region are reloaded
+        :return: (region, kraken uri), (None, None) if no region has this external code
+        """
+        regions = self.get_regions()
+        cached = self.external_codes_cache.get((type_, external_code))
+        if cached:
+            region, uri, publication_date = cached
+            if region in regions and self.instances[region].publication_date == publication_date:
+                return region, uri
+
+        # the request context is copied in the greenlets for the logs (request_id) of the kraken requests
+        reqctx = utils.copy_flask_request_context()
+
+        def worker(region):
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                instance = self.instances[region]
+                # the publication date is read before the request, it's the oldest data the uri can come from
+                publication_date = instance.publication_date
+                return region, instance.has_external_code(type_, external_code), publication_date
+
+        pool = gevent.pool.Pool(app.config.get('GREENLET_POOL_SIZE', 3))
+        futures = [pool.spawn(tracing.bind(worker), region) for region in regions]
+        try:
+            for future in gevent.iwait(futures):
+                region, uri, publication_date = future.get()
+                if uri:
+                    self.external_codes_cache.set((type_, external_code), (region, uri, publication_date))
+                    return region, uri
+        finally:
+            pool.kill(block=False)
+        return None, None
+
+    def _get_valid_instances(self, available_instances, api):
         valid_instances = self._filter_authorized_instances(available_instances, api)
         if available_instances and not valid_instances:
             #user doesn't have access to any of the instances
@@ -260,28 +407,38 @@ class InstanceManager(object):
             return valid_instances
 
     def regions(self, region=None, lon=None, lat=None):
+        """
+        metadata of the regions for /coverage
+
+        they are taken from the snapshot refreshed by the ping thread, only the regions without metadata or with
+        metadata older than COVERAGE_METADATA_MAX_AGE_S are queried (concurrently).
+        metadata_age gives the number of seconds since the metadata of a region have been fetched
+        """
         response = {'regions': []}
         regions = []
         if region or lon or lat:
             regions.append(self.get_region(region_str=region, lon=lon, lat=lat))
         else:
             regions = self.get_regions()
+        max_age = app.config.get('COVERAGE_METADATA_MAX_AGE_S', 60)
+        now = time.time()
+        snapshot = {}
         for key_region in regions:
-            req = request_pb2.Request()
-            req.requested_api = type_pb2.METADATAS
-            try:
-                resp = self.instances[key_region].send_and_receive(req, timeout=1000)
-                resp_dict = protobuf_to_dict(resp.metadatas)
-            except DeadSocketException:
-                resp_dict = {
-                    "status": "dead",
-                    "error": {
-                        "code": "dead_socket",
-                        "value": "The region {} is dead".format(key_region)
-                    }
-                }
-            if resp_dict.get('status') == 'no_data' and not region and not lon and not lat:
+            metadata, fetched_at = self.metadata_snapshot.get(key_region, (None, None))
+            if metadata is not None and now - fetched_at <= max_age:
+                snapshot[key_region] = (metadata, fetched_at)
+        outdated_regions = [r for r in regions if r not in snapshot]
+        if outdated_regions:
+            self.refresh_metadata(outdated_regions)
+            snapshot.update((r, self.metadata_snapshot[r]) for r in outdated_regions)
+        now = time.time()
+        for key_region in regions:
+            metadata, fetched_at = snapshot[key_region]
+            if metadata.get('status') == 'no_data' and not region and not lon and not lat:
                 continue
+            # the snapshot is shared by all the requests, it must not be modified
+            resp_dict = dict(metadata)
             resp_dict['region_id'] = key_region
+            resp_dict['metadata_age'] = int(max(now - fetched_at, 0))
             response['regions'].append(resp_dict)
         return response
@@ -0,0 +1,106 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from shapely.prepared import prep
+from collections import defaultdict
+import math
+
+
+class InstancesSpatialIndex(object):
+    """
+    Grid index of the instances' geometries to find which instances contain a point without testing
+    the point against every geometry.
+
+    The space is divided into square cells of 'cell_size' degrees, each cell holds the instances whose
+    bounding box intersects it. The candidates of a point are then checked with a prepared geometry.
+    The geometries covering too many cells are not put in the grid, they are always candidates.
+
+    The index is rebuilt only when the geometry of an instance has changed.
+
+    >>> from shapely import geometry
+    >>> class Instance(object):
+    ...     def __init__(self, name, geom):
+    ...         self.name = name
+    ...         self.geom = geom
+    >>> instances = [Instance('a', geometry.box(0, 0, 2, 2)), Instance('b', geometry.box(1, 1, 3, 3)),
+    ...              Instance('c', None)]
+    >>> index = InstancesSpatialIndex(cell_size=1)
+    >>> points = [geometry.Point(0.5, 0.5), geometry.Point(1.5, 1.5), geometry.Point(5, 5)]
+    >>> [sorted(names) for names in index.instances_containing(instances, points)] == [['a'], ['a', 'b'], []]
+    True
+    """
+    def __init__(self, cell_size=1.0, max_cells_by_geom=10000):
+        self.cell_size = cell_size
+        self.max_cells_by_geom = max_cells_by_geom
+        self._signature = None
+        self._cells = {}
+        self._always_candidates = []
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _build(self, instances, signature):
+        cells = defaultdict(list)
+        always_candidates = []
+        # the geometries are kept in the index so their ids can't be reused by new ones
+        for instance in instances:
+            if instance.geom is None or instance.geom.is_empty:
+                continue
+            min_x, min_y, max_x, max_y = instance.geom.bounds
+            candidate = (instance.name, instance.geom, prep(instance.geom))
+            min_cell_x, min_cell_y = self._cell(min_x, min_y)
+            max_cell_x, max_cell_y = self._cell(max_x, max_y)
+            if (max_cell_x - min_cell_x + 1) * (max_cell_y - min_cell_y + 1) > self.max_cells_by_geom:
+                always_candidates.append(candidate)
+                continue
+            for cell_x in range(min_cell_x, max_cell_x + 1):
+                for cell_y in range(min_cell_y, max_cell_y + 1):
+                    cells[(cell_x, cell_y)].append(candidate)
+        self._cells, self._always_candidates, self._signature = dict(cells), always_candidates, signature
+
+    def _update(self, instances):
+        signature = tuple((instance.name, id(instance.geom)) for instance in instances)
+        if signature != self._signature:
+            self._build(instances, signature)
+
+    def instances_containing(self, instances, points):
+        """
+        :param instances: all the instances, the index is rebuilt if one of their geometries has changed
+        :param points: shapely points
+        :return: for each point, the list of the names of the instances containing it
+        """
+        self._update(instances)
+        cells = self._cells
+        always_candidates = self._always_candidates
+        result = []
+        for p in points:
+            candidates = cells.get(self._cell(p.x, p.y), [])
+            result.append([name for name, _, prepared_geom in candidates + always_candidates
+                           if prepared_geom.contains(p)])
+        return result
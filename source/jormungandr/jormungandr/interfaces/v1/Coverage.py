@@ -58,6 +58,7 @@ coverage_marshall_fields = [
             "value": fields.String
         }),
         "dataset_created_at": fields.String(),
+        "metadata_age": fields.Integer(),
     }))),
     ('context', context_utc)
 ]
@@ -30,10 +30,11 @@
 # www.navitia.io
 from __future__ import absolute_import, print_function, unicode_literals, division
 from flask.ext.restful import fields, abort
+from flask import g
 from jormungandr import i_manager
 from jormungandr.interfaces.v1.fields import error,\
     PbField, NonNullList, NonNullNested,\
-    Links, JsonString, place,\
+    Links, HeatMatrix, place,\
     ListLit, beta_endpoint, feed_publisher
 from jormungandr.timezone import set_request_timezone
 from jormungandr.interfaces.v1.errors import ManageError
@@ -43,9 +44,10 @@ from jormungandr.interfaces.v1.journey_common import JourneyCommon
 from jormungandr.interfaces.v1.fields import DateTime, context
 from jormungandr.interfaces.v1.serializer.api import HeatMapSerializer
 from jormungandr.interfaces.v1.decorators import get_serializer
+from navitiacommon.parser_args_type import DescribedOptionValue
 
 heat_map = {
-    "heat_matrix": JsonString(),
+    "heat_matrix": HeatMatrix(),
     'from': PbField(place, attribute='origin'),
     "to": PbField(place, attribute="destination"),
     'requested_date_time': DateTime()
@@ -61,6 +63,13 @@ heat_maps = {
     "context": context
 }
 
+heat_matrix_formats = {
+    'json': 'the durations of each line are given as a list (null for an unreachable cell)',
+    'binary': 'the lines only have their cell_lon, the durations of all the lines are in heat_matrix.durations '
+              'as a base64 array of little-endian int32, line after line (-1 for an unreachable cell)',
+    'binary_zlib': 'same as binary, the array being compressed with zlib before the base64 encoding',
+}
+
 
 class HeatMap(JourneyCommon):
 
@@ -68,6 +77,10 @@ class HeatMap(JourneyCommon):
         super(HeatMap, self).__init__(output_type_serializer=HeatMapSerializer)
         parser_get = self.parsers["get"]
         parser_get.add_argument("resolution", type=UnsignedInteger(), default=500)
+        parser_get.add_argument("heat_matrix_format", type=DescribedOptionValue(heat_matrix_formats),
+                                default='json',
+                                help='Encoding of the durations of the heat matrix, the binary ones are far '
+                                     'more compact for the high resolutions')
 
     @get_serializer(serpy=HeatMapSerializer, marshall=heat_maps)
     @ManageError()
@@ -92,6 +105,8 @@ class HeatMap(JourneyCommon):
             new_datetime = self.convert_to_utc(original_datetime)
         args['datetime'] = date_to_timestamp(new_datetime)
 
+        # the heat matrices are encoded in the requested format when serialized
+        g.heat_matrix_format = args['heat_matrix_format']
         response = i_manager.dispatch(args, "heat_maps", self.region)
 
         return response
@@ -43,9 +43,12 @@ from jormungandr.interfaces.v1.ResourceUri import complete_links
 from functools import wraps
 from jormungandr.interfaces.v1.fields import DateTime, Integer
 from jormungandr.timezone import set_request_timezone
-from jormungandr.interfaces.v1.make_links import create_external_link, create_internal_link
+from jormungandr.interfaces.v1.make_links import create_internal_link, create_external_link, \
+    external_link_builder
+from jormungandr.interfaces.v1.converters_collection_type import collections_to_resource_type, \
+    resource_type_to_collection
 from jormungandr.interfaces.v1.errors import ManageError
-from collections import defaultdict
+from collections import defaultdict, deque
 from navitiacommon import response_pb2
 from jormungandr.utils import date_to_timestamp
 from jormungandr.interfaces.v1.Calendars import calendar
@@ -314,142 +317,184 @@ class add_debug_info(object):
         return wrapper
 
 
-class add_journey_href(object):
+def _rig_journey(journey, origin_detail, destination_detail):
+    """
+    put back the requested origin/destination in the journey
+    those origin/destination can be changed internally by some scenarios (querying external autocomplete service)
+    """
+    logging.getLogger(__name__).debug('for journey changing origin: %s to %s, destination: %s to %s',
+                                      journey['sections'][0].get('from', {}).get('id'),
+                                      (origin_detail or {}).get('id'),
+                                      journey['sections'][-1].get('to', {}).get('id'),
+                                      (destination_detail or {}).get('id'))
+    if origin_detail:
+        journey['sections'][0]['from'] = origin_detail
+    if destination_detail:
+        journey['sections'][-1]['to'] = destination_detail
+
+
+def _add_journey_href(journey, request_args, journeys_link_builder):
+    args = dict(request_args)
+    allowed_ids = {o['stop_point']['id']
+                   for s in journey.get('sections', []) if 'from' in s
+                   for o in (s['from'], s['to']) if 'stop_point' in o}
+
+    if "sections" not in journey:#this mean it's an isochrone...
+        if 'to' not in args:
+            args['to'] = journey['to']['id']
+        if 'from' not in args:
+            args['from'] = journey['from']['id']
+        args['rel'] = 'journeys'
+        journey['links'] = [journeys_link_builder(**args)]
+    elif allowed_ids and 'public_transport' in (s['type'] for s in journey['sections']):
+        # exactly one first_section_mode
+        if any(s['type'].startswith('bss') for s in journey['sections'][:2]):
+            args['first_section_mode[]'] = 'bss'
+        else:
+            args['first_section_mode[]'] = journey['sections'][0].get('mode', 'walking')
 
-    def __call__(self, f):
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            objects = f(*args, **kwargs)
-            if objects[1] != 200 or 'journeys' not in objects[0]:
-                return objects
-            for journey in objects[0]['journeys']:
-                args = dict(request.args)
-                allowed_ids = {o['stop_point']['id']
-                       for s in journey.get('sections', []) if 'from' in s
-                       for o in (s['from'], s['to']) if 'stop_point' in o}
-
-                if 'region' in kwargs:
-                    args['region'] = kwargs['region']
-                if "sections" not in journey:#this mean it's an isochrone...
-                    if 'to' not in args:
-                        args['to'] = journey['to']['id']
-                    if 'from' not in args:
-                        args['from'] = journey['from']['id']
-                    args['rel'] = 'journeys'
-                    journey['links'] = [create_external_link('v1.journeys', **args)]
-                elif allowed_ids and 'public_transport' in (s['type'] for s in journey['sections']):
-                    # exactly one first_section_mode
-                    if any(s['type'].startswith('bss') for s in journey['sections'][:2]):
-                        args['first_section_mode[]'] = 'bss'
-                    else:
-                        args['first_section_mode[]'] = journey['sections'][0].get('mode', 'walking')
-
-                    # exactly one last_section_mode
-                    if any(s['type'].startswith('bss') for s in journey['sections'][-2:]):
-                        args['last_section_mode[]'] = 'bss'
-                    else:
-                        args['last_section_mode[]'] = journey['sections'][-1].get('mode', 'walking')
-
-                    args['min_nb_transfers'] = journey['nb_transfers']
-                    args['direct_path'] = 'only' if 'non_pt' in journey['tags'] else 'none'
-                    args['min_nb_journeys'] = 5
-                    args['is_journey_schedules'] = True
-                    allowed_ids.update(args.get('allowed_id[]', []))
-                    args['allowed_id[]'] = list(allowed_ids)
-                    args['_type'] = 'journeys'
-                    args['rel'] = 'same_journey_schedules'
-                    journey['links'] = [create_external_link('v1.journeys', **args)]
-            return objects
-        return wrapper
+        # exactly one last_section_mode
+        if any(s['type'].startswith('bss') for s in journey['sections'][-2:]):
+            args['last_section_mode[]'] = 'bss'
+        else:
+            args['last_section_mode[]'] = journey['sections'][-1].get('mode', 'walking')
 
+        args['min_nb_transfers'] = journey['nb_transfers']
+        args['direct_path'] = 'only' if 'non_pt' in journey['tags'] else 'none'
+        args['min_nb_journeys'] = 5
+        args['is_journey_schedules'] = True
+        allowed_ids.update(args.get('allowed_id[]', []))
+        args['allowed_id[]'] = list(allowed_ids)
+        args['_type'] = 'journeys'
+        args['rel'] = 'same_journey_schedules'
+        journey['links'] = [journeys_link_builder(**args)]
 
-#add the link between a section and the ticket needed for that section
-class add_fare_links(object):
 
-    def __call__(self, f):
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            objects = f(*args, **kwargs)
-            if objects[1] != 200:
-                return objects
-            if "journeys" not in objects[0]:
-                return objects
-            ticket_by_section = defaultdict(list)
-            if 'tickets' not in objects[0]:
-                return objects
-
-            for t in objects[0]['tickets']:
-                if "links" in t:
-                    for s in t['links']:
-                        ticket_by_section[s['id']].append(t['id'])
-
-            for j in objects[0]['journeys']:
-                if "sections" not in j:
-                    continue
-                for s in j['sections']:
-
-                    #them we add the link to the different tickets needed
-                    for ticket_needed in ticket_by_section[s["id"]]:
-                        s['links'].append(create_internal_link(_type="ticket",
-                                                               rel="tickets",
-                                                               id=ticket_needed))
-                    if "ridesharing_journeys" not in s:
-                        continue
-                    for rsj in s['ridesharing_journeys']:
-                        if "sections" not in rsj:
-                            continue
-                        for rss in rsj['sections']:
-                            #them we add the link to the different ridesharing-tickets needed
-                            for rs_ticket_needed in ticket_by_section[rss["id"]]:
-                                rss['links'].append(create_internal_link(_type="ticket",
-                                                                         rel="tickets",
-                                                                         id=rs_ticket_needed))
+def _add_fare_links(sections, ticket_by_section):
+    """
+    add the link between the sections (and their ridesharing sections) and the tickets needed for them
+    """
+    for s in sections:
+        for ticket_needed in ticket_by_section.get(s["id"], []):
+            s['links'].append(create_internal_link(_type="ticket", rel="tickets", id=ticket_needed))
+        for rsj in s.get('ridesharing_journeys', []):
+            _add_fare_links(rsj.get('sections', []), ticket_by_section)
 
-            return objects
-        return wrapper
 
+def _collect_links(response, notes_and_exceptions):
+    """
+    walk the response once to collect what add_id_links and complete_links each collect in their own walk:
+     - the types of the objects with an id (and the collections of the objects with an id but no href)
+     - if notes_and_exceptions, the notes and the exceptions, their links being stripped of the items not in
+       complete_links.EXPECTED_ITEMS
 
-class rig_journey(object):
+    the objects are visited in the same order as in complete_links, the notes and exceptions are in the same order
     """
-    decorator to rig journeys in order to put back the requested origin/destination in the journeys
-    those origin/destination can be changed internally by some scenarios
-    (querying external autocomplete service)
+    id_types = set()
+    links = {"notes": [], "exceptions": []}
+    link_ids = {"notes": set(), "exceptions": set()}
+    queue = deque(response.items())
+    while queue:
+        collection_name, elem = queue.pop()
+        if isinstance(elem, (list, tuple)):
+            queue.extend((collection_name, e) for e in elem)
+        elif hasattr(elem, 'keys'):
+            if 'id' in elem:
+                if 'type' in elem:
+                    id_types.add(elem['type'])
+                if 'href' not in elem and collection_name:
+                    id_types.add(collection_name)
+            collect = elem.get('type') if notes_and_exceptions else None
+            if collect in links:
+                if elem['id'] not in link_ids[collect]:
+                    link_ids[collect].add(elem['id'])
+                    links[collect].append(complete_links.make_and_get_link(elem, collect))
+                for key in set(elem.keys()).difference(complete_links.EXPECTED_ITEMS):
+                    elem.pop(key)
+            else:
+                queue.extend(elem.items())
+    return id_types, links
+
+
+def _add_id_links(response, id_types, path_kwargs):
     """
+    add the templated links to the collections of the objects of the response, as add_id_links does
+    """
+    path_kwargs = {k: v for k, v in path_kwargs.items() if k != 'uri'}
+    if 'region' not in path_kwargs and 'lon' not in path_kwargs:
+        if 'regions' not in response:
+            # there is no coverage, we don't know how to put links on the objects
+            return
+        path_kwargs['region'] = '{regions.id}'
+    for obj in id_types:
+        collection = resource_type_to_collection.get(obj, obj)
+        if collection in collections_to_resource_type:
+            response['links'].append(create_external_link('v1.{}.id'.format(collection), rel=collection,
+                                                          _type=obj, templated=True, id='{' + obj + '.id}',
+                                                          **path_kwargs))
+
+
+class post_process_journeys(object):
+    """
+    complete the serialized journeys in a single pass on them:
+     - rig the journeys: put back the requested origin/destination (see _rig_journey)
+     - add the link to the same journey schedules (or to the journeys for an isochrone)
+     - add the link between a section and the tickets needed for that section
+
+    the links to the journeys all share their url, it is only computed once
+
+    it also replaces the generic add_id_links and complete_links decorators of the resource: the objects to link
+    and the notes and exceptions are collected in a single walk of the response
+    """
+    def __init__(self, resource):
+        self.resource = resource
+
     def __call__(self, f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             objects = f(*args, **kwargs)
             response, status, _ = objects
-            if status != 200:
-                return objects
-
-            if not hasattr(g, 'origin_detail') or not hasattr(g, 'destination_detail'):
-                return objects
-
-            for j in response.get('journeys', []):
-                if not 'sections' in j:
-                    continue
-                logging.debug('for journey changing origin: {old_o} to {new_o}'
-                              ', destination to {old_d} to {new_d}'
-                              .format(old_o=j.get('sections', [{}])[0].get('from').get('id'),
-                                      new_o=(g.origin_detail or {}).get('id'),
-                                      old_d=j.get('sections', [{}])[-1].get('to').get('id'),
-                                      new_d=(g.destination_detail or {}).get('id')))
-                if g.origin_detail:
-                    j['sections'][0]['from'] = g.origin_detail
-                if g.destination_detail:
-                    j['sections'][-1]['to'] = g.destination_detail
-
+            if status == 200 and 'journeys' in response:
+                self.complete_journeys(response, kwargs)
+
+            if status == 200 or self.resource.region:
+                id_types, links = _collect_links(response, notes_and_exceptions=bool(self.resource.region))
+                if status == 200:
+                    response.setdefault('links', [])
+                    _add_id_links(response, id_types, kwargs)
+                if self.resource.region:
+                    # Add notes and exceptions
+                    response.update(links)
             return objects
         return wrapper
 
+    @staticmethod
+    def complete_journeys(response, kwargs):
+        rig = hasattr(g, 'origin_detail') and hasattr(g, 'destination_detail')
+
+        ticket_by_section = defaultdict(list)
+        for t in response.get('tickets', []):
+            for s in t.get('links', []):
+                ticket_by_section[s['id']].append(t['id'])
+
+        path_kwargs = {'region': kwargs['region']} if 'region' in kwargs else {}
+        journeys_link_builder = external_link_builder('v1.journeys', **path_kwargs)
+        request_args = dict(request.args)
+
+        for journey in response['journeys']:
+            if rig and 'sections' in journey:
+                _rig_journey(journey, g.origin_detail, g.destination_detail)
+            _add_journey_href(journey, request_args, journeys_link_builder)
+            if ticket_by_section:
+                _add_fare_links(journey.get('sections', []), ticket_by_section)
+
 
 class Journeys(JourneyCommon):
 
     def __init__(self):
         # journeys must have a custom authentication process
 
-        super(Journeys, self).__init__(output_type_serializer=api.JourneysSerializer)
+        super(Journeys, self).__init__(output_type_serializer=api.JourneysSerializer, id_links=False)
 
         parser_get = self.parsers["get"]
 
@@ -491,15 +536,12 @@ class Journeys(JourneyCommon):
                                 help="Show more information about the poi if it's available, for instance, show "
                                      "BSS/car park availability in the pois(BSS/car park) of response")
 
-        self.get_decorators.append(complete_links(self))
+        self.get_decorators.insert(0, post_process_journeys(self))
 
         if parser_get.parse_args().get("add_poi_infos") or parser_get.parse_args().get("bss_stands"):
             self.get_decorators.insert(1, ManageParkingPlaces(self, 'journeys'))
 
     @add_debug_info()
-    @add_fare_links()
-    @add_journey_href()
-    @rig_journey()
     @get_serializer(serpy=api.JourneysSerializer, marshall=journeys)
     @ManageError()
     def get(self, region=None, lon=None, lat=None, uri=None):
@@ -50,11 +50,13 @@ def protect(uri):
 
 class ResourceUri(StatedResource):
 
-    def __init__(self, authentication=True, links=True, *args, **kwargs):
+    def __init__(self, authentication=True, links=True, id_links=True, *args, **kwargs):
         StatedResource.__init__(self, *args, **kwargs)
         self.region = None
         if links:
-            self.get_decorators.append(add_id_links())
+            if id_links:
+                #some API (eg journey) add the links to their objects in their own post-processing
+                self.get_decorators.append(add_id_links())
             self.get_decorators.append(add_computed_resources(self))
             self.get_decorators.append(add_pagination_links())
             self.get_decorators.append(clean_links())
@@ -181,7 +183,8 @@ class complete_links(object):
     def __init__(self, resource):
         self.resource = resource
 
-    def make_and_get_link(self, elem, collect):
+    @staticmethod
+    def make_and_get_link(elem, collect):
         if collect == "notes":
             return {"id": elem['id'], "category": elem['category'], "value": elem['value'], "type": collect}
         type_ = "Add" if elem['except_type'] == 0 else "Remove"
@@ -29,7 +29,7 @@
 
 from __future__ import absolute_import, print_function, unicode_literals, division
 from flask.ext.restful import fields
-from jormungandr import i_manager, travelers_profile
+from jormungandr import i_manager, travelers_profile, stat_manager, http_pool
 from jormungandr.protobuf_to_dict import protobuf_to_dict
 from jormungandr.interfaces.v1.fields import instance_status_with_parameters, context_utc, ListLit, beta_endpoint, \
     add_common_status
@@ -56,4 +56,6 @@ class Status(StatedResource):
         add_common_status(response, instance)
         response['status']['parameters'] = instance
         response['status']['traveler_profiles'] = travelers_profile.TravelerProfile.get_profiles_by_coverage(region_str)
+        response['status']['stat_manager'] = stat_manager.status()
+        response['status']['http_pool'] = http_pool.status()
         return response, 200
@@ -136,12 +136,7 @@ class Uri(ResourceUri, ResourceUtc):
         if region is None and lat is None and lon is None:
             if "external_code" in args and args["external_code"]:
                 type_ = collections_to_resource_type[collection]
-                for instance in i_manager.get_regions():
-                    res = i_manager.instances[instance].has_external_code(type_, args["external_code"])
-                    if res:
-                        region = instance
-                        id = res
-                        break
+                region, id = i_manager.find_external_code(type_, args["external_code"])
                 if not region:
                     abort(404, message="Unable to find an object for the uri %s"
                           % args["external_code"])
@@ -34,7 +34,7 @@ import logging
 from flask.globals import g
 import pytz
 from jormungandr.interfaces.v1.make_links import create_internal_link, create_external_link
-from jormungandr.interfaces.v1.serializer import pt, base
+from jormungandr.interfaces.v1.serializer import pt, base, heat_map
 from jormungandr.utils import timestamp_to_str, get_current_datetime_str, get_timezone_str
 from navitiacommon import response_pb2, type_pb2
 import ujson
@@ -430,6 +430,11 @@ class JsonString(fields.Raw):
         return response
 
 
+class HeatMatrix(fields.Raw):
+    def format(self, value):
+        return heat_map.format_heat_matrix(value)
+
+
 class Durations(fields.Raw):
     def output(self, key, obj):
         if not obj.HasField(str("durations")):
@@ -893,7 +898,9 @@ instance_status = {
     "dataset_created_at": fields.String(),
     "autocomplete": fields.Raw(),
     "street_networks": fields.Raw(),
-    "ridesharing_services": fields.Raw()
+    "ridesharing_services": fields.Raw(),
+    "zmq_socket_pool": fields.Raw(),
+    "health": fields.Raw()
 }
 
 instance_parameters = {
@@ -954,6 +961,8 @@ instance_traveler_types = {
 
 instance_status_with_parameters['traveler_profiles'] = fields.List(fields.Nested(instance_traveler_types,
                                                                                  allow_null=True))
+instance_status_with_parameters['stat_manager'] = fields.Raw()
+instance_status_with_parameters['http_pool'] = fields.Raw()
 
 impacted_section = {
     'from': NonNullNested(pt_object),
@@ -1064,3 +1073,7 @@ def add_common_status(response, instance):
         response['status']['ridesharing_services'].append(rs.status())
 
     response['status']['autocomplete'] = instance.autocomplete.status()
+
+    response['status']['zmq_socket_pool'] = instance.socket_pool.status()
+
+    response['status']['health'] = instance.health.status()
@@ -73,14 +73,14 @@ def compute_regions(args):
     we fetch the different regions the user can use for 'origin' and 'destination'
     we do the intersection and sort the list
     """
-    from_regions = set()
-    to_regions = set()
-    if args['origin']:
-        from_regions = set(i_manager.get_instances(object_id=args['origin']))
-        #Note: if get_regions does not find any region, it raises a RegionNotFoundException
+    # the origin and the destination are looked for at the same time
+    #Note: if get_instances_by_ids does not find any region for an id, it raises a RegionNotFoundException,
+    # the origin's one if neither the origin nor the destination are found
+    object_ids = [object_id for object_id in (args['origin'], args['destination']) if object_id]
+    instances_by_id = i_manager.get_instances_by_ids(object_ids)
 
-    if args['destination']:
-        to_regions = set(i_manager.get_instances(object_id=args['destination']))
+    from_regions = set(instances_by_id.get(args['origin']) or []) if args['origin'] else set()
+    to_regions = set(instances_by_id.get(args['destination']) or []) if args['destination'] else set()
 
     if not from_regions:
         #we didn't get any origin, the region is in the destination's list
@@ -120,8 +120,9 @@ def compute_possible_region(region, args):
 
 
 class JourneyCommon(ResourceUri, ResourceUtc) :
-    def __init__(self, output_type_serializer):
-        ResourceUri.__init__(self, authentication=False, output_type_serializer=output_type_serializer)
+    def __init__(self, output_type_serializer, id_links=True):
+        ResourceUri.__init__(self, authentication=False, id_links=id_links,
+                             output_type_serializer=output_type_serializer)
         ResourceUtc.__init__(self)
 
         modes = ["walking", "car", "bike", "bss", "ridesharing"]
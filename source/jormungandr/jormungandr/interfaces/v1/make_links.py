@@ -34,25 +34,17 @@ from functools import wraps
 from jormungandr.interfaces.v1.converters_collection_type import resource_type_to_collection,\
     collections_to_resource_type
 from flask.ext.restful.utils import unpack
+from werkzeug.urls import url_encode
 from jormungandr import app
 
 
-def create_external_link(url, rel, _type=None, templated=False, description=None, **kwargs):
-    """
-    :param url: url forwarded to flask's url_for
-    :param rel: relation of the link to the current object
-    :param _type: type of linked object
-    :param templated: if the link is templated ({} is the url)
-    :param description: description of the link
-    :param kwargs: args forwarded to url_for
-    :return: a dict representing a link
-    """
+def _make_external_link(href, rel, _type=None, templated=False, description=None):
     #if no type, type is rel
     if not _type:
         _type = rel
 
     d = {
-        "href": url_for(url, _external=True, **kwargs),
+        "href": href,
         "templated": templated,
         "rel": rel,
         "type": _type
@@ -63,6 +55,43 @@ def create_external_link(url, rel, _type=None, templated=False, description=None
     return d
 
 
+def create_external_link(url, rel, _type=None, templated=False, description=None, **kwargs):
+    """
+    :param url: url forwarded to flask's url_for
+    :param rel: relation of the link to the current object
+    :param _type: type of linked object
+    :param templated: if the link is templated ({} is the url)
+    :param description: description of the link
+    :param kwargs: args forwarded to url_for
+    :return: a dict representing a link
+    """
+    return _make_external_link(url_for(url, _external=True, **kwargs), rel, _type, templated, description)
+
+
+def external_link_builder(url, **path_kwargs):
+    """
+    To create many links to the same endpoint that only differ by their query args
+
+    url_for is only called once with the args of the path of the url (like the region), the query args of each link
+    are then encoded like url_for would do.
+    :return: a function with the same params as create_external_link (without url), its kwargs being the query args
+    """
+    base_href = url_for(url, _external=True, **path_kwargs)
+
+    def builder(rel, _type=None, templated=False, description=None, **kwargs):
+        if '?' in base_href:
+            # some path_kwargs are not in the path, we cannot append the query args
+            return create_external_link(url, rel, _type, templated, description, **dict(path_kwargs, **kwargs))
+        query_args = {k: v for k, v in kwargs.items() if v is not None}
+        href = base_href
+        if query_args:
+            href += '?' + url_encode(query_args, charset=app.url_map.charset, sort=app.url_map.sort_parameters,
+                                     key=app.url_map.sort_key)
+        return _make_external_link(href, rel, _type, templated, description)
+
+    return builder
+
+
 def create_internal_link(rel, _type, id, templated=False, description=None):
     """
     :param rel: relation of the link to the current object
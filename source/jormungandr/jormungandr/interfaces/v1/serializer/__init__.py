@@ -28,22 +28,27 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
 from functools import wraps
 from flask_restful.utils import unpack
+from jormungandr import tracing, app
 
 from .api import LinesSerializer
 from .api import DisruptionsSerializer
+from .codegen import compile_serializer
 
 class serialize_with(object):
     def __init__(self, serializer, many=False):
         self.serializer = serializer
         self.many = many
+        if app.config.get('COMPILE_SERIALIZERS', True):
+            compile_serializer(serializer)
 
     def __call__(self, f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             resp = f(*args, **kwargs)
-            if isinstance(resp, tuple):
-                data, code, headers = unpack(resp)
-                return self.serializer(data, many=self.many).data, code, headers
-            else:
-                return self.serializer(resp, many=self.many).data
+            with tracing.span('serialization.serpy'):
+                if isinstance(resp, tuple):
+                    data, code, headers = unpack(resp)
+                    return self.serializer(data, many=self.many).data, code, headers
+                else:
+                    return self.serializer(resp, many=self.many).data
         return wrapper
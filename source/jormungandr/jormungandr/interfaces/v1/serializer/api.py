@@ -239,6 +239,8 @@ class CoverageSerializer(NullableDictSerializer):
     shape = Field(schema_type=str, display_none=True, description='GeoJSON of the shape of the coverage')
     error = CoverageErrorSerializer(display_none=False)
     dataset_created_at = Field(schema_type=str, description='Creation date of the dataset')
+    metadata_age = Field(schema_type=int, description='Number of seconds since the status of the coverage '
+                                                       'has been fetched')
 
 
 class CoveragesSerializer(serpy.DictSerializer):
@@ -33,6 +33,42 @@ import serpy
 import six
 import operator
 from jormungandr.interfaces.v1.serializer.jsonschema.fields import Field
+from google.protobuf.descriptor import FieldDescriptor
+
+
+# the protobuf descriptors never change at runtime, so what we need to know about a field
+# (can we call HasField on it, what are the names of its enum values) is computed once
+# per (message type, field) instead of once per serialized object
+_presence_by_field = {}
+_enum_names_by_field = {}
+
+
+def _has_presence(descriptor, attr):
+    """
+    return True if HasField can be called on the field 'attr' of the message described by 'descriptor'
+
+    HasField throws an exception if the field is repeated or if attr is not a direct field (like 'a.b')
+    """
+    key = (descriptor.full_name, attr)
+    presence = _presence_by_field.get(key)
+    if presence is None:
+        field = descriptor.fields_by_name.get(attr)
+        presence = field is not None and field.label != FieldDescriptor.LABEL_REPEATED
+        _presence_by_field[key] = presence
+    return presence
+
+
+def _enum_names(descriptor, attr):
+    """
+    return a dict {enum value: enum name} for the enum field 'attr' of the message described by 'descriptor'
+    """
+    key = (descriptor.full_name, attr)
+    names = _enum_names_by_field.get(key)
+    if names is None:
+        values = descriptor.fields_by_name[attr].enum_type.values
+        names = {v.number: v.name for v in values}
+        _enum_names_by_field[key] = names
+    return names
 
 
 class PbField(Field):
@@ -45,18 +81,16 @@ class PbField(Field):
     If the object is always initialised it's recommended to use serpy.Field as it will be faster
     """
     def as_getter(self, serializer_field_name, serializer_cls):
-        op = operator.attrgetter(self.attr or serializer_field_name)
+        attr = self.attr or serializer_field_name
+        op = operator.attrgetter(attr)
+        display_none = self.display_none
+
         def getter(obj):
             if obj is None:
                 return None
-            try:
-                if self.display_none or obj.HasField(self.attr or serializer_field_name):
-                    return op(obj)
-                else:
-                    return None
-            except ValueError:
-                #HasField throw an exception if the field is repeated...
+            if display_none or not _has_presence(obj.DESCRIPTOR, attr) or obj.HasField(attr):
                 return op(obj)
+            return None
         return getter
 
 
@@ -82,11 +116,11 @@ class NestedPbField(PbField):
     it will get the departure_time field of the base_stop_time field
     """
     def as_getter(self, serializer_field_name, serializer_cls):
-        attr = self.attr or serializer_field_name
+        path = (self.attr or serializer_field_name).split('.')
 
         def getter(obj):
             cur_obj = obj
-            for f in attr.split('.'):
+            for f in path:
                 if not cur_obj.HasField(f):
                     return None
                 cur_obj = getattr(cur_obj, f)
@@ -116,12 +150,12 @@ class EnumField(jsonschema.Field):
         super(EnumField, self).__init__(schema_type=schema_type, schema_metadata=schema_metadata, **kwargs)
 
     def as_getter(self, serializer_field_name, serializer_cls):
+        attr = self.attr or serializer_field_name
+
         def getter(val):
-            attr = self.attr or serializer_field_name
             if val is None or not val.HasField(attr):
                 return None
-            enum = val.DESCRIPTOR.fields_by_name[attr].enum_type.values_by_number
-            return enum[getattr(val, attr)].name
+            return _enum_names(val.DESCRIPTOR, attr)[getattr(val, attr)]
         return getter
 
     def to_value(self, value):
@@ -143,11 +177,13 @@ class NestedEnumField(EnumField):
     it will get the mode of the street_network field
     """
     def as_getter(self, serializer_field_name, serializer_cls):
+        path = (self.attr or serializer_field_name).split('.')
+        enum_field = path[-1]
+        parents = path[:-1]
+
         def getter(val):
-            attr = self.attr or serializer_field_name
-            enum_field = attr.split('.')[-1]
             cur_obj = val
-            for f in attr.split('.')[:-1]:
+            for f in parents:
                 if not cur_obj.HasField(f):
                     return None
 
@@ -157,9 +193,7 @@ class NestedEnumField(EnumField):
 
             if not cur_obj.HasField(enum_field):
                 return None
-            enum = cur_obj.DESCRIPTOR.fields_by_name[enum_field].enum_type.values_by_number
-            ret_value = enum[getattr(cur_obj, enum_field)].name
-            return ret_value
+            return _enum_names(cur_obj.DESCRIPTOR, enum_field)[getattr(cur_obj, enum_field)]
         return getter
 
 
@@ -175,8 +209,8 @@ class EnumListField(EnumField):
         return lambda x: x
 
     def to_value(self, obj):
-        enum = obj.DESCRIPTOR.fields_by_name[self.attr].enum_type.values_by_number
-        return [enum[value].name.lower() for value in getattr(obj, self.attr)]
+        enum = _enum_names(obj.DESCRIPTOR, self.attr)
+        return [enum[value].lower() for value in getattr(obj, self.attr)]
 
 
 class DictGenericSerializer(serpy.DictSerializer):
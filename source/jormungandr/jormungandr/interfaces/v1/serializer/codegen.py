@@ -0,0 +1,234 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+"""
+Generated serialization code for the serpy serializers
+
+serpy serializes an object with a loop over the fields of the serializer: for each field it unpacks a tuple, calls
+the getter of the field and tests the options of the field, then each nested object goes through the to_value of
+its serializer. compile_serializer replaces this loop by a function generated for the serializer and the protobuf
+message type it serializes, with one block of code by field where the options are resolved and the protobuf
+accesses are inlined:
+
+ - the getter of a PbField is 'instance.attr if instance.HasField("attr") else None', or 'instance.attr' when the
+   field cannot be absent (repeated field, display_none),
+ - the getter of an EnumField is a lookup of the enum name, the names of the enum being resolved once,
+ - the default getter (operator.attrgetter) is 'instance.attr',
+ - a nested serializer is a direct call to the function generated for the message type of the field.
+
+The other getters (method fields, custom fields) and the custom to_value are called as serpy does. The output is
+the same as serpy's, the objects that are not protobuf messages (and None) are serialized by serpy.
+"""
+from __future__ import absolute_import, print_function, unicode_literals, division
+import keyword
+import logging
+import operator
+import re
+import serpy
+import six
+from google.protobuf.descriptor import FieldDescriptor
+from jormungandr.interfaces.v1.serializer.base import PbField, EnumField, _has_presence, _enum_names
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_serpy_serialize = six.get_unbound_function(serpy.Serializer._serialize)
+_serpy_to_value = six.get_unbound_function(serpy.Serializer.to_value)
+
+# the generated functions by (serializer class, message descriptor)
+_generated = {}
+_IN_PROGRESS = object()
+
+
+def _is_identifier(attr):
+    """
+    >>> _is_identifier('stop_point'), _is_identifier('street_network.mode'), _is_identifier('from')
+    (True, False, False)
+    """
+    return bool(attr) and _IDENTIFIER.match(attr) is not None and not keyword.iskeyword(attr)
+
+
+def _is_compiled(serializer_cls):
+    return getattr(vars(serializer_cls).get('_serialize'), 'generated', False)
+
+
+def _has_getter_of(field, field_cls):
+    """
+    True if the getter of the field is the one of field_cls, and not a custom one of a subclass
+    """
+    return isinstance(field, field_cls) and \
+        six.get_unbound_function(type(field).as_getter) is six.get_unbound_function(field_cls.as_getter)
+
+
+def _generated_serialize(serializer_cls, descriptor):
+    """
+    return the function generated for serializer_cls and the message type described by descriptor
+
+    None is returned while this function is generated (for a serializer nested in itself)
+    """
+    key = (serializer_cls, descriptor)
+    serialize = _generated.get(key)
+    if serialize is _IN_PROGRESS:
+        return None
+    if serialize is None:
+        _generated[key] = _IN_PROGRESS
+        try:
+            serialize = _generate(serializer_cls, descriptor)
+        except Exception:
+            logging.getLogger(__name__).exception('impossible to generate the code of %s for %s',
+                                                  serializer_cls.__name__, descriptor.full_name)
+            compiled_fields = serializer_cls._compiled_fields
+            serialize = lambda self, instance: _serpy_serialize(self, instance, compiled_fields)
+        _generated[key] = serialize
+    return serialize
+
+
+def _getter_expression(index, name, field, serializer_cls, descriptor, namespace):
+    """
+    the inlined getter of the field, None if the getter of the field has to be called
+    """
+    attr = field.attr or name
+    if not _is_identifier(attr):
+        return None
+    if _has_getter_of(field, PbField):
+        if field.display_none or not _has_presence(descriptor, attr):
+            return 'instance.{}'.format(attr)
+        return '(instance.{0} if instance.HasField("{0}") else None)'.format(attr)
+    if _has_getter_of(field, EnumField):
+        if not _has_presence(descriptor, attr) or descriptor.fields_by_name[attr].enum_type is None:
+            return None
+        namespace['enum_names_{}'.format(index)] = _enum_names(descriptor, attr)
+        return '(enum_names_{0}[instance.{1}] if instance.HasField("{1}") else None)'.format(index, attr)
+    if field.as_getter(name, serializer_cls) is None and serializer_cls.default_getter is operator.attrgetter:
+        return 'instance.{}'.format(attr)
+    return None
+
+
+def _nested_expression(index, name, field, descriptor, namespace):
+    """
+    the direct call to the function generated for a nested serializer, None if its to_value has to be called
+    """
+    field_cls = type(field)
+    if not _is_compiled(field_cls) or six.get_unbound_function(field_cls.to_value) is not _serpy_to_value:
+        return None
+    field_descriptor = descriptor.fields_by_name.get(field.attr or name)
+    if field_descriptor is None or field_descriptor.message_type is None or \
+            (field_descriptor.label == FieldDescriptor.LABEL_REPEATED) != bool(field.many):
+        return None
+    serialize = _generated_serialize(field_cls, field_descriptor.message_type)
+    if serialize is None:
+        return None
+    namespace['field_{}'.format(index)] = field
+    namespace['serialize_{}'.format(index)] = serialize
+    if field.many:
+        return '[serialize_{0}(field_{0}, o) for o in result]'.format(index)
+    return 'serialize_{0}(field_{0}, result)'.format(index)
+
+
+def _field_code(index, name, field, compiled_field, serializer_cls, descriptor, namespace):
+    """
+    the code of a field, it does what serpy's Serializer._serialize does for this field
+    """
+    label, getter, to_value, call, required, pass_self, display_none = compiled_field
+    namespace['label_{}'.format(index)] = label
+    namespace['getter_{}'.format(index)] = getter
+    namespace['to_value_{}'.format(index)] = to_value
+
+    if pass_self:
+        lines = ['result = getter_{}(self, instance)'.format(index)]
+    else:
+        getter_expression = _getter_expression(index, name, field, serializer_cls, descriptor, namespace)
+        nested_expression = None
+        if getter_expression is None:
+            getter_expression = 'getter_{}(instance)'.format(index)
+        elif to_value and not call:
+            # the field is a message of the instance, its serializer can be called directly
+            nested_expression = _nested_expression(index, name, field, descriptor, namespace)
+        lines = ['result = ' + getter_expression]
+        conversions = []
+        if call:
+            conversions.append('result = result()')
+        if nested_expression:
+            conversions.append('result = ' + nested_expression)
+        elif to_value:
+            conversions.append('result = to_value_{}(result)'.format(index))
+        if conversions and not required:
+            lines.append('if result is not None:')
+            conversions = ['    ' + c for c in conversions]
+        lines.extend(conversions)
+
+    if display_none:
+        lines.append('v[label_{}] = result'.format(index))
+    else:
+        lines.append('if not (result is None or result == []):')
+        lines.append('    v[label_{}] = result'.format(index))
+    return lines
+
+
+def _generate(serializer_cls, descriptor):
+    namespace = {}
+    lines = ['def _serialize(self, instance):', '    v = {}']
+    # the compiled fields have been built by serpy from the items of the field map, in the same order
+    for index, ((name, field), compiled_field) in enumerate(zip(serializer_cls._field_map.items(),
+                                                                serializer_cls._compiled_fields)):
+        lines.extend('    ' + l for l in _field_code(index, name, field, compiled_field, serializer_cls,
+                                                      descriptor, namespace))
+    lines.append('    return v')
+    source = '\n'.join(lines) + '\n'
+    code = compile(source, '<serializer {}>'.format(serializer_cls.__name__), 'exec', 0, True)
+    six.exec_(code, namespace)
+    return namespace['_serialize']
+
+
+def compile_serializer(serializer_cls):
+    """
+    replace the serialization loop of serializer_cls and of the serializers nested in its fields by generated code
+
+    the code is generated on the first serialization of each protobuf message type
+    """
+    if not isinstance(serializer_cls, type) or not issubclass(serializer_cls, serpy.Serializer) or \
+            _is_compiled(serializer_cls):
+        return
+    inherited_serialize = six.get_unbound_function(serializer_cls._serialize)
+    if inherited_serialize is not _serpy_serialize and not getattr(inherited_serialize, 'generated', False):
+        # a custom serialization is kept as it is
+        return
+
+    compiled_fields = serializer_cls._compiled_fields
+
+    def _serialize(self, instance, fields):
+        descriptor = getattr(instance, 'DESCRIPTOR', None)
+        if descriptor is None or fields is not compiled_fields:
+            # not a protobuf message or a subclass with other fields
+            return _serpy_serialize(self, instance, fields)
+        return _generated_serialize(serializer_cls, descriptor)(self, instance)
+
+    _serialize.generated = True
+    serializer_cls._serialize = _serialize
+
+    for field in serializer_cls._field_map.values():
+        compile_serializer(type(field))
@@ -31,7 +31,56 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 from jormungandr.interfaces.v1.serializer.pt import PlaceSerializer
 from jormungandr.interfaces.v1.serializer.time import DateTimeField
 from jormungandr.interfaces.v1.serializer.jsonschema import JsonStrField, Field
+from flask import g
+import array
+import base64
 import serpy
+import sys
+import ujson
+import zlib
+
+
+def encode_heat_matrix(matrix, compress=False):
+    """
+    move the durations of the lines of a heat matrix in a single binary array
+
+    with a resolution of 1000 there are a million durations, as a typed array they are far smaller and faster to
+    output than as json lists
+    :param matrix: the heat matrix as a dict, it is modified in place
+    """
+    durations = array.array(str('i'))
+    for line in matrix.get('lines', []):
+        durations.extend(-1 if d is None else d for d in line.pop('duration', []))
+    if sys.byteorder != 'little':
+        durations.byteswap()
+    data = durations.tostring()
+    if compress:
+        data = zlib.compress(data)
+    matrix['durations'] = {
+        'encoding': 'int32le',
+        'compression': 'zlib' if compress else 'none',
+        'nb_lines': len(matrix.get('lines', [])),
+        'nb_columns': len(matrix.get('line_headers', [])),
+        'data': base64.b64encode(data).decode('ascii'),
+    }
+    return matrix
+
+
+def format_heat_matrix(heat_matrix):
+    """
+    parse the heat matrix (the json string built by kraken) and encode its durations in the heat_matrix_format of
+    the request
+    """
+    matrix = ujson.loads(heat_matrix)
+    heat_matrix_format = getattr(g, 'heat_matrix_format', 'json')
+    if heat_matrix_format != 'json':
+        encode_heat_matrix(matrix, compress=heat_matrix_format == 'binary_zlib')
+    return matrix
+
+
+class HeatMatrixField(JsonStrField):
+    def to_value(self, value):
+        return format_heat_matrix(value)
 
 
 class CellLatSchema(serpy.Serializer):
@@ -59,14 +108,25 @@ class LinesSchema(serpy.Serializer):
     cell_lon = CellLonSchema()
 
 
+class DurationsSchema(serpy.Serializer):
+    # This Class is not used as a serializer, but here only to get the schema
+    encoding = Field(schema_type=str)
+    compression = Field(schema_type=str)
+    nb_lines = Field(schema_type=int)
+    nb_columns = Field(schema_type=int)
+    data = Field(schema_type=str)
+
+
 class HeatMatrixSchema(serpy.Serializer):
     # This Class is not used as a serializer, but here only to get the schema
     line_headers = LineHeadersSchema(many=True)
     lines = LinesSchema(many=True)
+    # only with a binary heat_matrix_format, the lines have no duration then
+    durations = DurationsSchema()
 
 
 class HeatMapSerializer(serpy.Serializer):
-    heat_matrix = JsonStrField(schema_type=HeatMatrixSchema)
+    heat_matrix = HeatMatrixField(schema_type=HeatMatrixSchema)
     origin = PlaceSerializer(label='from')
     to = PlaceSerializer(attr='destination', label='to')
     requested_date_time = DateTimeField()
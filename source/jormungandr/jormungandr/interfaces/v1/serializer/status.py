@@ -121,6 +121,49 @@ class RidesharingServicesSerializer(OutsideServiceCommon):
     pass
 
 
+class ZmqSocketPoolSerializer(serpy.DictSerializer):
+    address = Field(schema_type=str, display_none=True)
+    transient = Field(schema_type=bool, display_none=True)
+    in_use = Field(schema_type=int, display_none=True)
+    idle = Field(schema_type=int, display_none=True)
+    max_idle = Field(schema_type=int, display_none=True)
+    created = Field(schema_type=int, display_none=True)
+    closed = Field(schema_type=int, display_none=True)
+    requests = Field(schema_type=int, display_none=True)
+    timeouts = Field(schema_type=int, display_none=True)
+
+
+class InstanceHealthSerializer(serpy.DictSerializer):
+    is_healthy = Field(schema_type=bool, display_none=True)
+    kraken_status = Field(schema_type=str, display_none=True)
+    publication_date = Field(schema_type=int, display_none=True)
+    probes = Field(schema_type=int, display_none=True)
+    failures = Field(schema_type=int, display_none=True)
+    consecutive_failures = Field(schema_type=int, display_none=True)
+    last_probe_at = Field(schema_type=float, display_none=True)
+    last_success_at = Field(schema_type=float, display_none=True)
+    rtt_p50 = Field(schema_type=float, display_none=True)
+    rtt_p90 = Field(schema_type=float, display_none=True)
+    rtt_p99 = Field(schema_type=float, display_none=True)
+
+
+class StatManagerSerializer(serpy.DictSerializer):
+    asynchronous = Field(schema_type=bool, display_none=True)
+    queue_size = Field(schema_type=int, display_none=True)
+    dropped = Field(schema_type=int, display_none=True)
+    published = Field(schema_type=int, display_none=True)
+    publish_errors = Field(schema_type=int, display_none=True)
+    last_publish_latency = Field(schema_type=float, display_none=True)
+    max_publish_latency = Field(schema_type=float, display_none=True)
+
+
+class HttpPoolSerializer(serpy.DictSerializer):
+    host = Field(schema_type=str, display_none=True)
+    connections_created = Field(schema_type=int, display_none=True)
+    requests = Field(schema_type=int, display_none=True)
+    idle = Field(schema_type=int, display_none=True)
+
+
 class CoverageErrorSerializer(NullableDictSerializer):
     code = Field(schema_type=str)
     value = Field(schema_type=str)
@@ -148,6 +191,8 @@ class CommonStatusSerializer(NullableDictSerializer):
     kraken_version = MethodField(schema_type=str, display_none=False)
     region_id = Field(schema_type=str, display_none=False, description='Identifier of the coverage')
     error = CoverageErrorSerializer(display_none=False)
+    zmq_socket_pool = ZmqSocketPoolSerializer(display_none=False)
+    health = InstanceHealthSerializer(display_none=False)
 
     def get_kraken_version(self, obj):
         if "navitia_version" in obj:
@@ -161,6 +206,8 @@ class StatusSerializer(CommonStatusSerializer):
     parameters = ParametersSerializer()
     realtime_contributors = MethodField(schema_type=str, many=True, display_none=True)
     traveler_profiles = TravelerProfilesSerializer(many=True)
+    stat_manager = StatManagerSerializer(display_none=False)
+    http_pool = HttpPoolSerializer(many=True, display_none=False)
 
     def get_realtime_contributors(self, obj):
         # so far, serpy cannot serialize an optional attr
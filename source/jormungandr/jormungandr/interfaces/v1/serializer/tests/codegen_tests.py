@@ -0,0 +1,236 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from contextlib import contextmanager
+import pytz
+import serpy
+from flask import g
+from jormungandr import app
+from navitiacommon import response_pb2, type_pb2
+from jormungandr.interfaces.v1.serializer import api, codegen
+
+
+def _serializer_classes(cls=serpy.Serializer):
+    for sub in cls.__subclasses__():
+        yield sub
+        for s in _serializer_classes(sub):
+            yield s
+
+
+@contextmanager
+def serpy_serialization():
+    """
+    serialize with the loop of serpy, the generated code is put back at the end
+    """
+    generated = {cls: vars(cls)['_serialize'] for cls in set(_serializer_classes()) if codegen._is_compiled(cls)}
+    for cls in generated:
+        del cls._serialize
+    try:
+        yield
+    finally:
+        for cls, serialize in generated.items():
+            cls._serialize = serialize
+
+
+def fill_stop_point(stop_point, i):
+    stop_point.uri = 'stop_point:{}'.format(i)
+    stop_point.name = 'stop {}'.format(i)
+    stop_point.label = 'stop {} (city)'.format(i)
+    stop_point.coord.lon = 2.3 + i / 1000.
+    stop_point.coord.lat = 48.8 + i / 1000.
+    code = stop_point.codes.add()
+    code.type = 'source'
+    code.value = str(i)
+    stop_point.has_equipments.has_equipments.append(type_pb2.hasEquipments.has_wheelchair_accessibility)
+    admin = stop_point.administrative_regions.add()
+    admin.uri = 'admin:1'
+    admin.name = 'city'
+    admin.level = 8
+    admin.zip_code = '75000'
+    admin.coord.lon = 2.3
+    admin.coord.lat = 48.8
+    stop_point.stop_area.uri = 'stop_area:{}'.format(i)
+    stop_point.stop_area.name = 'area {}'.format(i)
+    stop_point.stop_area.timezone = 'Europe/Paris'
+    stop_point.stop_area.administrative_regions.add().CopyFrom(admin)
+
+
+def fill_stop_point_place(place, i):
+    place.uri = 'stop_point:{}'.format(i)
+    place.name = 'stop {}'.format(i)
+    place.embedded_type = type_pb2.STOP_POINT
+    fill_stop_point(place.stop_point, i)
+
+
+def fill_address_place(place, i):
+    place.uri = place.address.uri = '2.3;48.{}'.format(i)
+    place.name = place.address.name = '{} rue de la gare'.format(i)
+    place.embedded_type = type_pb2.ADDRESS
+    place.address.house_number = i
+    place.address.coord.lon = 2.3
+    place.address.coord.lat = 48.8
+
+
+def add_street_network_section(journey, begin):
+    section = journey.sections.add()
+    section.id = 'section_{}'.format(begin)
+    section.type = response_pb2.STREET_NETWORK
+    section.duration = 300
+    section.begin_date_time = begin
+    section.end_date_time = begin + 300
+    section.street_network.mode = response_pb2.Walking
+    section.street_network.length = 400
+    for i in range(3):
+        path_item = section.street_network.path_items.add()
+        path_item.length = 133.3
+        path_item.name = 'street {}'.format(i)
+        path_item.duration = 100.4
+        path_item.direction = 90
+        coord = section.street_network.coordinates.add()
+        coord.lon = 2.3 + i / 1e4
+        coord.lat = 48.8
+    return section
+
+
+def add_public_transport_section(journey, begin, first_stop):
+    section = journey.sections.add()
+    section.id = 'section_{}'.format(begin)
+    section.type = response_pb2.PUBLIC_TRANSPORT
+    section.duration = 600
+    section.begin_date_time = section.base_begin_date_time = begin
+    section.end_date_time = section.base_end_date_time = begin + 600
+    section.realtime_level = type_pb2.BASE_SCHEDULE
+    section.co2_emission.value = 42.5
+    section.co2_emission.unit = 'gEC'
+    fill_stop_point_place(section.origin, first_stop)
+    fill_stop_point_place(section.destination, first_stop + 3)
+    display_info = section.pt_display_informations
+    display_info.commercial_mode = 'Metro'
+    display_info.network = 'RATP'
+    display_info.direction = 'terminus'
+    display_info.code = '4'
+    display_info.name = 'line 4'
+    display_info.headsign = 'trip'
+    display_info.headsigns.append('trip')
+    note = display_info.notes.add()
+    note.uri = 'note:1'
+    note.note = 'a note'
+    section.uris.vehicle_journey = 'vehicle_journey:1'
+    section.uris.line = 'line:4'
+    for i in range(4):
+        stop_date_time = section.stop_date_times.add()
+        stop_date_time.departure_date_time = stop_date_time.base_departure_date_time = begin + 200 * i
+        stop_date_time.arrival_date_time = stop_date_time.base_arrival_date_time = begin + 200 * i
+        stop_date_time.data_freshness = type_pb2.BASE_SCHEDULE
+        stop_date_time.properties.vehicle_journey_id = 'vehicle_journey:1'
+        fill_stop_point(stop_date_time.stop_point, first_stop + i)
+        coord = section.shape.add()
+        coord.lon = 2.3 + i / 1e3
+        coord.lat = 48.8
+    return section
+
+
+def make_response():
+    """
+    a response with 2 walking + public transport journeys
+    """
+    response = response_pb2.Response()
+    feed_publisher = response.feed_publishers.add()
+    feed_publisher.id = 'builder'
+    feed_publisher.name = 'ratp'
+    for i, begin in enumerate((1514800000, 1514800600)):
+        journey = response.journeys.add()
+        journey.type = 'best' if i == 0 else 'rapid'
+        journey.duration = 1500
+        journey.nb_transfers = 0
+        journey.departure_date_time = begin
+        journey.arrival_date_time = begin + 1500
+        journey.requested_date_time = 1514800000
+        journey.tags.extend(['walking', 'ecologic'])
+        journey.co2_emission.value = 42.5
+        journey.co2_emission.unit = 'gEC'
+        journey.durations.total = 1500
+        journey.durations.walking = 900
+        journey.distances.walking = 1200
+        fill_address_place(journey.origin, 1)
+        fill_address_place(journey.destination, 2)
+
+        walking = add_street_network_section(journey, begin)
+        walking.origin.CopyFrom(journey.origin)
+        fill_stop_point_place(walking.destination, 10 * i)
+        add_public_transport_section(journey, begin + 300, 10 * i)
+        walking = add_street_network_section(journey, begin + 1200)
+        fill_stop_point_place(walking.origin, 10 * i + 3)
+        walking.destination.CopyFrom(journey.destination)
+    return response
+
+
+def compiled_journeys_serializer_test():
+    """
+    the generated code must give the same journeys as serpy
+    """
+    response = make_response()
+    with app.test_request_context('/v1/coverage/test/journeys?_current_datetime=20180101T120000'):
+        g.timezone = pytz.timezone('Europe/Paris')
+        with serpy_serialization():
+            expected = api.JourneysSerializer(response, display_none=False).data
+
+        codegen.compile_serializer(api.JourneysSerializer)
+        assert codegen._is_compiled(api.JourneysSerializer)
+        assert codegen._is_compiled(api.JourneySerializer)
+        res = api.JourneysSerializer(response, display_none=False).data
+        assert res == expected
+
+        sections = res['journeys'][0]['sections']
+        assert [s['type'] for s in sections] == ['street_network', 'public_transport', 'street_network']
+        assert [s['mode'] for s in sections if 'mode' in s] == ['walking', 'walking']
+        assert len(sections[0]['path']) == 3
+        assert len(sections[1]['stop_date_times']) == 4
+        assert sections[1]['display_informations']['headsign'] == 'trip'
+        assert sections[1]['to']['stop_point']['stop_area']['id'] == 'stop_area:3'
+
+        # the generated code is kept for the next responses
+        assert api.JourneysSerializer(response, display_none=False).data == expected
+
+
+def compiled_serializer_not_a_message_test():
+    """
+    serpy serializes what is not a protobuf message
+    """
+    class Serializer(serpy.Serializer):
+        a = serpy.Field()
+        b = serpy.IntField(required=False)
+
+    class Obj(object):
+        a = 'a'
+        b = None
+
+    codegen.compile_serializer(Serializer)
+    assert Serializer(Obj()).data == {'a': 'a', 'b': None}
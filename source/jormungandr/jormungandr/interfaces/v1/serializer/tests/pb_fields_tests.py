@@ -0,0 +1,97 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+import serpy
+from navitiacommon import response_pb2
+from jormungandr.interfaces.v1.serializer.base import PbField, PbIntField, NestedPbField, EnumField, \
+    NestedEnumField, EnumListField
+
+
+class SectionSerializer(serpy.Serializer):
+    duration = PbIntField(display_none=False)
+    length = PbIntField(display_none=True)
+    type = EnumField(attr='type')
+    mode = NestedEnumField(attr='street_network.mode')
+    sn_duration = NestedPbField(attr='street_network.duration')
+    additional_informations = EnumListField(attr='additional_informations')
+
+
+class JourneySerializer(serpy.Serializer):
+    nb_transfers = PbField()
+    tags = PbField(display_none=False)
+    sections = SectionSerializer(many=True)
+
+
+def pb_field_absent_test():
+    """
+    an unset optional field (or an empty repeated field) is not serialized unless display_none is set
+    """
+    section = response_pb2.Section()
+    res = SectionSerializer(section).data
+    assert res.get('duration') is None
+    assert res['length'] == 0
+    assert res.get('type') is None
+    assert res.get('mode') is None
+    assert res.get('sn_duration') is None
+    assert 'additional_informations' not in res
+
+
+def pb_field_present_test():
+    section = response_pb2.Section()
+    section.duration = 0
+    section.type = response_pb2.STREET_NETWORK
+    section.street_network.mode = response_pb2.Walking
+    section.street_network.duration = 42
+    section.additional_informations.append(response_pb2.HAS_DATETIME_ESTIMATED)
+
+    res = SectionSerializer(section).data
+    assert res['duration'] == 0
+    assert res['type'] == 'street_network'
+    assert res['mode'] == 'walking'
+    assert res['sn_duration'] == 42
+    assert res['additional_informations'] == ['has_datetime_estimated']
+
+
+def pb_field_repeated_test():
+    """
+    HasField cannot be called on a repeated field, it is always serialized
+    """
+    journey = response_pb2.Journey()
+    journey.tags.extend(['a', 'b'])
+    journey.sections.add().street_network.mode = response_pb2.Bike
+    journey.sections.add().street_network.mode = response_pb2.Walking
+
+    res = JourneySerializer(journey).data
+    assert res.get('nb_transfers') is None
+    assert list(res['tags']) == ['a', 'b']
+    assert [s['mode'] for s in res['sections']] == ['bike', 'walking']
+
+    # the same serializer must give the same result once its descriptors are cached
+    assert JourneySerializer(journey).data == res
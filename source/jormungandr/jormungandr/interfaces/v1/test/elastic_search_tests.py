@@ -592,7 +592,7 @@ def bragi_call_test():
     from jormungandr import app
     with app.app_context():
         # we mock the http call to return the hard coded mock_response
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             raw_response = bragi.get({'q': 'rue bobette', 'count': 10}, instances=[])
             places = raw_response.get('places')
             assert len(places) == 4
@@ -601,7 +601,7 @@ def bragi_call_test():
             bragi_street_response_check(places[2])
             bragi_admin_response_check(places[3])
 
-        with mock.patch('requests.post', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.post', mock_requests.get):
             raw_response = bragi.get({'q': 'rue bobette', 'count': 10, 'shape': geojson()}, instances=[])
             places = raw_response.get('places')
             assert len(places) == 4
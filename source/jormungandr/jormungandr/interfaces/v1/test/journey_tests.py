@@ -28,9 +28,12 @@
 # www.navitia.io
 from __future__ import absolute_import, print_function, unicode_literals, division
 import pytest
-from jormungandr import i_manager
+from jormungandr import i_manager, app
 from jormungandr.exceptions import RegionNotFound
 from jormungandr.interfaces.v1.journey_common import compute_regions
+from jormungandr.interfaces.v1.Journeys import post_process_journeys
+from jormungandr.interfaces.v1.ResourceUri import complete_links
+from jormungandr.interfaces.v1.make_links import add_id_links
 from navitiacommon import models
 
 
@@ -64,7 +67,7 @@ class TestMultiCoverage:
 
     def _mock_function(self, paris_region, lima_region):
         """
-        small helper, mock i_manager.get_region
+        small helper, mock i_manager.get_instances and i_manager.get_instances_by_ids
         """
 
         def mock_get_instances(region_str=None, lon=None, lat=None, object_id=None, api='ALL', only_one=True):
@@ -77,7 +80,11 @@ class TestMultiCoverage:
                     raise RegionNotFound('lima')
                 return [self.regions[r] for r in lima_region]
 
+        def mock_get_instances_by_ids(object_ids, api='ALL'):
+            return {object_id: mock_get_instances(object_id=object_id, api=api) for object_id in object_ids}
+
         i_manager.get_instances = mock_get_instances
+        i_manager.get_instances_by_ids = mock_get_instances_by_ids
         #we also need to mock the ptmodel cache
         class weNeedMock:
             @classmethod
@@ -196,3 +203,74 @@ class TestMultiCoverage:
         assert regions[1] == self.regions['netherlands'].name
         assert regions[2] == self.regions['france'].name
         assert regions[3] == self.regions['bolivia'].name
+
+
+class MockResource(object):
+    def __init__(self, region):
+        self.region = region
+
+
+def _journeys_response():
+    def place(uri):
+        return {'id': uri, 'embedded_type': 'stop_point',
+                'stop_point': {'id': uri, 'name': uri, 'stop_area': {'id': 'stop_area:' + uri}}}
+
+    section = {
+        'id': 'section_0',
+        'type': 'public_transport',
+        'from': place('stop_point:A'),
+        'to': place('stop_point:B'),
+        'links': [
+            {'type': 'line', 'id': 'line:1'},
+            {'type': 'notes', 'id': 'note:1', 'value': 'a note', 'category': 'comment', 'internal': True,
+             'rel': 'notes', 'comment_type': 'information'},
+            {'type': 'exceptions', 'id': 'exception:1', 'date': '20180101', 'except_type': 1, 'internal': True,
+             'rel': 'exceptions'},
+        ]
+    }
+    return {'journeys': [{'sections': [section], 'nb_transfers': 0, 'tags': []}], 'links': []}
+
+
+def post_process_journeys_links_test():
+    """
+    the links to the objects, the notes and the exceptions are the ones the generic add_id_links and complete_links
+    decorators add after the post-processing of the journeys
+    """
+    sort_links = lambda response: response['links'].sort(key=lambda l: (l['rel'], l['href']))
+    for path_kwargs, region in (({'region': 'test'}, 'test'), ({'lon': '2.3', 'lat': '48.8'}, 'test'), ({}, None)):
+        with app.test_request_context('/v1/journeys?from=stop_point:A&to=stop_point:B'):
+            expected = _journeys_response()
+            post_process_journeys.complete_journeys(expected, path_kwargs)
+            get = lambda **kwargs: (expected, 200, {})
+            complete_links(MockResource(region))(add_id_links()(get))(**dict(path_kwargs))
+
+            get = lambda **kwargs: (_journeys_response(), 200, {})
+            response, status, _ = post_process_journeys(MockResource(region))(get)(**dict(path_kwargs))
+
+        assert status == 200
+        sort_links(expected)
+        sort_links(response)
+        assert response == expected
+
+        if region:
+            assert any(l['rel'] == 'lines' and l['templated'] for l in response['links'])
+            assert response['notes'] == [{'id': 'note:1', 'category': 'comment', 'value': 'a note', 'type': 'notes'}]
+            assert response['exceptions'] == [{'id': 'exception:1', 'date': '20180101', 'type': 'Remove'}]
+            section_links = response['journeys'][0]['sections'][0]['links']
+            assert section_links[1] == {'type': 'notes', 'id': 'note:1', 'category': 'comment', 'internal': True,
+                                        'rel': 'notes'}
+        else:
+            assert response['links'] == []
+            assert 'notes' not in response
+
+
+def post_process_journeys_error_test():
+    """
+    like complete_links, the notes and exceptions are added to an error response, but not the links to the objects
+    """
+    with app.test_request_context('/v1/coverage/test/journeys'):
+        error = {'error': {'id': 'no_solution', 'message': 'no solution found for this journey'}}
+        response, status, _ = post_process_journeys(MockResource('test'))(lambda **kw: (error, 404, {}))(region='test')
+    assert status == 404
+    assert response == {'error': {'id': 'no_solution', 'message': 'no solution found for this journey'},
+                        'notes': [], 'exceptions': []}
@@ -0,0 +1,106 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class LocalCache(object):
+    """
+    A bounded in-process cache, each entry expires 'ttl' seconds after being set.
+
+    When the cache is full, the least recently used entry is evicted.
+    Unlike the flask cache, nothing is serialized: values are returned as they have been stored, so they must not
+    be modified by the caller. The cache is shared by all the greenlets of a worker, not between workers.
+    A cache with a max_size of 0 is deactivated.
+
+    >>> now = [0]
+    >>> c = LocalCache(max_size=2, ttl=10, timer=lambda: now[0])
+    >>> c.set('a', 1)
+    >>> c.set('b', 2)
+    >>> c.get('a')
+    1
+    >>> c.set('c', 3)  # 'b' is the least recently used, it's evicted
+    >>> c.get('b') is None
+    True
+    >>> now[0] = 11
+    >>> c.get('a', 42)
+    42
+    >>> len(c)
+    1
+    >>> c.hits, c.misses
+    (1, 2)
+    >>> d = LocalCache(max_size=0, ttl=10)
+    >>> d.set('a', 1)
+    >>> d.get('a') is None
+    True
+    """
+    def __init__(self, max_size, ttl, timer=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._timer = timer
+        self._values = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if self.max_size <= 0:
+            return default
+        with self._lock:
+            entry = self._values.pop(key, None)
+            if entry is None or entry[0] <= self._timer():
+                self.misses += 1
+                return default
+            # we put back the entry at the end to keep track of the least recently used
+            self._values[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._values.pop(key, None)
+            while len(self._values) >= self.max_size:
+                self._values.popitem(last=False)
+            self._values[key] = (self._timer() + self.ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
@@ -39,7 +39,7 @@ from navitiacommon import type_pb2, request_pb2
 from jormungandr import i_manager, USE_SERPY
 from jormungandr.protobuf_to_dict import protobuf_to_dict
 from flask.ext.restful.fields import Raw
-from jormungandr import bss_provider_manager
+from jormungandr import bss_provider_manager, tracing
 from jormungandr.interfaces.v1.decorators import get_serializer
 from jormungandr.interfaces.v1.serializer.api import TechnicalStatusSerializer
 from jormungandr.interfaces.v1.serializer.status import CommonStatusSerializer
@@ -120,3 +120,13 @@ class TechnicalStatus(ModuleResource):
             response['regions'].append(resp_dict)
 
         return response
+
+
+class Tracing(ModuleResource):
+    """
+    durations of the stages of the requests since the start of the worker, by endpoint
+
+    used to find where the time is spent in production, each worker has its own stats
+    """
+    def get(self):
+        return {"endpoints": tracing.tracer.stats()}, 200
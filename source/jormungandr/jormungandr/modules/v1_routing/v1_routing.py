@@ -106,6 +106,10 @@ class V1Routing(AModule):
         self.add_resource(Index.TechnicalStatus,
                           '/status',
                           endpoint='technical_status')
+        self.module_resources_manager.register_resource(Index.Tracing())
+        self.add_resource(Index.Tracing,
+                          '/tracing',
+                          endpoint='tracing')
         lon_lat = '<lon:lon>;<lat:lat>/'
         coverage = '/coverage/'
         region = coverage + '<region:region>/'
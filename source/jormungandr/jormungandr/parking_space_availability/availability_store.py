@@ -0,0 +1,80 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+import logging
+import time
+import gevent
+
+
+class AvailabilityStore(object):
+    """
+    In-memory snapshot of the availability of all the places of a provider, a dict keyed by the ref of the places
+
+    The snapshot is fetched on the first use and then refreshed by a background greenlet every 'refresh_period'
+    seconds, so looking up the places of a response needs neither i/o nor unpickling. The greenlet is started on the
+    first use to have one by worker, if it is late the snapshot is fetched again on use.
+    When the feed cannot be fetched ('fetch' raised or returned None) the previous snapshot is kept and its date is
+    not updated, once it is late the next use fetches the feed again.
+    With a refresh_period of 0 the store is deactivated and the feed is fetched on each use.
+    """
+    def __init__(self, fetch, refresh_period, timer=time.time):
+        self._fetch = fetch
+        self.refresh_period = refresh_period
+        self._timer = timer
+        self._snapshot = None
+        self._fetched_at = None
+        self._refresher = None
+
+    def get(self):
+        if self.refresh_period <= 0:
+            return self._fetch()
+        if self._refresher is None or self._refresher.dead:
+            self._refresher = gevent.spawn(self._refresh_loop)
+        if self._fetched_at is None or self._timer() - self._fetched_at > 2 * self.refresh_period:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        snapshot = self._fetch()
+        if snapshot is not None:
+            self._snapshot = snapshot
+            self._fetched_at = self._timer()
+
+    def invalidate(self):
+        self._snapshot = None
+        self._fetched_at = None
+
+    def _refresh_loop(self):
+        while True:
+            gevent.sleep(self.refresh_period)
+            try:
+                self.refresh()
+            except Exception:
+                logging.getLogger(__name__).exception('impossible to refresh the availability snapshot')
+
@@ -35,6 +35,7 @@ import zeep
 
 from jormungandr import cache, app
 from jormungandr.parking_space_availability import AbstractParkingPlacesProvider
+from jormungandr.parking_space_availability.availability_store import AvailabilityStore
 from jormungandr.parking_space_availability.bss.stands import Stands
 from jormungandr.ptref import FeedPublisher
 
@@ -53,6 +54,9 @@ class AtosProvider(AbstractParkingPlacesProvider):
         self._client = None
         self.breaker = pybreaker.CircuitBreaker(fail_max=kwargs.get('fail_max', 5), reset_timeout=kwargs.get('reset_timeout', 120))
         self._feed_publisher = FeedPublisher(**feed_publisher) if feed_publisher else None
+        refresh_period = kwargs.get('availability_refresh_period',
+                                    app.config['CACHE_CONFIGURATION'].get('TIMEOUT_ATOS', 30))
+        self._availability = AvailabilityStore(lambda: self.breaker.call(self._get_all_stands), refresh_period)
 
     def __repr__(self):
         return self.WS_URL + str(self.id_ao)
@@ -65,7 +69,7 @@ class AtosProvider(AbstractParkingPlacesProvider):
     def get_informations(self, poi):
         logging.debug('building stands')
         try:
-            all_stands = self.breaker.call(self._get_all_stands)
+            all_stands = self._availability.get()
             ref = poi.get('properties', {}).get('ref')
             if ref:
                 stands = all_stands.get(ref.lstrip('0'))
@@ -29,12 +29,13 @@
 # www.navitia.io
 from __future__ import absolute_import, print_function, unicode_literals, division
 from jormungandr.parking_space_availability import AbstractParkingPlacesProvider
-from jormungandr import cache, app
+from jormungandr import cache, app, http_pool
 import pybreaker
 import logging
 import json
 import requests as requests
 from jormungandr.ptref import FeedPublisher
+from jormungandr.parking_space_availability.availability_store import AvailabilityStore
 from jormungandr.parking_space_availability.bss.stands import Stands
 
 
@@ -63,6 +64,9 @@ class CykleoProvider(AbstractParkingPlacesProvider):
             fail_max=kwargs.get('circuit_breaker_max_fail', app.config['CIRCUIT_BREAKER_MAX_CYKLEO_FAIL']),
             reset_timeout=kwargs.get('circuit_breaker_reset_timeout', app.config['CIRCUIT_BREAKER_CYKLEO_TIMEOUT_S']))
         self._feed_publisher = FeedPublisher(**feed_publisher) if feed_publisher else None
+        refresh_period = kwargs.get('availability_refresh_period',
+                                    app.config['CACHE_CONFIGURATION'].get('TIMEOUT_CYKLEO', 30))
+        self._availability = AvailabilityStore(lambda: self._call_webservice(), refresh_period)
 
     def service_caller(self, method, url, headers, data=None, params=None):
         try:
@@ -95,7 +99,7 @@ class CykleoProvider(AbstractParkingPlacesProvider):
         if self.service_id is not None:
             data.update({"serviceId": self.service_id})
 
-        response = self.service_caller(method=requests.post, url='{}/bo/auth'.format(self.url),
+        response = self.service_caller(method=http_pool.post, url='{}/bo/auth'.format(self.url),
                                        headers=headers, data=json.dumps(data))
         if not response:
             return None
@@ -111,7 +115,7 @@ class CykleoProvider(AbstractParkingPlacesProvider):
         access_token = self.get_access_token()
         headers = {'Authorization': 'Bearer {}'.format(access_token)}
         params = None if self.organization_id is None else {'organization_id': self.organization_id}
-        data = self.service_caller(method=requests.get,
+        data = self.service_caller(method=http_pool.get,
                                    url='{}/bo/stations/availability'.format(self.url),
                                    headers=headers,
                                    params=params)
@@ -140,7 +144,7 @@ class CykleoProvider(AbstractParkingPlacesProvider):
         ref = poi.get('properties', {}).get('ref')
         if ref is not None:
             ref = ref.lstrip('0')
-        data = self._call_webservice()
+        data = self._availability.get()
         if not data:
             return None
         station = data.get(ref)
@@ -32,8 +32,9 @@ import logging
 import pybreaker
 import requests as requests
 
-from jormungandr import cache, app
+from jormungandr import cache, app, http_pool
 from jormungandr.parking_space_availability import AbstractParkingPlacesProvider
+from jormungandr.parking_space_availability.availability_store import AvailabilityStore
 from jormungandr.parking_space_availability.bss.stands import Stands
 from jormungandr.ptref import FeedPublisher
 
@@ -60,6 +61,9 @@ class JcdecauxProvider(AbstractParkingPlacesProvider):
         reset_timeout = kwargs.get('circuit_breaker_reset_timeout', app.config['CIRCUIT_BREAKER_JCDECAUX_TIMEOUT_S'])
         self.breaker = pybreaker.CircuitBreaker(fail_max=fail_max, reset_timeout=reset_timeout)
         self._feed_publisher = FeedPublisher(**feed_publisher) if feed_publisher else None
+        refresh_period = kwargs.get('availability_refresh_period',
+                                    app.config['CACHE_CONFIGURATION'].get('TIMEOUT_JCDECAUX', 30))
+        self._availability = AvailabilityStore(lambda: self._call_webservice(), refresh_period)
 
     def support_poi(self, poi):
         properties = poi.get('properties', {})
@@ -69,7 +73,7 @@ class JcdecauxProvider(AbstractParkingPlacesProvider):
     @cache.memoize(app.config['CACHE_CONFIGURATION'].get('TIMEOUT_JCDECAUX', 30))
     def _call_webservice(self):
         try:
-            data = self.breaker.call(requests.get, self.WS_URL_TEMPLATE.format(self.contract, self.api_key), timeout=self.timeout)
+            data = self.breaker.call(http_pool.get, self.WS_URL_TEMPLATE.format(self.contract, self.api_key), timeout=self.timeout)
             stands = {}
             for s in data.json():
                 stands[str(s['number'])] = s
@@ -84,7 +88,7 @@ class JcdecauxProvider(AbstractParkingPlacesProvider):
 
     def get_informations(self, poi):
         ref = poi.get('properties', {}).get('ref')
-        data = self._call_webservice()
+        data = self._availability.get()
         if not data or ref not in data:
             return None
         if 'available_bike_stands' in data[ref] and 'available_bikes' in data[ref]:
@@ -91,6 +91,7 @@ def parking_space_availability_atos_get_informations_test():
     assert provider.get_informations(poi_blur_ref) == stands
 
     provider._get_all_stands = MagicMock(side_effect=Exception('cannot access service'))
+    provider._availability.invalidate()
     assert provider.get_informations(poi) is None
 
 def parking_space_availability_atos_get_all_stands_test():
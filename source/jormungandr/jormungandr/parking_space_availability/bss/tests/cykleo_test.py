@@ -114,6 +114,7 @@ def parking_space_availability_cykleo_get_informations_test():
     assert provider.get_informations(poi) == Stands(2, 4)
     assert provider.get_informations(poi_with_0) == Stands(2, 4)
     provider._call_webservice = MagicMock(return_value=None)
+    provider._availability.invalidate()
     assert provider.get_informations(poi) is None
     assert provider.get_informations(poi_with_0) is None
 
@@ -76,6 +76,7 @@ def parking_space_availability_jcdecaux_get_informations_test():
     provider._call_webservice = MagicMock(return_value=webservice_response)
     assert provider.get_informations(poi) == Stands(4, 8)
     provider._call_webservice = MagicMock(return_value=None)
+    provider._availability.invalidate()
     assert provider.get_informations(poi) is None
     invalid_poi = {}
     assert provider.get_informations(invalid_poi) is None
@@ -34,8 +34,9 @@ import pybreaker
 import requests as requests
 import jmespath
 
-from jormungandr import cache, app, utils, new_relic
+from jormungandr import cache, app, utils, new_relic, http_pool
 from jormungandr.parking_space_availability import AbstractParkingPlacesProvider
+from jormungandr.parking_space_availability.availability_store import AvailabilityStore
 from jormungandr.parking_space_availability.car.parking_places import ParkingPlaces
 from jormungandr.ptref import FeedPublisher
 
@@ -44,9 +45,14 @@ DEFAULT_STAR_FEED_PUBLISHER = None
 
 class StarProvider(AbstractParkingPlacesProvider):
 
-    def __init__(self, url, operators, dataset, timeout=1, feed_publisher=DEFAULT_STAR_FEED_PUBLISHER, **kwargs):
+    def __init__(self, url, operators, dataset, timeout=1, feed_publisher=DEFAULT_STAR_FEED_PUBLISHER,
+                 bulk_fetch=False, bulk_rows=1000, **kwargs):
 
         self.ws_service_template = url + '/?dataset={}&refine.idparc={}'
+        # with bulk_fetch all the car parks of the dataset are fetched in one call and kept in memory
+        self.ws_bulk_service_template = url + '/?dataset={}&rows={}'
+        self.bulk_fetch = bulk_fetch
+        self.bulk_rows = bulk_rows
 
         self.operators = [o.lower() for o in operators]
         self.timeout = timeout
@@ -60,6 +66,10 @@ class StarProvider(AbstractParkingPlacesProvider):
 
         self.log = logging.LoggerAdapter(logging.getLogger(__name__), extra={'dataset': self.dataset})
 
+        refresh_period = kwargs.get('availability_refresh_period',
+                                    app.config['CACHE_CONFIGURATION'].get('TIMEOUT_STAR', 30))
+        self._availability = AvailabilityStore(lambda: self._call_bulk_webservice(), refresh_period)
+
     def support_poi(self, poi):
         properties = poi.get('properties', {})
         return properties.get('operator', '').lower() in self.operators
@@ -69,23 +79,43 @@ class StarProvider(AbstractParkingPlacesProvider):
         if not ref:
             return
 
-        data = self._call_webservice(ref)
-        if not data:
-            return
-
-        available = jmespath.search('records[0].fields.nombreplacesdisponibles', data)
-        occupied = jmespath.search('records[0].fields.nombreplacesoccupees', data)
+        if self.bulk_fetch:
+            records = self._availability.get()
+            if not records:
+                return
+            fields = records.get(ref, {})
+        else:
+            data = self._call_webservice(ref)
+            if not data:
+                return
+            fields = jmespath.search('records[0].fields', data) or {}
+
+        available = fields.get('nombreplacesdisponibles')
+        occupied = fields.get('nombreplacesoccupees')
         # Person with reduced mobility
-        available_PRM = jmespath.search('records[0].fields.nombreplacesdisponiblespmr', data)
-        occupied_PRM = jmespath.search('records[0].fields.nombreplacesoccupeespmr', data)
+        available_PRM = fields.get('nombreplacesdisponiblespmr')
+        occupied_PRM = fields.get('nombreplacesoccupeespmr')
 
         return ParkingPlaces(available, occupied, available_PRM, occupied_PRM)
 
     @cache.memoize(app.config['CACHE_CONFIGURATION'].get('TIMEOUT_STAR', 30))
     def _call_webservice(self, parking_id):
+        return self._get(self.ws_service_template.format(self.dataset, parking_id))
+
+    @cache.memoize(app.config['CACHE_CONFIGURATION'].get('TIMEOUT_STAR', 30))
+    def _call_bulk_webservice(self):
+        data = self._get(self.ws_bulk_service_template.format(self.dataset, self.bulk_rows))
+        if data is None:
+            return None
+        records = jmespath.search('records[*].fields', data) or []
+        if len(records) >= self.bulk_rows:
+            self.log.warning('{} car parks fetched, the limit of bulk_rows, some of them may be missing'
+                             .format(len(records)))
+        return {str(fields['idparc']): fields for fields in records if 'idparc' in fields}
+
+    def _get(self, url):
         try:
-            data = self.breaker.call(requests.get, self.ws_service_template.format(self.dataset, parking_id),
-                                     timeout=self.timeout)
+            data = self.breaker.call(http_pool.get, url, timeout=self.timeout)
             # record in newrelic
             self.record_call("OK")
             return data.json()
@@ -108,7 +138,7 @@ class StarProvider(AbstractParkingPlacesProvider):
         return None
 
     def status(self):
-        return {'operators': self.operators}
+        return {'operators': self.operators, 'bulk_fetch': self.bulk_fetch}
 
     def feed_publisher(self):
         return self._feed_publisher
@@ -131,3 +131,50 @@ def car_park_space_get_information_test():
     assert info == parking_places
     assert not hasattr(info, "available_PRM")
     assert not hasattr(info, "occupied_PRM")
+
+
+def car_park_space_get_information_bulk_test():
+    """
+    with bulk_fetch all the car parks are fetched in one call
+    """
+    parking_places = ParkingPlaces(available=4,
+                                   occupied=3,
+                                   available_PRM=2,
+                                   occupied_PRM=0)
+    provider = StarProvider("fake.url", {'Keolis Rennes'}, 'toto', 42, bulk_fetch=True)
+    provider._call_webservice = MagicMock()
+    provider._call_bulk_webservice = MagicMock(return_value={
+        '42': {
+            "idparc": "42",
+            "nombreplacesdisponibles": 4,
+            "nombreplacesoccupees": 3,
+            "nombreplacesdisponiblespmr": 2,
+            "nombreplacesoccupeespmr": 0
+        }
+    })
+    assert provider.get_informations(poi) == parking_places
+    assert provider.get_informations(poi) == parking_places
+    assert provider._call_bulk_webservice.call_count == 1
+    assert not provider._call_webservice.called
+
+    poi_unknown = {'properties': {'operator': 'Keolis Rennes', 'ref': '43'}}
+    assert provider.get_informations(poi_unknown) == ParkingPlaces(None, None, None, None)
+
+    provider._call_bulk_webservice = MagicMock(return_value=None)
+    provider._availability.invalidate()
+    assert provider.get_informations(poi) is None
+
+
+def car_park_space_bulk_truncated_test():
+    """
+    a bulk feed with bulk_rows records is possibly truncated, it is logged
+    """
+    provider = StarProvider("fake.url", {'Keolis Rennes'}, 'toto', 42, bulk_fetch=True, bulk_rows=2)
+    provider._get = MagicMock(return_value={'records': [{'fields': {'idparc': '42'}}, {'fields': {'idparc': '43'}}]})
+    provider.log = MagicMock()
+    assert sorted(provider._call_bulk_webservice()) == ['42', '43']
+    assert provider.log.warning.call_count == 1
+
+    provider._get.return_value = {'records': [{'fields': {'idparc': '42'}}]}
+    provider._call_bulk_webservice()
+    assert provider.log.warning.call_count == 1
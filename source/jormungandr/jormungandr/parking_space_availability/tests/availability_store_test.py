@@ -0,0 +1,106 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+
+import pytest
+from mock import MagicMock
+
+from jormungandr.parking_space_availability.availability_store import AvailabilityStore
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def availability_store_deactivated_test():
+    """
+    without refresh period the feed is fetched on each call
+    """
+    fetch = MagicMock(return_value={'1': 'station'})
+    store = AvailabilityStore(fetch, 0)
+    assert store.get() == {'1': 'station'}
+    assert store.get() == {'1': 'station'}
+    assert fetch.call_count == 2
+
+
+def availability_store_snapshot_test():
+    """
+    the feed is fetched once and fetched again on use only if the refresher is late
+    """
+    fetch = MagicMock(return_value={'1': 'station'})
+    timer = FakeTimer()
+    store = AvailabilityStore(fetch, 30, timer=timer)
+    assert store.get() == {'1': 'station'}
+    timer.now = 60
+    assert store.get() == {'1': 'station'}
+    assert fetch.call_count == 1
+
+    fetch.return_value = {'2': 'station'}
+    store.refresh()
+    assert store.get() == {'2': 'station'}
+
+    fetch.return_value = {'3': 'station'}
+    timer.now = 121
+    assert store.get() == {'3': 'station'}
+    assert fetch.call_count == 3
+
+    fetch.return_value = {'4': 'station'}
+    store.invalidate()
+    assert store.get() == {'4': 'station'}
+
+
+def availability_store_error_test():
+    """
+    a failing fetch keeps the previous snapshot, the feed is fetched again on use once the snapshot is late
+    """
+    fetch = MagicMock(return_value={'1': 'station'})
+    timer = FakeTimer()
+    store = AvailabilityStore(fetch, 30, timer=timer)
+    assert store.get() == {'1': 'station'}
+    fetch.side_effect = Exception('cannot access service')
+    with pytest.raises(Exception):
+        store.refresh()
+    assert store.get() == {'1': 'station'}
+    assert fetch.call_count == 2
+
+    fetch.side_effect = None
+    fetch.return_value = None
+    timer.now = 61
+    assert store.get() == {'1': 'station'}
+    assert store.get() == {'1': 'station'}
+    assert fetch.call_count == 4
+
+    fetch.return_value = {'2': 'station'}
+    assert store.get() == {'2': 'station'}
+    assert store.get() == {'2': 'station'}
+    assert fetch.call_count == 5
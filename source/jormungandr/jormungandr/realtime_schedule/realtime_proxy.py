@@ -34,7 +34,7 @@ from copy import deepcopy
 from jormungandr.schedule import RoutePoint
 from jormungandr.utils import timestamp_to_datetime, record_external_failure
 from jormungandr.utils import date_to_timestamp, pb_del_if
-from jormungandr import new_relic
+from jormungandr import new_relic, tracing, cache
 from navitiacommon import type_pb2
 import datetime
 import hashlib
@@ -51,6 +51,9 @@ class RealtimeProxy(six.with_metaclass(ABCMeta, object)):
     abstract class managing calls to external service providing real-time next passages
     """
 
+    # number of route points that can be queried in one call to the external service
+    max_batch_size = 1
+
     @abstractmethod
     def _get_next_passage_for_route_point(self, route_point, count, from_dt, current_dt, duration):
         """
@@ -91,7 +94,9 @@ class RealtimeProxy(six.with_metaclass(ABCMeta, object)):
         returns the next realtime passages
         """
         try:
-            next_passages = self._get_next_passage_for_route_point(route_point, count, from_dt, current_dt, duration)
+            with tracing.span('realtime.{}'.format(self.rt_system_id)):
+                next_passages = self._get_next_passage_for_route_point(route_point, count, from_dt, current_dt,
+                                                                       duration)
             filtered_passage = self._filter_passages(next_passages, count, from_dt, duration, timezone)
 
             self.record_call('ok')
@@ -101,6 +106,78 @@ class RealtimeProxy(six.with_metaclass(ABCMeta, object)):
             self.record_call('failure', reason=str(e))
             return None
 
+    def _get_next_passages_for_route_points(self, route_points, count, from_dt, current_dt, duration):
+        """
+        method that actually calls the external service to get the next passages of several route_points
+
+        to be overloaded by the proxies with a max_batch_size > 1,
+        returns a list with the next passages of each route point
+        """
+        return [self._get_next_passage_for_route_point(route_point, count, from_dt, current_dt, duration)
+                for route_point in route_points]
+
+    def _get_memoized_by_route_point(self, keys, fetch, timeout):
+        """
+        the responses of a batch are cached route point by route point, so a route point is shared between the
+        batches: the route points are looked for in the cache first and only the misses are fetched, in one call
+
+        :param keys: the cache key of each route point, None if the route point cannot be queried
+        :param fetch: called with the indexes of the misses, returns a dict of their values by index
+        :param timeout: timeout of the cache entries, in seconds
+        :return: a list with the value of each route point, None if it has not been found
+        """
+        # the key is hashed as some cache backends don't accept long keys or keys with spaces
+        keys = ['realtime_{}'.format(hashlib.md5(six.text_type((self.rt_system_id,) + key).encode('utf-8'))
+                                     .hexdigest()) if key else None
+                for key in keys]
+        values = [None] * len(keys)
+        cache_keys = [k for k in keys if k]
+        if cache_keys:
+            try:
+                cached = dict(zip(cache_keys, cache.get_many(*cache_keys)))
+                values = [cached.get(k) if k else None for k in keys]
+            except Exception as e:
+                logging.getLogger(__name__).exception('impossible to get the next passages from the cache: %s', e)
+
+        misses = [i for i, k in enumerate(keys) if k and values[i] is None]
+        if not misses:
+            return values
+        fetched = fetch(misses)
+        for i, value in fetched.items():
+            values[i] = value
+        to_cache = {keys[i]: value for i, value in fetched.items() if value is not None}
+        if to_cache:
+            try:
+                cache.set_many(to_cache, timeout=timeout)
+            except Exception as e:
+                logging.getLogger(__name__).exception('impossible to put the next passages in the cache: %s', e)
+        return values
+
+    def next_passages_for_route_points(self, route_points, count=None, from_dt=None, current_dt=None,
+                                       duration=86400, timezone=None):
+        """
+        next realtime passages of several route points in one call to the external service
+
+        returns a list with the next realtime passages of each route point,
+        None for the route points that must keep their base schedule
+        """
+        if len(route_points) == 1:
+            return [self.next_passage_for_route_point(route_points[0], count, from_dt, current_dt,
+                                                      duration, timezone)]
+        try:
+            with tracing.span('realtime.{}'.format(self.rt_system_id)):
+                next_passages = self._get_next_passages_for_route_points(route_points, count, from_dt,
+                                                                         current_dt, duration)
+            filtered_passages = [self._filter_passages(p, count, from_dt, duration, timezone)
+                                 for p in next_passages]
+
+            self.record_call('ok')
+
+            return filtered_passages
+        except RealtimeProxyError as e:
+            self.record_call('failure', reason=str(e))
+            return [None] * len(route_points)
+
     # Method used to filter schedules from kraken before merging. By default remove all schedules.
     # Overload this to keep some and mix kraken and proxy datas.
     def _filter_base_stop_schedule(self, date_time):
@@ -33,7 +33,7 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 from flask import logging
 import pybreaker
 import requests as requests
-from jormungandr import cache, app
+from jormungandr import cache, app, http_pool
 from jormungandr.realtime_schedule.realtime_proxy import RealtimeProxy, RealtimeProxyError
 from jormungandr.schedule import RealTimePassage
 import xml.etree.ElementTree as et
@@ -55,6 +55,7 @@ class Siri(RealtimeProxy):
         self.object_id_tag = object_id_tag if object_id_tag else id
         self.destination_id_tag = destination_id_tag
         self.instance = instance
+        self.max_batch_size = kwargs.get('max_batch_size', 10)
         self.breaker = pybreaker.CircuitBreaker(fail_max=app.config.get('CIRCUIT_BREAKER_MAX_SIRI_FAIL', 5),
                                                 reset_timeout=app.config.get('CIRCUIT_BREAKER_SIRI_TIMEOUT_S', 60))
 
@@ -78,6 +79,43 @@ class Siri(RealtimeProxy):
         logging.getLogger(__name__).debug('siri for {}: {}'.format(stop, siri_response.text))
         return self._get_passages(siri_response.content, route_point)
 
+    def _get_next_passages_for_route_points(self, route_points, count, from_dt, current_dt, duration=None):
+        """
+        the next passages of each route point are cached, the route points that are not in the cache are
+        grouped by stop and all the stops are monitored in one call to siri
+        """
+        keys = []
+        for route_point in route_points:
+            stop = route_point.fetch_stop_id(self.object_id_tag)
+            keys.append((stop,
+                         route_point.fetch_line_id(self.object_id_tag),
+                         route_point.fetch_route_id(self.object_id_tag),
+                         from_dt,
+                         count) if stop else None)
+
+        def fetch(misses):
+            return dict(zip(misses, self._fetch_passages([route_points[i] for i in misses], count, from_dt)))
+
+        return self._get_memoized_by_route_point(keys, fetch,
+                                                 app.config['CACHE_CONFIGURATION'].get('TIMEOUT_SIRI', 60))
+
+    def _fetch_passages(self, route_points, count, from_dt):
+        """
+        the route points are grouped by stop, all the stops are monitored in one call to siri
+        and the visits are then dispatched by route point
+        """
+        stops = sorted(set(route_point.fetch_stop_id(self.object_id_tag) for route_point in route_points))
+        if len(stops) == 1:
+            request = self._make_request(monitoring_ref=stops[0], dt=from_dt, count=count)
+        else:
+            request = self._make_multiple_request(monitoring_refs=stops, dt=from_dt, count=count)
+        siri_response = self._call_siri_without_cache(request)
+        if not siri_response or siri_response.status_code != 200:
+            raise RealtimeProxyError('invalid response')
+        logging.getLogger(__name__).debug('siri for {}: {}'.format(stops, siri_response.text))
+        root = self._parse_xml(siri_response.content)
+        return [self._get_passages_from_root(root, route_point) for route_point in route_points]
+
     def status(self):
         return {
             'id': unicode(self.rt_system_id),
@@ -89,14 +127,18 @@ class Siri(RealtimeProxy):
             },
         }
 
-    def _get_passages(self, xml, route_point):
-        ns = {'siri': 'http://www.siri.org.uk/siri'}
+    def _parse_xml(self, xml):
         try:
-            root = et.fromstring(xml)
+            return et.fromstring(xml)
         except et.ParseError as e:
             logging.getLogger(__name__).exception("invalid xml")
             raise RealtimeProxyError('invalid xml')
 
+    def _get_passages(self, xml, route_point):
+        return self._get_passages_from_root(self._parse_xml(xml), route_point)
+
+    def _get_passages_from_root(self, root, route_point):
+        ns = {'siri': 'http://www.siri.org.uk/siri'}
         stop = route_point.fetch_stop_id(self.object_id_tag)
         line = route_point.fetch_line_id(self.object_id_tag)
         route = route_point.fetch_route_id(self.object_id_tag)
@@ -120,6 +162,9 @@ class Siri(RealtimeProxy):
 
     @cache.memoize(app.config['CACHE_CONFIGURATION'].get('TIMEOUT_SIRI', 60))
     def _call_siri(self, request):
+        return self._call_siri_without_cache(request)
+
+    def _call_siri_without_cache(self, request):
         encoded_request = request.encode('utf-8', 'backslashreplace')
         headers = {
             "Content-Type": "text/xml; charset=UTF-8",
@@ -128,7 +173,7 @@ class Siri(RealtimeProxy):
 
         logging.getLogger(__name__).debug('siri RT service, post at {}: {}'.format(self.service_url, request))
         try:
-            return self.breaker.call(requests.post,
+            return self.breaker.call(http_pool.post,
                                      url=self.service_url,
                                      headers=headers,
                                      data=encoded_request,
@@ -179,6 +224,43 @@ class Siri(RealtimeProxy):
                    MonitoringRef=monitoring_ref)
         return request
 
-
-
-
+    def _make_multiple_request(self, dt, count, monitoring_refs):
+        """
+        same as _make_request, but with one StopMonitoringFRequest by monitored stop
+        """
+        count = min(count or 5, 5)
+        message_identifier = 'IDontCare'
+        timestamp = datetime.utcfromtimestamp(dt).isoformat()
+        stop_requests = ''.join("""
+                <siri:StopMonitoringFRequest version="1.3">
+                  <siri:RequestTimestamp>{dt}</siri:RequestTimestamp>
+                  <siri:MessageIdentifier>{MessageIdentifier}</siri:MessageIdentifier>
+                  <siri:MonitoringRef>{MonitoringRef}</siri:MonitoringRef>
+                  <siri:MaximumStopVisits>{count}</siri:MaximumStopVisits>
+                </siri:StopMonitoringFRequest>""".format(dt=timestamp,
+                                                          count=count,
+                                                          MessageIdentifier=message_identifier,
+                                                          MonitoringRef=monitoring_ref)
+                                for monitoring_ref in monitoring_refs)
+        request = """<?xml version="1.0" encoding="UTF-8"?>
+        <x:Envelope xmlns:x="http://schemas.xmlsoap.org/soap/envelope/"
+                    xmlns:wsd="http://wsdl.siri.org.uk" xmlns:siri="http://www.siri.org.uk/siri">
+          <x:Header/>
+          <x:Body>
+            <GetMultipleStopMonitoring xmlns="http://wsdl.siri.org.uk" xmlns:siri="http://www.siri.org.uk/siri">
+              <ServiceRequestInfo xmlns="">
+                <siri:RequestTimestamp>{dt}</siri:RequestTimestamp>
+                <siri:RequestorRef>{RequestorRef}</siri:RequestorRef>
+                <siri:MessageIdentifier>{MessageIdentifier}</siri:MessageIdentifier>
+              </ServiceRequestInfo>
+              <Request xmlns="">{StopRequests}
+              </Request>
+              <RequestExtension xmlns=""/>
+            </GetMultipleStopMonitoring>
+          </x:Body>
+        </x:Envelope>
+        """.format(dt=timestamp,
+                   RequestorRef=self.requestor_ref,
+                   MessageIdentifier=message_identifier,
+                   StopRequests=stop_requests)
+        return request
@@ -39,7 +39,7 @@ import pytz
 from flask import logging
 import pybreaker
 import requests as requests
-from jormungandr import cache, app
+from jormungandr import cache, app, http_pool
 from datetime import datetime
 from navitiacommon.ratelimit import RateLimiter, FakeRateLimiter
 from navitiacommon import type_pb2
@@ -108,7 +108,7 @@ class Synthese(RealtimeProxy):
         try:
             if not self.rate_limiter.acquire(self.rt_system_id, block=False):
                 raise RealtimeProxyError('maximum rate reached')
-            return self.breaker.call(requests.get, url, timeout=self.timeout)
+            return self.breaker.call(http_pool.get, url, timeout=self.timeout)
         except pybreaker.CircuitBreakerError as e:
             logging.getLogger(__name__).error('Synthese RT service dead, using base '
                                               'schedule (error: {}'.format(e))
@@ -34,7 +34,7 @@ import mock
 import pytz
 from jormungandr.realtime_schedule.siri import Siri
 import validators
-from jormungandr.realtime_schedule.tests.utils import MockRoutePoint, _timestamp
+from jormungandr.realtime_schedule.tests.utils import MockRoutePoint, _timestamp, FakeCache
 import xml.etree.ElementTree as et
 from jormungandr.tests.utils_test import MockResponse, MockRequests
 
@@ -123,7 +123,7 @@ def next_passage_for_route_point_test():
     mock_requests = MockRequests({'http://bob.com/': (mock_good_response(), 200)})
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
 
-    with mock.patch('requests.post', mock_requests.post):
+    with mock.patch('jormungandr.http_pool.post', mock_requests.post):
         passages = siri._get_next_passage_for_route_point(route_point,
                                                           from_dt=_timestamp("12:00"),
                                                           current_dt=_timestamp("12:00"),
@@ -144,11 +144,86 @@ def next_passage_for_route_point_failure_test():
 
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
 
-    with mock.patch('requests.post', mock_requests.post):
+    with mock.patch('jormungandr.http_pool.post', mock_requests.post):
         passages = siri.next_passage_for_route_point(route_point, from_dt=_timestamp("12:00"), count=2)
 
         assert passages is None
 
+def make_multiple_request_test():
+    siri = Siri(id='tata', service_url='http://bob.com/', requestor_ref='Stibada')
+
+    request = siri._make_multiple_request(dt=_timestamp("12:00"), count=2,
+                                          monitoring_refs=['Tri:SP:toto:LOC', 'Tri:SP:titi:LOC'])
+
+    # it should be a valid xml
+    root = et.fromstring(request)
+    ns = {'siri': 'http://www.siri.org.uk/siri'}
+
+    stop_requests = root.findall('.//siri:StopMonitoringFRequest', ns)
+    assert [r.find('siri:MonitoringRef', ns).text for r in stop_requests] == ['Tri:SP:toto:LOC', 'Tri:SP:titi:LOC']
+    assert all(r.find('siri:MaximumStopVisits', ns).text == '2' for r in stop_requests)
+    assert root.find('.//siri:RequestorRef', ns).text == 'Stibada'
+
+
+def next_passages_for_route_points_test():
+    """
+    the route points are queried in one call to siri and the visits are dispatched by route point
+    """
+    siri = Siri(id='tata', service_url='http://bob.com/', requestor_ref='Stibada')
+    mock_requests = MockRequests({'http://bob.com/': (mock_good_response(), 200)})
+    route_points = [MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu'),
+                    MockRoutePoint(route_id='route_titi', line_id='line_toto', stop_id='stop_tutu'),
+                    MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_toto')]
+
+    with mock.patch('jormungandr.http_pool.post', side_effect=mock_requests.post) as post:
+        passages = siri.next_passages_for_route_points(route_points, from_dt=_timestamp("12:00"), count=2,
+                                                       duration=60 * 86400)
+
+    assert post.call_count == 1
+    root = et.fromstring(post.call_args[1]['data'])
+    ns = {'siri': 'http://www.siri.org.uk/siri'}
+    assert [r.text for r in root.findall('.//siri:MonitoringRef', ns)] == ['stop_toto', 'stop_tutu']
+
+    assert len(passages) == 3
+    assert [p.datetime for p in passages[0]] == [datetime.datetime(2016, 3, 29, 13, 37, tzinfo=pytz.UTC)]
+    assert passages[1] == []
+    assert passages[2] == []
+
+
+def next_passages_for_route_points_cache_test():
+    """
+    the route points are cached one by one, only the stops of the route points that are not in the cache
+    are monitored
+    """
+    siri = Siri(id='tata', service_url='http://bob.com/', requestor_ref='Stibada')
+    mock_requests = MockRequests({'http://bob.com/': (mock_good_response(), 200)})
+    route_tutu = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
+    route_toto = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_toto')
+    route_titi = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_titi')
+    ns = {'siri': 'http://www.siri.org.uk/siri'}
+
+    with mock.patch('jormungandr.http_pool.post', side_effect=mock_requests.post) as post, \
+            mock.patch('jormungandr.realtime_schedule.realtime_proxy.cache', FakeCache()):
+        passages = siri.next_passages_for_route_points([route_tutu, route_toto], from_dt=_timestamp("12:00"),
+                                                       count=2, duration=60 * 86400)
+        assert post.call_count == 1
+        assert [p.datetime for p in passages[0]] == [datetime.datetime(2016, 3, 29, 13, 37, tzinfo=pytz.UTC)]
+
+        # route_tutu is in the cache, only stop_titi is monitored
+        passages = siri.next_passages_for_route_points([route_titi, route_tutu], from_dt=_timestamp("12:00"),
+                                                       count=2, duration=60 * 86400)
+        assert post.call_count == 2
+        root = et.fromstring(post.call_args[1]['data'])
+        assert [r.text for r in root.findall('.//siri:MonitoringRef', ns)] == ['stop_titi']
+        assert passages[0] == []
+        assert [p.datetime for p in passages[1]] == [datetime.datetime(2016, 3, 29, 13, 37, tzinfo=pytz.UTC)]
+
+        # everything is in the cache
+        siri.next_passages_for_route_points([route_toto, route_titi], from_dt=_timestamp("12:00"),
+                                            count=2, duration=60 * 86400)
+        assert post.call_count == 2
+
+
 def status_test():
     siri = Siri(id=u"tata-é$~#@\"*!'`§èû", service_url='http://bob.com/', requestor_ref='Stibada')
     status = siri.status()
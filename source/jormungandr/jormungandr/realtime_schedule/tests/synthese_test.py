@@ -141,7 +141,7 @@ def next_passage_for_route_point_test():
 
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
 
-    with mock.patch('requests.get', mock_requests.get):
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
         passages = synthese.next_passage_for_route_point(route_point)
 
         assert len(passages) == 3
@@ -166,7 +166,7 @@ def next_passage_for_route_point_failure_test():
 
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
 
-    with mock.patch('requests.get', mock_requests.get):
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
         passages = synthese.next_passage_for_route_point(route_point)
 
         assert passages is None
@@ -28,13 +28,14 @@
 # https://groups.google.com/d/forum/navitia
 # www.navitia.io
 from __future__ import absolute_import, print_function, division
+import copy
 import datetime
 import mock
 from time import sleep
 from jormungandr.realtime_schedule.timeo import Timeo
 from jormungandr.realtime_schedule.realtime_proxy import RealtimeProxyError
 import validators
-from jormungandr.realtime_schedule.tests.utils import MockRoutePoint, _timestamp, _dt
+from jormungandr.realtime_schedule.tests.utils import MockRoutePoint, _timestamp, _dt, FakeCache
 from jormungandr.tests.utils_test import MockRequests
 from pytest import raises
 from six.moves import range
@@ -235,7 +236,7 @@ def next_passage_for_route_point_test():
 
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
     # we mock the http call to return the hard coded mock_response
-    with mock.patch('requests.get', mock_requests.get):
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
         with mock.patch('jormungandr.realtime_schedule.timeo.Timeo._get_direction_name', lambda timeo, **kwargs: None):
             passages = timeo.next_passage_for_route_point(route_point, current_dt=_dt("02:02"))
 
@@ -262,12 +263,122 @@ def next_passage_for_route_point_timeo_failure_test():
     })
 
     route_point = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='stop_tutu')
-    with mock.patch('requests.get', mock_requests.get):
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
         passages = timeo.next_passage_for_route_point(route_point, current_dt=_dt("02:02"))
 
         assert passages is None
 
 
+def next_passages_for_route_points_test():
+    """
+    the route points are queried in one call to timeo, with one StopDescription each,
+    and the StopTimesResponse are dispatched by timeo codes
+    """
+    timeo = Timeo(id='tata', timezone='UTC', service_url='http://bob.com/tata',
+                  service_args={'a': 'bobette', 'b': '12'})
+
+    mock_response = mock_good_timeo_response()
+    other_route = copy.deepcopy(mock_response['StopTimesResponse'][0])
+    other_route['NextStopTimesMessage']['Way'] = 'route_titi'
+    other_route['NextStopTimesMessage']['NextExpectedStopTime'] = [
+        {"NextStop": "15:42:00", "Destination": "B direction"}
+    ]
+    mock_response['StopTimesResponse'].append(other_route)
+
+    # the descriptions are sorted in the url
+    mock_requests = MockRequests({
+        'http://bob.com/tata?a=bobette&b=12&StopDescription='
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_tata&NextStopTimeNumber=5&StopTimeoCode=3331;'
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_titi&NextStopTimeNumber=5&StopTimeoCode=3331;':
+        (mock_response, 200)
+    })
+
+    route_points = [MockRoutePoint(route_id='route_titi', line_id='line_toto', stop_id='3331'),
+                    MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='3331'),
+                    MockRoutePoint(route_id='route_tutu', line_id='line_toto', stop_id=None)]
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
+        with mock.patch('jormungandr.realtime_schedule.timeo.Timeo._get_direction_name', lambda timeo, **kwargs: None):
+            passages = timeo.next_passages_for_route_points(route_points, current_dt=_dt("02:02"))
+
+    assert len(passages) == 3
+    assert [p.datetime for p in passages[0]] == [_dt('15:42:00')]
+    assert [p.datetime for p in passages[1]] == [_dt('15:40:04'), _dt('15:55:04'), _dt('16:10:04')]
+    # no timeo code, the route point keeps its base schedule
+    assert passages[2] is None
+
+
+def next_passages_for_route_points_failure_test():
+    """
+    when the batched call fails, all the route points keep their base schedule
+    """
+    timeo = Timeo(id='tata', timezone='UTC', service_url='http://bob.com/tata',
+                  service_args={'a': 'bobette', 'b': '12'})
+
+    mock_requests = MockRequests({
+        'http://bob.com/tata?a=bobette&b=12&StopDescription='
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_tata&NextStopTimeNumber=5&StopTimeoCode=3331;'
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_titi&NextStopTimeNumber=5&StopTimeoCode=3331;':
+        (mock_good_timeo_response(), 404)
+    })
+
+    route_points = [MockRoutePoint(route_id='route_titi', line_id='line_toto', stop_id='3331'),
+                    MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='3331')]
+    with mock.patch('jormungandr.http_pool.get', mock_requests.get):
+        passages = timeo.next_passages_for_route_points(route_points, current_dt=_dt("02:02"))
+
+    assert passages == [None, None]
+
+
+def next_passages_for_route_points_cache_test():
+    """
+    the route points are cached one by one, only the route points that are not in the cache are queried
+    """
+    timeo = Timeo(id='tata', timezone='UTC', service_url='http://bob.com/tata',
+                  service_args={'a': 'bobette', 'b': '12'})
+
+    mock_response = mock_good_timeo_response()
+    other_route = copy.deepcopy(mock_response['StopTimesResponse'][0])
+    other_route['NextStopTimesMessage']['Way'] = 'route_titi'
+    other_route['NextStopTimesMessage']['NextExpectedStopTime'] = [
+        {"NextStop": "15:42:00", "Destination": "B direction"}
+    ]
+    mock_response['StopTimesResponse'].append(other_route)
+    last_route = copy.deepcopy(other_route)
+    last_route['NextStopTimesMessage']['Way'] = 'route_tutu'
+
+    mock_requests = MockRequests({
+        'http://bob.com/tata?a=bobette&b=12&StopDescription='
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_tata&NextStopTimeNumber=5&StopTimeoCode=3331;'
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_titi&NextStopTimeNumber=5&StopTimeoCode=3331;':
+        (mock_response, 200),
+        'http://bob.com/tata?a=bobette&b=12&StopDescription='
+        '?StopTimeType=TR&LineTimeoCode=line_toto&Way=route_tutu&NextStopTimeNumber=5&StopTimeoCode=3331;':
+        ({'StopTimesResponse': [last_route]}, 200),
+    })
+
+    route_tata = MockRoutePoint(route_id='route_tata', line_id='line_toto', stop_id='3331')
+    route_titi = MockRoutePoint(route_id='route_titi', line_id='line_toto', stop_id='3331')
+    route_tutu = MockRoutePoint(route_id='route_tutu', line_id='line_toto', stop_id='3331')
+    with mock.patch('jormungandr.http_pool.get', side_effect=mock_requests.get) as get, \
+            mock.patch('jormungandr.realtime_schedule.realtime_proxy.cache', FakeCache()), \
+            mock.patch('jormungandr.realtime_schedule.timeo.Timeo._get_direction_name', lambda timeo, **kwargs: None):
+        passages = timeo.next_passages_for_route_points([route_titi, route_tata], current_dt=_dt("02:02"))
+        assert get.call_count == 1
+        assert [p.datetime for p in passages[0]] == [_dt('15:42:00')]
+
+        # route_titi is in the cache, only route_tutu is queried
+        passages = timeo.next_passages_for_route_points([route_tutu, route_titi], current_dt=_dt("02:02"))
+        assert get.call_count == 2
+        assert 'Way=route_titi' not in get.call_args[0][0]
+        assert [p.datetime for p in passages[0]] == [_dt('15:42:00')]
+        assert [p.datetime for p in passages[1]] == [_dt('15:42:00')]
+
+        # everything is in the cache
+        passages = timeo.next_passages_for_route_points([route_tata, route_tutu], current_dt=_dt("02:02"))
+        assert get.call_count == 2
+        assert [p.datetime for p in passages[0]] == [_dt('15:40:04'), _dt('15:55:04'), _dt('16:10:04')]
+
+
 def timeo_circuit_breaker_test():
     """
     Test the circuit breaker around Timeo
@@ -296,7 +407,7 @@ def timeo_circuit_breaker_test():
             raise Exception('test error')
 
     m = Mocker()
-    with mock.patch('requests.get', m.get):
+    with mock.patch('jormungandr.http_pool.get', m.get):
         with raises(RealtimeProxyError):
             timeo._call_timeo('http://bob.com')
         assert good_response == timeo._call_timeo('http://bob.com')
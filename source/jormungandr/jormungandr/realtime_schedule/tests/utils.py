@@ -55,6 +55,20 @@ class MockRoutePoint(object):
     def fetch_all_route_id(self, rt_proxy_id):
         return [self._hardcoded_route_id]
 
+class FakeCache(object):
+    """
+    in-memory cache to check what the proxies put in the cache
+    """
+    def __init__(self):
+        self.values = {}
+
+    def get_many(self, *keys):
+        return [self.values.get(k) for k in keys]
+
+    def set_many(self, mapping, timeout=None):
+        self.values.update(mapping)
+
+
 def _dt(dt_to_parse="00:00", year=2016, month=2, day=7):
     """
     small helper to ease the reading of the tests
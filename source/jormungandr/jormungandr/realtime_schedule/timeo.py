@@ -33,7 +33,7 @@ from flask import logging
 import pybreaker
 import pytz
 import requests as requests
-from jormungandr import cache, app
+from jormungandr import cache, app, http_pool
 from jormungandr.realtime_schedule.realtime_proxy import RealtimeProxy, RealtimeProxyError
 from jormungandr.schedule import RealTimePassage
 from datetime import datetime, time
@@ -59,6 +59,7 @@ class Timeo(RealtimeProxy):
         self.object_id_tag = object_id_tag if object_id_tag else id
         self.destination_id_tag = destination_id_tag
         self.instance = instance
+        self.max_batch_size = kwargs.get('max_batch_size', 10)
         fail_max = kwargs.get('circuit_breaker_max_fail', app.config['CIRCUIT_BREAKER_MAX_TIMEO_FAIL'])
         reset_timeout = kwargs.get('circuit_breaker_reset_timeout', app.config['CIRCUIT_BREAKER_TIMEO_TIMEOUT_S'])
         self.breaker = pybreaker.CircuitBreaker(fail_max=fail_max, reset_timeout=reset_timeout)
@@ -96,10 +97,16 @@ class Timeo(RealtimeProxy):
 
         The call is also cached
         """
+        return self._call_timeo_without_cache(url)
+
+    def _call_timeo_without_cache(self, url):
+        """
+        http call to timeo, for the batches that are cached route point by route point
+        """
         try:
             if not self.rate_limiter.acquire(self.rt_system_id, block=False):
                 return None
-            return self.breaker.call(requests.get, url, timeout=self.timeout)
+            return self.breaker.call(http_pool.get, url, timeout=self.timeout)
         except pybreaker.CircuitBreakerError as e:
             logging.getLogger(__name__).error('Timeo RT service dead, using base schedule (error: {}'.format(e),
                                               extra={'rt_system_id': unicode(self.rt_system_id)})
@@ -148,6 +155,56 @@ class Timeo(RealtimeProxy):
 
         return self._get_passages(r.json(), current_dt, route_point.fetch_line_uri())
 
+    def _get_next_passages_for_route_points(self, route_points, count=None, from_dt=None, current_dt=None,
+                                            duration=None):
+        """
+        the StopTimesResponse of each route point is cached, the route points that are not in the cache are
+        given as StopDescription of one call to timeo
+        """
+        if self._is_tomorrow(from_dt, current_dt):
+            logging.getLogger(__name__).info('Timeo RT service , Can not call Timeo for tomorrow.',
+                                             extra={'rt_system_id': unicode(self.rt_system_id)})
+            return [None] * len(route_points)
+        stop_descriptions = [self._make_stop_description(route_point, count, from_dt)
+                             for route_point in route_points]
+
+        def fetch(misses):
+            return dict(zip(misses, self._fetch_stop_times_responses([route_points[i] for i in misses],
+                                                                     [stop_descriptions[i] for i in misses])))
+
+        st_responses = self._get_memoized_by_route_point([(d,) if d else None for d in stop_descriptions], fetch,
+                                                         app.config['CACHE_CONFIGURATION'].get('TIMEOUT_TIMEO', 60))
+        return [self._get_passages({'StopTimesResponse': [st_response]}, current_dt, route_point.fetch_line_uri())
+                if st_response is not None else None
+                for route_point, st_response in zip(route_points, st_responses)]
+
+    def _fetch_stop_times_responses(self, route_points, stop_descriptions):
+        """
+        all the route points are given as StopDescription of one call to timeo,
+        returns a list with the StopTimesResponse of each route point
+        """
+        # the descriptions are sorted not to depend on the route points order
+        url = self._make_url_from_stop_descriptions(sorted(set(stop_descriptions)))
+        logging.getLogger(__name__).debug('Timeo RT service , call url : {}'.format(url),
+                                          extra={'rt_system_id': unicode(self.rt_system_id)})
+        r = self._call_timeo_without_cache(url)
+        if not r:
+            return [None] * len(route_points)
+
+        if r.status_code != 200:
+            logging.getLogger(__name__).error('Timeo RT service unavailable, impossible to query : {}'.format(r.url),
+                    extra={'rt_system_id': unicode(self.rt_system_id), 'status_code': r.status_code})
+            raise RealtimeProxyError('non 200 response')
+
+        timeo_resp = r.json()
+        st_responses = {}
+        for st_response in timeo_resp.get('StopTimesResponse') or []:
+            next_st = st_response.get('NextStopTimesMessage', {})
+            key = (st_response.get('StopTimeoCode'), next_st.get('LineTimeoCode'), next_st.get('Way'))
+            st_responses[key] = st_response
+
+        return [st_responses.get(self._get_timeo_codes(route_point)) for route_point in route_points]
+
     def _get_passages(self, timeo_resp, current_dt, line_uri=None):
         logging.getLogger(__name__).debug('timeo response: {}'.format(timeo_resp),
                                           extra={'rt_system_id': unicode(self.rt_system_id)})
@@ -173,7 +230,12 @@ class Timeo(RealtimeProxy):
 
         return next_passages
 
-    def _make_url(self, route_point, count=None, from_dt=None):
+    def _get_timeo_codes(self, route_point):
+        return (route_point.fetch_stop_id(self.object_id_tag),
+                route_point.fetch_line_id(self.object_id_tag),
+                route_point.fetch_route_id(self.object_id_tag))
+
+    def _make_stop_description(self, route_point, count=None, from_dt=None):
         """
         the route point identifier is set with the StopDescription argument
          this argument is split in 3 arguments (given between '?' and ';' symbol....)
@@ -184,15 +246,9 @@ class Timeo(RealtimeProxy):
          * NextStopTimeNumber: the number of next departure we want
          * StopTimeType: if we want base schedule data ('TH') or real time one ('TR')
 
-         Note: since there are some strange symbol ('?' and ';') in the url we can't use param as dict in
-         requests
+         several route points can be queried at once by concatenating their descriptions
          """
-
-        base_params = '&'.join([k + '=' + v for k, v in self.service_args.items()])
-
-        stop = route_point.fetch_stop_id(self.object_id_tag)
-        line = route_point.fetch_line_id(self.object_id_tag)
-        route = route_point.fetch_route_id(self.object_id_tag)
+        stop, line, route = self._get_timeo_codes(route_point)
 
         if not all((stop, line, route)):
             # one a the id is missing, we'll not find any realtime
@@ -213,24 +269,40 @@ class Timeo(RealtimeProxy):
 
         #We want to have StopTimeType as it make parsing of the request way easier
         #for alternative implementation of timeo since we can ignore this params
-        stop_id_url = ("StopDescription=?"
-                       "StopTimeType={data_freshness}"
-                       "&LineTimeoCode={line}"
-                       "&Way={route}"
-                       "&NextStopTimeNumber={count}"
-                       "&StopTimeoCode={stop}{dt};").format(stop=stop,
-                                                                 line=line,
-                                                                 route=route,
-                                                                 count=count,
-                                                                 data_freshness='TR',
-                                                                 dt=dt_param)
-
-        url = "{base_url}?{base_params}&{stop_id}".format(base_url=self.service_url,
-                                                          base_params=base_params,
-                                                          stop_id=stop_id_url)
+        return ("?StopTimeType={data_freshness}"
+                "&LineTimeoCode={line}"
+                "&Way={route}"
+                "&NextStopTimeNumber={count}"
+                "&StopTimeoCode={stop}{dt};").format(stop=stop,
+                                                     line=line,
+                                                     route=route,
+                                                     count=count,
+                                                     data_freshness='TR',
+                                                     dt=dt_param)
+
+    def _make_url_from_stop_descriptions(self, stop_descriptions):
+        """
+        Note: since there are some strange symbol ('?' and ';') in the url we can't use param as dict in
+        requests
+        """
+        if not stop_descriptions:
+            return None
+
+        base_params = '&'.join([k + '=' + v for k, v in self.service_args.items()])
+
+        url = "{base_url}?{base_params}&StopDescription={stop_descriptions}"\
+            .format(base_url=self.service_url,
+                    base_params=base_params,
+                    stop_descriptions=''.join(stop_descriptions))
 
         return url
 
+    def _make_url(self, route_point, count=None, from_dt=None):
+        stop_description = self._make_stop_description(route_point, count, from_dt)
+        if not stop_description:
+            return None
+        return self._make_url_from_stop_descriptions([stop_description])
+
     def _get_dt(self, hour_str, current_dt):
         hour = _to_duration(hour_str)
         # we then have to complete the hour with the date to have a datetime
@@ -28,15 +28,22 @@
 # www.navitia.io
 from __future__ import absolute_import
 from . import helper_future
-from navitiacommon import response_pb2
+from navitiacommon import response_pb2, type_pb2
 from collections import namedtuple
 from math import sqrt
 from .helper_utils import get_max_fallback_duration
 from jormungandr.street_network.street_network import StreetNetworkPathType
+from jormungandr.local_cache import LocalCache
+from jormungandr import app, utils
 import logging
 
 DurationElement = namedtuple('DurationElement', ['duration', 'status'])
 
+# The street network part of the fallback durations is shared between requests when it doesn't depend on the
+# datetime of the request. The instance's publication_date is part of the key, so a new data invalidates the cache.
+_street_network_durations_cache = LocalCache(app.config.get('FALLBACK_DURATIONS_CACHE_SIZE', 0),
+                                             app.config.get('FALLBACK_DURATIONS_CACHE_TTL', 300))
+
 
 class FallbackDurations:
     """
@@ -88,6 +95,85 @@ class FallbackDurations:
         }
         return map_response[resp.routing_status]
 
+    def _get_street_network_cache_key(self, center_isochrone):
+        """
+        The durations are cached only if they don't depend on the datetime, ie the street network service doesn't
+        put the period_extremity in its path key (here uses the departure time for the traffic for example)
+        """
+        sn_service = self._instance.get_street_network(self._mode, self._request)
+        if not sn_service:
+            return None
+        period_extremity = utils.PeriodExtremity(self._request['datetime'], self._request['clockwise'])
+        path_key = sn_service.make_path_key(self._mode, center_isochrone.uri, None, self._direct_path_type,
+                                            period_extremity)
+        if path_key is None or path_key.period_extremity is not None:
+            return None
+        return (self._instance.name,
+                self._instance.publication_date,
+                sn_service.sn_system_id,
+                sn_service.config_hash,
+                utils.get_uri_pt_object(center_isochrone),
+                self._mode,
+                self._request.get('{}_speed'.format(self._mode)),
+                self._direct_path_type)
+
+    def _compute_street_network_durations(self, center_isochrone, places_isochrone):
+        """
+        compute the durations from/to center_isochrone to/from each places_isochrone with the street network
+        :return: a dict of 'place uri' vs DurationElement, only the durations below max_duration_to_pt are kept
+        """
+        if self._direct_path_type == StreetNetworkPathType.BEGINNING_FALLBACK:
+            origins = [center_isochrone]
+            destinations = places_isochrone
+        else:
+            origins = places_isochrone
+            destinations = [center_isochrone]
+        sn_routing_matrix = self._instance.get_street_network_routing_matrix(origins,
+                                                                             destinations,
+                                                                             self._mode,
+                                                                             self._max_duration_to_pt,
+                                                                             self._request,
+                                                                             **self._speed_switcher)
+
+        if not len(sn_routing_matrix.rows) or not len(sn_routing_matrix.rows[0].routing_response):
+            logging.getLogger(__name__).debug("no fallback durations found from %s by %s",
+                                              self._requested_place_obj.uri, self._mode)
+            return {}
+
+        result = {}
+        for pos, r in enumerate(sn_routing_matrix.rows[0].routing_response):
+            if r.routing_status != response_pb2.unreached:
+                duration = self._get_duration(r, places_isochrone[pos])
+                if duration < self._max_duration_to_pt:
+                    result[places_isochrone[pos].uri] = DurationElement(duration, r.routing_status)
+        return result
+
+    def _get_street_network_durations(self, center_isochrone, places_isochrone):
+        """
+        get the street network durations from the cache if possible.
+
+        A cached entry can be used if it has been computed with a bigger max_duration_to_pt and for all the
+        places_isochrone (the free access places are not the same for every request), we only have to filter it
+        """
+        key = self._get_street_network_cache_key(center_isochrone)
+        if key is None:
+            return self._compute_street_network_durations(center_isochrone, places_isochrone)
+
+        cached = _street_network_durations_cache.get(key)
+        if cached is not None:
+            max_duration, computed_uris, durations = cached
+            if max_duration >= self._max_duration_to_pt and all(p.uri in computed_uris for p in places_isochrone):
+                logging.getLogger(__name__).debug("fallback durations from %s by %s found in cache",
+                                                  self._requested_place_obj.uri, self._mode)
+                return {p.uri: durations[p.uri] for p in places_isochrone
+                        if p.uri in durations and durations[p.uri].duration < self._max_duration_to_pt}
+
+        durations = self._compute_street_network_durations(center_isochrone, places_isochrone)
+        _street_network_durations_cache.set(key, (self._max_duration_to_pt,
+                                                  frozenset(p.uri for p in places_isochrone),
+                                                  durations))
+        return durations
+
     def _do_request(self):
         logger = logging.getLogger(__name__)
         logger.debug("requesting fallback durations from %s by %s", self._requested_place_obj.uri, self._mode)
@@ -127,33 +213,13 @@ class FallbackDurations:
             logger.debug("max_duration_to_pt equals to 0")
 
             # When max_duration_to_pt is 0, we can get on the public transport ONLY if the place is a stop_point
-            if self._instance.georef.get_stop_points_from_uri(center_isochrone.uri):
+            # the place has already been resolved, no need to ask kraken again
+            if center_isochrone.embedded_type == type_pb2.STOP_POINT:
                 return {center_isochrone.uri: DurationElement(0, response_pb2.reached)}
             else:
                 return result
 
-        if self._direct_path_type == StreetNetworkPathType.BEGINNING_FALLBACK:
-            origins = [center_isochrone]
-            destinations = places_isochrone
-        else:
-            origins = places_isochrone
-            destinations = [center_isochrone]
-        sn_routing_matrix = self._instance.get_street_network_routing_matrix(origins,
-                                                                             destinations,
-                                                                             self._mode,
-                                                                             self._max_duration_to_pt,
-                                                                             self._request,
-                                                                             **self._speed_switcher)
-
-        if not len(sn_routing_matrix.rows) or not len(sn_routing_matrix.rows[0].routing_response):
-            logger.debug("no fallback durations found from %s by %s", self._requested_place_obj.uri, self._mode)
-            return result
-
-        for pos, r in enumerate(sn_routing_matrix.rows[0].routing_response):
-            if r.routing_status != response_pb2.unreached:
-                duration = self._get_duration(r, places_isochrone[pos])
-                if duration < self._max_duration_to_pt:
-                    result.update({places_isochrone[pos].uri: DurationElement(duration, r.routing_status)})
+        result.update(self._get_street_network_durations(center_isochrone, places_isochrone))
 
         # We update the fallback duration matrix if the requested origin/destination is also
         # present in the fallback duration matrix, which means from stop_point_1 to itself, it takes 0 second
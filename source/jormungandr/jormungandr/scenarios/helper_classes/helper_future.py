@@ -29,7 +29,7 @@
 from __future__ import absolute_import
 import gevent
 import gevent.pool
-from jormungandr import app
+from jormungandr import app, tracing
 from contextlib import contextmanager
 # Using abc.ABCMeta in a way it is compatible both with Python 2.7 and Python 3.x
 # http://stackoverflow.com/a/38668373/1614576
@@ -66,7 +66,7 @@ class _AbstractPoolManager(ABC):
 
 class _GeventFuture(_AbstractFuture):
     def __init__(self, pool, fun, *args, **kwargs):
-        self._future = pool.spawn(fun, *args, **kwargs)
+        self._future = pool.spawn(tracing.bind(fun), *args, **kwargs)
 
     def get_future(self):
         return self._future
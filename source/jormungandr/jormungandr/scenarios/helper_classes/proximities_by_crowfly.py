@@ -29,9 +29,28 @@
 from __future__ import absolute_import
 from . import helper_future
 from jormungandr.street_network.street_network import StreetNetworkPathType
-from .helper_utils import get_max_fallback_duration
-from jormungandr import utils
+from .helper_utils import get_max_fallback_duration, crowfly_distance_between, N_DEG_TO_RAD, EARTH_RADIUS_IN_METERS
+from jormungandr.local_cache import LocalCache
+from jormungandr import app, utils
+from navitiacommon import type_pb2
 import logging
+import math
+
+# The crow fly proximities only depend on the coord of the origin and on the radius of the search, we can share them
+# between requests. The coord is rounded to CROW_FLY_CACHE_COORD_PRECISION decimals to be shared by close origins,
+# the instance's publication_date is part of the key, so a new data invalidates the cache.
+_crow_fly_cache = LocalCache(app.config.get('CROW_FLY_CACHE_SIZE', 0),
+                             app.config.get('CROW_FLY_CACHE_TTL', 300))
+
+
+def _get_snap_error(precision):
+    """
+    the max distance in meters between a coord and the coord rounded to 'precision' decimals
+
+    >>> round(_get_snap_error(4), 2)
+    7.86
+    """
+    return math.sqrt(2) * 0.5 * 10 ** -precision * EARTH_RADIUS_IN_METERS * N_DEG_TO_RAD
 
 
 class ProximitiesByCrowfly:
@@ -64,14 +83,13 @@ class ProximitiesByCrowfly:
             logger.debug("max duration equals to 0, no need to compute proximities by crowfly")
 
             # When max_duration_to_pt is 0, we can get on the public transport ONLY if the place is a stop_point
-            if self._instance.georef.get_stop_points_from_uri(self._requested_place_obj.uri):
+            # the place has already been resolved, no need to ask kraken again
+            if self._requested_place_obj.embedded_type == type_pb2.STOP_POINT:
                 return [self._requested_place_obj]
 
         coord = utils.get_pt_object_coord(self._requested_place_obj)
         if coord.lat and coord.lon:
-            crow_fly = self._instance.georef.get_crow_fly(utils.get_uri_pt_object(self._requested_place_obj),
-                                                          self._mode,  self._max_duration, self._max_nb_crowfly,
-                                                          **self._speed_switcher)
+            crow_fly = self._get_crow_fly(coord)
 
             logger.debug("finish proximities by crowfly from %s in %s", self._requested_place_obj.uri, self._mode)
             return crow_fly
@@ -79,6 +97,49 @@ class ProximitiesByCrowfly:
         logger.debug("the coord of requested places is not valid: %s", coord)
         return []
 
+    def _get_crow_fly(self, coord):
+        """
+        get the crow fly proximities from the cache if possible.
+
+        Kraken is queried from the rounded coord (the key of the cache) with a radius padded by the rounding error,
+        the distances are then computed from the requested coord and filtered on the radius.
+        An entry computed with a bigger radius can be used: kraken returns the nearest stop_points first, so even a
+        truncated entry (max_nb_crowfly reached) holds the right ones.
+        """
+        if _crow_fly_cache.max_size <= 0:
+            return self._instance.georef.get_crow_fly(utils.get_uri_pt_object(self._requested_place_obj),
+                                                      self._mode, self._max_duration, self._max_nb_crowfly,
+                                                      **self._speed_switcher)
+
+        precision = app.config.get('CROW_FLY_CACHE_COORD_PRECISION', 4)
+        lon, lat = round(coord.lon, precision), round(coord.lat, precision)
+        speed = self._speed_switcher.get(self._mode, self._speed_switcher.get('walking'))
+        radius = speed * self._max_duration
+        search_radius = radius + _get_snap_error(precision)
+        key = (self._instance.name, self._instance.publication_date, lon, lat, self._max_nb_crowfly)
+        cached = _crow_fly_cache.get(key)
+        if cached is not None and cached[0] >= search_radius:
+            logging.getLogger(__name__).debug("proximities by crowfly from %s in %s found in cache",
+                                              self._requested_place_obj.uri, self._mode)
+            crow_fly = cached[1]
+        else:
+            origin = '{lon:.{p}f};{lat:.{p}f}'.format(lon=lon, lat=lat, p=precision)
+            crow_fly = list(self._instance.georef.get_crow_fly(origin,
+                                                               self._mode, search_radius / speed,
+                                                               self._max_nb_crowfly, **self._speed_switcher))
+            _crow_fly_cache.set(key, (search_radius, crow_fly))
+
+        result = []
+        for p in crow_fly:
+            distance = crowfly_distance_between(coord, utils.get_pt_object_coord(p))
+            if distance <= radius:
+                # the cached objects are shared, we work on a copy
+                place = type_pb2.PtObject()
+                place.CopyFrom(p)
+                place.distance = int(distance)
+                result.append(place)
+        return result
+
     def _async_request(self):
         self._value = self._future_manager.create_future(self._do_request)
 
@@ -28,15 +28,26 @@
 # www.navitia.io
 from __future__ import absolute_import
 from . import helper_future
-from jormungandr import utils
+from .helper_utils import _align_fallback_direct_path_datetime
+from jormungandr import utils, cache, app
 from jormungandr.street_network.street_network import StreetNetworkPathType
+from navitiacommon import response_pb2
+import hashlib
 import logging
+import six
+
+# the request parameters the street network services use to compute a direct path
+_DIRECT_PATH_PARAMS = ('walking_speed', 'bike_speed', 'bss_speed', 'car_speed',
+                       'max_walking_duration_to_pt', 'max_bike_duration_to_pt',
+                       'max_bss_duration_to_pt', 'max_car_duration_to_pt')
+
 
 class StreetNetworkPath:
     """
     A StreetNetworkPath is a journey from orig_obj to dest_obj purely in street network(without any pt)
     """
-    def __init__(self, future_manager, instance, orig_obj, dest_obj, mode, fallback_extremity, request, streetnetwork_path_type):
+    def __init__(self, future_manager, instance, orig_obj, dest_obj, mode, fallback_extremity, request,
+                 streetnetwork_path_type, cache_key=None):
         """
         :param future_manager: a module that manages the future pool properly
         :param instance: instance of the coverage, all outside services callings pass through it(street network,
@@ -47,6 +58,8 @@ class StreetNetworkPath:
         :param fallback_extremity: departure after datetime or arrival after datetime
         :param request: original user request
         :param streetnetwork_path_type: street network path's type
+        :param cache_key: key of the direct path in the cache shared by all the requests, None if it can't be
+                          shared (when the direct path depends on the datetime)
         """
         self._future_manager = future_manager
         self._instance = instance
@@ -56,18 +69,53 @@ class StreetNetworkPath:
         self._fallback_extremity = fallback_extremity
         self._request = request
         self._path_type = streetnetwork_path_type
+        self._cache_key = cache_key
         self._value = None
 
         self._async_request()
 
+    def _get_cached_direct_path(self):
+        """
+        the cached direct path has been computed for another datetime, its datetimes are aligned on the
+        requested fallback_extremity
+        """
+        try:
+            payload = cache.get(self._cache_key)
+        except Exception as e:
+            logging.getLogger(__name__).exception('impossible to get the direct path from the cache: %s', e)
+            return None
+        if payload is None:
+            return None
+        dp = response_pb2.Response()
+        dp.ParseFromString(payload)
+        return _align_fallback_direct_path_datetime(dp, self._fallback_extremity)
+
+    def _set_cached_direct_path(self, dp):
+        # only the valid direct paths are kept, we don't want to keep a technical error
+        if not getattr(dp, "journeys", None):
+            return
+        try:
+            cache.set(self._cache_key, dp.SerializeToString(),
+                      timeout=app.config['CACHE_CONFIGURATION'].get('TIMEOUT_DIRECT_PATH', 3600))
+        except Exception as e:
+            logging.getLogger(__name__).exception('impossible to put the direct path in the cache: %s', e)
+
     def _do_request(self):
         logger = logging.getLogger(__name__)
         logger.debug("requesting %s direct path from %s to %s by %s", self._path_type,
                      self._orig_obj.uri, self._dest_obj.uri, self._mode)
 
-        dp = self._instance.direct_path_with_fp(self._mode, self._orig_obj, self._dest_obj,
-                                                self._fallback_extremity, self._request,
-                                                self._path_type)
+        dp = self._get_cached_direct_path() if self._cache_key else None
+        if dp is not None:
+            logger.debug("%s direct path from %s to %s by %s found in cache", self._path_type,
+                         self._orig_obj.uri, self._dest_obj.uri, self._mode)
+        else:
+            dp = self._instance.direct_path_with_fp(self._mode, self._orig_obj, self._dest_obj,
+                                                    self._fallback_extremity, self._request,
+                                                    self._path_type)
+            if self._cache_key:
+                self._set_cached_direct_path(dp)
+
         if getattr(dp, "journeys", None):
             dp.journeys[0].internal_id = str(utils.generate_id())
 
@@ -111,7 +159,28 @@ class StreetNetworkPathPool:
         if key in self._value:
             return
         self._value[key] = StreetNetworkPath(self._future_manager, streetnetwork_service, requested_orig_obj, requested_dest_obj, mode,
-                                             period_extremity, request, streetnetwork_path_type)
+                                             period_extremity, request, streetnetwork_path_type,
+                                             self._make_cache_key(streetnetwork_service, key, request))
+
+    def _make_cache_key(self, streetnetwork_service, key, request):
+        """
+        The direct paths are shared between the requests (and the workers) through the cache only if they
+        don't depend on the datetime, ie the street network service doesn't put the period_extremity in the key.
+        They depend on the data (publication_date) and on the configuration of the street network service.
+
+        The key is hashed as some cache backends don't accept long keys or keys with spaces
+        """
+        if key is None or key.period_extremity is not None:
+            return None
+        raw_key = (self._instance.name,
+                   self._instance.publication_date,
+                   streetnetwork_service.sn_system_id,
+                   streetnetwork_service.config_hash,
+                   key.mode,
+                   key.orig_uri,
+                   key.dest_uri,
+                   key.streetnetwork_path_type) + tuple(request.get(p) for p in _DIRECT_PATH_PARAMS)
+        return 'direct_path_{}'.format(hashlib.md5(six.text_type(raw_key).encode('utf-8')).hexdigest())
 
     def get_all_direct_paths(self):
         """
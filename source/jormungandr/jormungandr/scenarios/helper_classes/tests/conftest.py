@@ -0,0 +1,158 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+"""
+the fakes shared by the tests of the helpers caching the answers of kraken or of the street network services
+
+their cache depends on the data of the instance (publication_date) and on the configuration of the street network
+service (config_hash)
+"""
+from __future__ import absolute_import, print_function, unicode_literals, division
+from navitiacommon import response_pb2
+from jormungandr.scenarios.helper_classes.helper_future import FutureManager
+from jormungandr.street_network.street_network import StreetNetworkPathKey
+from jormungandr.local_cache import LocalCache
+import pytest
+
+
+class FakeStreetNetworkService(object):
+    sn_system_id = 'fake'
+    config_hash = 'fake_config'
+
+    def __init__(self):
+        self.nb_calls = 0
+        self.period_extremity_in_key = False
+        # the durations of the routing matrix by destination uri
+        self.durations = {}
+
+    def make_path_key(self, mode, orig_uri, dest_uri, streetnetwork_path_type, period_extremity):
+        return StreetNetworkPathKey(mode, orig_uri, dest_uri, streetnetwork_path_type,
+                                    period_extremity if self.period_extremity_in_key else None)
+
+    def direct_path_with_fp(self, mode, orig_obj, dest_obj, fallback_extremity, request, direct_path_type):
+        self.nb_calls += 1
+        resp = response_pb2.Response()
+        journey = resp.journeys.add()
+        journey.duration = 60
+        journey.departure_date_time = fallback_extremity.datetime
+        journey.arrival_date_time = fallback_extremity.datetime + 60
+        section = journey.sections.add()
+        section.begin_date_time = fallback_extremity.datetime
+        section.end_date_time = fallback_extremity.datetime + 60
+        return resp
+
+    def get_street_network_routing_matrix(self, origins, destinations, mode, max_duration, request, **kwargs):
+        self.nb_calls += 1
+        sn_routing_matrix = response_pb2.StreetNetworkRoutingMatrix()
+        row = sn_routing_matrix.rows.add()
+        for destination in destinations:
+            routing = row.routing_response.add()
+            duration = self.durations[destination.uri]
+            routing.duration = duration
+            routing.routing_status = response_pb2.reached if duration <= max_duration else response_pb2.unreached
+        return sn_routing_matrix
+
+
+class FakeInstance(object):
+    name = 'fake_instance'
+    publication_date = 42
+    walking_speed = 1
+    bike_speed = 4
+    car_speed = 10
+    bss_speed = 4
+
+    def __init__(self, street_network_service):
+        self.street_network_service = street_network_service
+        self.georef = None
+
+    def get_street_network(self, mode, request):
+        return self.street_network_service
+
+    def get_street_network_routing_matrix(self, origins, destinations, mode, max_duration_to_pt, request, **kwargs):
+        return self.street_network_service.get_street_network_routing_matrix(origins, destinations, mode,
+                                                                             max_duration_to_pt, request, **kwargs)
+
+
+class FakeCache(LocalCache):
+    """
+    a LocalCache that can also replace the flask cache, the timeout of an entry is the ttl of the cache
+    """
+    def set(self, key, value, timeout=None):
+        super(FakeCache, self).set(key, value)
+
+
+@pytest.fixture
+def sn_service():
+    return FakeStreetNetworkService()
+
+
+@pytest.fixture
+def instance(sn_service):
+    return FakeInstance(sn_service)
+
+
+@pytest.fixture
+def future_manager():
+    with FutureManager() as future_manager:
+        yield future_manager
+
+
+@pytest.fixture
+def use_cache(monkeypatch):
+    """
+    replace the cache of a helper module by an empty one: use_cache(module, 'name_of_the_cache')
+    """
+    def use(module, name):
+        cache = FakeCache(10, 300)
+        monkeypatch.setattr(module, name, cache)
+        return cache
+    return use
+
+
+@pytest.fixture
+def check_cache_invalidation(instance):
+    """
+    check that a new data publication, and a new configuration of the street network service if the cache depends
+    on it, invalidate the cache: check_cache_invalidation(query, get_nb_calls, depends_on_sn_config=True)
+
+    query() must be answered by the cache when it's called
+    """
+    def check(query, get_nb_calls, depends_on_sn_config=True):
+        nb_calls = get_nb_calls()
+        query()
+        assert get_nb_calls() == nb_calls
+
+        instance.publication_date = 43
+        query()
+        assert get_nb_calls() == nb_calls + 1
+
+        instance.street_network_service.config_hash = 'other_config'
+        query()
+        assert get_nb_calls() == nb_calls + (2 if depends_on_sn_config else 1)
+    return check
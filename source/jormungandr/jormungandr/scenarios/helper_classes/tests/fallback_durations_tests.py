@@ -0,0 +1,96 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from navitiacommon import type_pb2
+from jormungandr.scenarios.helper_classes import fallback_durations
+from collections import namedtuple
+from flask_restful.reqparse import Namespace
+import pytest
+
+FreeAccess = namedtuple('FreeAccess', ['crowfly', 'odt', 'free_radius'])
+
+
+class FakePool(object):
+    def __init__(self, value):
+        self.value = value
+
+    def wait_and_get(self, *args):
+        return self.value
+
+
+@pytest.fixture
+def durations_cache(use_cache):
+    return use_cache(fallback_durations, '_street_network_durations_cache')
+
+
+def make_place(uri, distance=0):
+    return type_pb2.PtObject(uri=uri, distance=distance)
+
+
+def get_fallback_durations(future_manager, instance, max_duration_to_pt, datetime=1000):
+    request = Namespace(datetime=datetime, clockwise=True, free_radius_from=None, walking_speed=1.12)
+    durations = instance.street_network_service.durations
+    proximities = FakePool([make_place(uri) for uri in sorted(durations)])
+    free_access = FakePool(FreeAccess(set(), set(), set()))
+    fallback = fallback_durations.FallbackDurations(future_manager, instance, make_place('orig'), 'walking',
+                                                    proximities, free_access, max_duration_to_pt, request,
+                                                    {'walking': 1.12})
+    return {uri: d.duration for uri, d in fallback.wait_and_get().items()}
+
+
+def fallback_durations_cache_test(future_manager, instance, sn_service, durations_cache, check_cache_invalidation):
+    sn_service.durations = {'sp_a': 60, 'sp_b': 300, 'sp_c': 900}
+
+    assert get_fallback_durations(future_manager, instance, 1000) == {'sp_a': 60, 'sp_b': 300, 'sp_c': 900}
+    assert sn_service.nb_calls == 1
+
+    # same request, at another datetime: the durations are found in the cache
+    assert get_fallback_durations(future_manager, instance, 1000, datetime=5000) == {'sp_a': 60, 'sp_b': 300,
+                                                                                      'sp_c': 900}
+    assert sn_service.nb_calls == 1
+
+    # the entry computed with a bigger max_duration_to_pt is filtered for a smaller one
+    assert get_fallback_durations(future_manager, instance, 500) == {'sp_a': 60, 'sp_b': 300}
+    assert sn_service.nb_calls == 1
+
+    # but it's computed again for a bigger one
+    assert get_fallback_durations(future_manager, instance, 2000) == {'sp_a': 60, 'sp_b': 300, 'sp_c': 900}
+    assert sn_service.nb_calls == 2
+
+    check_cache_invalidation(lambda: get_fallback_durations(future_manager, instance, 2000),
+                             lambda: sn_service.nb_calls)
+
+
+def fallback_durations_depending_on_datetime_not_cached_test(future_manager, instance, sn_service, durations_cache):
+    sn_service.durations = {'sp_a': 60}
+    sn_service.period_extremity_in_key = True
+
+    get_fallback_durations(future_manager, instance, 1000)
+    get_fallback_durations(future_manager, instance, 1000)
+    assert sn_service.nb_calls == 2
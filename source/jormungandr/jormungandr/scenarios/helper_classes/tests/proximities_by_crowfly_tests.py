@@ -0,0 +1,108 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from navitiacommon import type_pb2
+from jormungandr.scenarios.helper_classes import proximities_by_crowfly
+from jormungandr.scenarios.helper_classes.helper_utils import crowfly_distance_between
+from collections import namedtuple
+import pytest
+
+Coord = namedtuple('Coord', ['lon', 'lat'])
+
+ORIGIN = Coord(2.37716, 48.84684)
+
+
+def make_stop_point(uri, lon, lat):
+    place = type_pb2.PtObject(uri=uri, embedded_type=type_pb2.STOP_POINT)
+    place.stop_point.uri = uri
+    place.stop_point.coord.lon = lon
+    place.stop_point.coord.lat = lat
+    return place
+
+
+class FakeGeoref(object):
+    def __init__(self):
+        self.stop_points = [make_stop_point('sp_origin', ORIGIN.lon, ORIGIN.lat),
+                            make_stop_point('sp_100m', ORIGIN.lon, ORIGIN.lat + 0.001),
+                            make_stop_point('sp_450m', ORIGIN.lon, ORIGIN.lat + 0.004)]
+        self.calls = []
+
+    def get_crow_fly(self, origin, streetnetwork_mode, max_duration, max_nb_crowfly, **kwargs):
+        self.calls.append(origin)
+        lon, lat = (float(c) for c in origin.split(';'))
+        radius = kwargs.get(streetnetwork_mode) * max_duration
+        res = []
+        for sp in self.stop_points:
+            distance = crowfly_distance_between(Coord(lon, lat), sp.stop_point.coord)
+            if distance <= radius:
+                place = type_pb2.PtObject()
+                place.CopyFrom(sp)
+                place.distance = int(distance)
+                res.append(place)
+        return sorted(res, key=lambda p: p.distance)[:max_nb_crowfly]
+
+
+@pytest.fixture
+def georef(instance, use_cache):
+    use_cache(proximities_by_crowfly, '_crow_fly_cache')
+    instance.georef = FakeGeoref()
+    return instance.georef
+
+
+def get_crow_fly(future_manager, instance, max_duration, mode='walking'):
+    place = type_pb2.PtObject(uri='origin', embedded_type=type_pb2.ADDRESS)
+    place.address.coord.lon = ORIGIN.lon
+    place.address.coord.lat = ORIGIN.lat
+    proximities = proximities_by_crowfly.ProximitiesByCrowfly(future_manager, instance, place, mode, max_duration)
+    return {p.uri: p.distance for p in proximities.wait_and_get()}
+
+
+def crow_fly_cache_test(future_manager, instance, georef, check_cache_invalidation):
+    # kraken is queried from the rounded coord, but the distances are from the requested one
+    assert get_crow_fly(future_manager, instance, 500) == {'sp_origin': 0, 'sp_100m': 111, 'sp_450m': 444}
+    assert georef.calls == ['2.3772;48.8468']
+
+    # the entry computed with a bigger radius is filtered for a smaller one
+    assert get_crow_fly(future_manager, instance, 200) == {'sp_origin': 0, 'sp_100m': 111}
+    assert get_crow_fly(future_manager, instance, 50, mode='bike') == {'sp_origin': 0, 'sp_100m': 111}
+    assert len(georef.calls) == 1
+
+    # but a bigger radius needs a new search
+    assert get_crow_fly(future_manager, instance, 200, mode='bike') == {'sp_origin': 0, 'sp_100m': 111,
+                                                                         'sp_450m': 444}
+    assert len(georef.calls) == 2
+
+    # the crow fly is computed by kraken, it does not depend on the street network service
+    check_cache_invalidation(lambda: get_crow_fly(future_manager, instance, 200), lambda: len(georef.calls),
+                             depends_on_sn_config=False)
+
+
+def crow_fly_cache_null_radius_test(future_manager, instance, georef):
+    # the search is padded by the rounding error, only the places at the requested coord are kept
+    assert get_crow_fly(future_manager, instance, 0) == {'sp_origin': 0}
@@ -0,0 +1,79 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from navitiacommon import type_pb2
+from jormungandr.scenarios.helper_classes import streetnetwork_path
+from jormungandr.street_network.street_network import StreetNetworkPathType
+from jormungandr.utils import PeriodExtremity
+import pytest
+
+
+@pytest.fixture
+def direct_path_cache(use_cache):
+    return use_cache(streetnetwork_path, 'cache')
+
+
+def get_direct_path(future_manager, instance, period_extremity, request):
+    orig = type_pb2.PtObject(uri='orig')
+    dest = type_pb2.PtObject(uri='dest')
+    pool = streetnetwork_path.StreetNetworkPathPool(future_manager, instance)
+    pool.add_async_request(orig, dest, 'walking', period_extremity, request, StreetNetworkPathType.DIRECT)
+    return pool.wait_and_get(orig, dest, 'walking', period_extremity, StreetNetworkPathType.DIRECT, request)
+
+
+def direct_path_shared_between_requests_test(future_manager, instance, sn_service, direct_path_cache,
+                                             check_cache_invalidation):
+    request = {'walking_speed': 1.12}
+
+    get_direct_path(future_manager, instance, PeriodExtremity(1000, True), request)
+    assert sn_service.nb_calls == 1
+
+    # the cached direct path is realigned on the new datetime
+    dp = get_direct_path(future_manager, instance, PeriodExtremity(5000, False), request)
+    assert sn_service.nb_calls == 1
+    journey = dp.journeys[0]
+    assert journey.departure_date_time == 4940
+    assert journey.arrival_date_time == 5000
+    assert journey.sections[0].begin_date_time == 4940
+    assert journey.sections[0].end_date_time == 5000
+
+    # another speed is another direct path
+    get_direct_path(future_manager, instance, PeriodExtremity(1000, True), {'walking_speed': 2})
+    assert sn_service.nb_calls == 2
+
+    check_cache_invalidation(lambda: get_direct_path(future_manager, instance, PeriodExtremity(1000, True), request),
+                             lambda: sn_service.nb_calls)
+
+
+def direct_path_depending_on_datetime_not_shared_test(future_manager, instance, sn_service, direct_path_cache):
+    sn_service.period_extremity_in_key = True
+
+    get_direct_path(future_manager, instance, PeriodExtremity(1000, True), {})
+    get_direct_path(future_manager, instance, PeriodExtremity(1000, True), {})
+    assert sn_service.nb_calls == 2
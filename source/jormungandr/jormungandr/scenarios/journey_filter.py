@@ -29,6 +29,7 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
 import logging
 import itertools
+import collections
 from functools import partial
 import datetime
 from jormungandr.scenarios.utils import compare, get_pseudo_duration, get_or_default, mode_weight
@@ -98,7 +99,7 @@ def final_filter_journeys(response_list, instance, request):
     final_line_filter = get_or_default(request, '_final_line_filter', False)
     if final_line_filter:
         journeys = get_qualified_journeys(response_list)
-        journeys_pool = itertools.combinations(journeys, 2)
+        journeys_pool = get_similar_journeys_pool(journeys, [], similar_journeys_line_generator)
         _filter_similar_line_journeys(journeys_pool, request)
 
     journeys = get_qualified_journeys(response_list)
@@ -181,6 +182,33 @@ def _filter_similar_line_journeys(journeys, request):
     _filter_similar_journeys(journeys, request, similar_journeys_line_generator)
 
 
+def get_similar_journeys_pool(new_journeys, other_journeys, similar_journey_generator):
+    """
+    Build the pairs of journeys to compare to find the similar journeys: the new journeys are compared 2 by 2, then
+    each new journey is compared with the other journeys
+
+    It gives the same similar pairs, in the same order, as
+    itertools.chain(itertools.combinations(new_journeys, 2), itertools.product(new_journeys, other_journeys))
+    but the journeys are first grouped by their signature (all the values of the similar_journey_generator) so only
+    the journeys with the same signature are paired.
+
+    Note: the given journeys are consumed right away
+    """
+    def group_by_signature(journeys):
+        groups = collections.defaultdict(list)
+        for j in journeys:
+            groups[tuple(similar_journey_generator(j))].append(j)
+        return groups
+
+    new_groups = group_by_signature(new_journeys)
+    other_groups = group_by_signature(other_journeys)
+
+    return itertools.chain.from_iterable(
+        itertools.chain(itertools.combinations(journeys, 2), itertools.product(journeys, other_groups.get(sig, [])))
+        for sig, journeys in new_groups.items()
+    )
+
+
 def _filter_similar_journeys(journeys_pool, request, similar_journey_generator):
     """
     we filter similar journeys
@@ -36,7 +36,7 @@ from flask import g
 from jormungandr.scenarios import simple, journey_filter, helpers
 from jormungandr.scenarios.ridesharing.ridesharing_helper import decorate_journeys
 from jormungandr.scenarios.utils import journey_sorter, change_ids, updated_request_with_default, \
-    get_or_default, fill_uris, gen_all_combin, get_pseudo_duration, mode_weight
+    get_or_default, fill_uris, get_pseudo_duration, mode_weight
 from navitiacommon import type_pb2, response_pb2, request_pb2
 from jormungandr.scenarios.qualifier import min_from_criteria, arrival_crit, departure_crit, \
     duration_crit, transfers_crit, nonTC_crit, trip_carac, has_no_car, has_car, has_pt, \
@@ -47,7 +47,7 @@ from jormungandr.utils import date_to_timestamp, PeriodExtremity, copy_flask_req
 from jormungandr.scenarios.simple import get_pb_data_freshness
 import gevent, gevent.pool
 import flask
-from jormungandr import app
+from jormungandr import app, tracing
 from jormungandr.autocomplete.geocodejson import GeocodeJson
 from jormungandr import global_autocomplete
 from six.moves import filter
@@ -57,6 +57,8 @@ from six.moves import zip
 SECTION_TYPES_TO_RETAIN = {response_pb2.PUBLIC_TRANSPORT, response_pb2.STREET_NETWORK}
 JOURNEY_TYPES_TO_RETAIN = ['best', 'comfort', 'non_pt_walk', 'non_pt_bike', 'non_pt_bss']
 STREET_NETWORK_MODE_TO_RETAIN = {response_pb2.Ridesharing, response_pb2.Car, response_pb2.Bike, response_pb2.Bss}
+# max number of combinations visited when culling the journeys, to bound the cpu time of a request
+CULLING_MAX_NB_SEARCH_NODES = app.config.get('CULLING_MAX_NB_SEARCH_NODES', 100000)
 
 
 def get_kraken_calls(request):
@@ -314,77 +316,130 @@ def _build_selected_sections_matrix(sections_set, candidates_pool):
     return np.array(selected_sections_matrix)
 
 
-def _get_sorted_solutions_indexes(selected_sections_matrix, nb_journeys_to_find, idx_of_jrny_must_keep):
-    """
-    The entry is a 2D array where its lines are journeys, its columns are (non) chosen sections
-    """
-    logger = logging.getLogger(__name__)
-    """
-    Get a matrix which illustrate all possible non ordered combinations of t elements from n elements where n >= t with
-    their indexes.
-
-    Let's say we'd like to find all combinations of 2 elements from a set of 3.
+def _nb_bits(mask):
+    return bin(mask).count(str('1'))
 
-    selected_journeys_matrix will be like:
 
-    [[0,1]
-     [0,2]
-     [1,2]]
+def _smallest_sums_of_prefixes(values, max_nb_values):
     """
-    selected_journeys_matrix = np.array(list(gen_all_combin(selected_sections_matrix.shape[0], nb_journeys_to_find)))
+    for each prefix of values, compute the sum of its c smallest values for c in [0, max_nb_values]
 
+    >>> _smallest_sums_of_prefixes([3, 1, 2], 2)
+    [[0], [0, 3], [0, 1, 4], [0, 1, 3]]
     """
-    We should cut out those combinations that don't contain must-keep journeys
+    res = [[0]]
+    prefix = []
+    for v in values:
+        prefix.append(v)
+        smallest = sorted(prefix)[:max_nb_values]
+        res.append([sum(smallest[:c]) for c in range(len(smallest) + 1)])
+    return res
+
+
+def _get_best_combination(selected_sections_matrix, nb_journeys_to_find, idx_of_jrny_must_keep, pseudo_durations,
+                          max_nb_nodes=CULLING_MAX_NB_SEARCH_NODES):
     """
-    def _contains(idx_selected_jrny):
-        return set(idx_selected_jrny).issuperset(idx_of_jrny_must_keep)
+    The entry is a 2D array where its lines are journeys, its columns are (non) chosen sections
 
-    selected_journeys_matrix = selected_journeys_matrix[np.apply_along_axis(_contains, 1, selected_journeys_matrix)]
+    Find the combination of nb_journeys_to_find journeys, containing all the must-keep journeys, that:
+     - covers as many sections as possible
+     - then has as few sections as possible (less transfers to do)
+     - then has the smallest sum of pseudo durations
 
-    selection_matrix = np.zeros((selected_journeys_matrix.shape[0], selected_sections_matrix.shape[0]))
+    Among equivalent combinations, the first one in colex order (the order of gen_all_combin) is chosen.
 
-    """
-    Given  selected_journeys_matrix:
-    [[0,1]
-     [0,2]
-     [1,2]]
-
-    selection_matrix will be like:
-    [[1,1,0], -> the first one and the second are chosen, etc...
-     [1,0,1],
-     [0,1,1]]
-    """
-    # http://stackoverflow.com/questions/20103779/index-2d-numpy-array-by-a-2d-array-of-indices-without-loops
-    selection_matrix[np.arange(selected_journeys_matrix.shape[0])[:, None], selected_journeys_matrix] = 1
+    Instead of enumerating all the C(n, k) combinations, we do a depth first search in colex order (the biggest
+    index is chosen first) with a branch and bound:
+    the sections are stored as bit masks and for each sub-tree we compute a lower bound of its best score with the
+    sections that can still be covered and the smallest numbers of sections and pseudo durations left.
+    The search starts with the score of a greedy solution, so most of the sub-trees are cut early.
 
-    res_pool = np.dot(selection_matrix, selected_sections_matrix)
+    If the search visits more than max_nb_nodes nodes, the best combination found so far is returned.
 
+    :return: the sorted list of the indexes of the chosen journeys
     """
-    Get number of sections(or tranfers) for every solution
-    """
-    nb_sections = np.sum(res_pool, axis=1)
+    logger = logging.getLogger(__name__)
 
-    """
-    integrity shows at which point a solution(chosen journeys) covers sections.
-    0 means a solution covers all sections
-    1 means a solutions covers almost all sections but 1 is missing
-    2 means 2 sections are missing
-    .... etc
-    """
-    integrity = res_pool.shape[1] - np.array([np.count_nonzero(r) for r in res_pool])
+    must_keep = set(idx_of_jrny_must_keep)
+    masks = [sum(1 << int(s) for s in np.flatnonzero(row)) for row in selected_sections_matrix]
+    nb_sections = [int(n) for n in np.sum(selected_sections_matrix, axis=1)]
+    all_sections = (1 << selected_sections_matrix.shape[1]) - 1
+
+    candidates = [i for i in range(selected_sections_matrix.shape[0]) if i not in must_keep]
+    nb_to_choose = nb_journeys_to_find - len(must_keep)
+
+    must_keep_covered = 0
+    for i in must_keep:
+        must_keep_covered |= masks[i]
+    must_keep_sections = sum(nb_sections[i] for i in must_keep)
+    must_keep_pseudo_duration = sum(pseudo_durations[i] for i in must_keep)
+
+    def _score(covered, sections, pseudo_duration):
+        # integrity: the number of sections not covered
+        return _nb_bits(all_sections & ~covered), sections, pseudo_duration
+
+    # the greedy solution: we choose the journey covering the more new sections with as few sections as possible
+    greedy = []
+    greedy_covered, greedy_sections, greedy_pseudo_duration = \
+        must_keep_covered, must_keep_sections, must_keep_pseudo_duration
+    for _ in range(nb_to_choose):
+        i = min((c for c in candidates if c not in greedy),
+                key=lambda c: (-_nb_bits(masks[c] & ~greedy_covered), nb_sections[c], pseudo_durations[c], c))
+        greedy.append(i)
+        greedy_covered |= masks[i]
+        greedy_sections += nb_sections[i]
+        greedy_pseudo_duration += pseudo_durations[i]
+
+    # prefix_coverage[p] is all the sections covered by candidates[0:p]
+    prefix_coverage = [0]
+    for c in candidates:
+        prefix_coverage.append(prefix_coverage[-1] | masks[c])
+    smallest_sections = _smallest_sums_of_prefixes([nb_sections[c] for c in candidates], nb_to_choose)
+    smallest_pseudo_durations = _smallest_sums_of_prefixes([pseudo_durations[c] for c in candidates], nb_to_choose)
+
+    best = {'score': _score(greedy_covered, greedy_sections, greedy_pseudo_duration),
+            'combination': greedy,
+            'found_by_search': False,
+            'nb_nodes': 0}
+
+    def _is_worse(score):
+        # the greedy combination has not been found in colex order, an equivalent combination may come before it
+        return score > best['score'] or (score == best['score'] and best['found_by_search'])
+
+    def _search(nb_left, pos_limit, chosen, covered, sections, pseudo_duration):
+        if nb_left == 0:
+            score = _score(covered, sections, pseudo_duration)
+            if not _is_worse(score):
+                best.update(score=score, combination=list(chosen), found_by_search=True)
+            return
+        # the chosen candidate is the biggest one of the remaining choices, so there must be enough candidates below
+        for pos in range(nb_left - 1, pos_limit):
+            if best['nb_nodes'] >= max_nb_nodes:
+                return
+            best['nb_nodes'] += 1
+            c = candidates[pos]
+            new_covered = covered | masks[c]
+            new_sections = sections + nb_sections[c]
+            new_pseudo_duration = pseudo_duration + pseudo_durations[c]
+            lower_bound = (_nb_bits(all_sections & ~(new_covered | prefix_coverage[pos])),
+                           new_sections + smallest_sections[pos][nb_left - 1],
+                           new_pseudo_duration + smallest_pseudo_durations[pos][nb_left - 1])
+            if _is_worse(lower_bound):
+                continue
+            chosen.append(c)
+            _search(nb_left - 1, pos, chosen, new_covered, new_sections, new_pseudo_duration)
+            chosen.pop()
 
-    """
-    We want to find the solutions covers as many sections as possible which has less sections(less transfer to do)
-    """
-    the_best_idx = np.lexsort((nb_sections, integrity))[0]  # sort by integrity then by nb_sections
+    _search(nb_to_choose, len(candidates), [], must_keep_covered, must_keep_sections, must_keep_pseudo_duration)
 
-    best_indexes = np.where(np.logical_and(nb_sections == nb_sections[the_best_idx],
-                                           integrity == integrity[the_best_idx]))[0]
+    if best['nb_nodes'] >= max_nb_nodes:
+        logger.warning('culling journeys: search stopped after {} nodes, '
+                       'the chosen combination may not be the best one'.format(best['nb_nodes']))
 
-    logger.debug("Best Itegrity: {0}".format(integrity[the_best_idx]))
-    logger.debug("Best Nb sections: {0}".format(nb_sections[the_best_idx]))
+    logger.debug("Best Itegrity: {0}".format(best['score'][0]))
+    logger.debug("Best Nb sections: {0}".format(best['score'][1]))
 
-    return best_indexes, selection_matrix
+    return sorted(must_keep.union(best['combination']))
 
 
 def culling_journeys(resp, request):
@@ -493,32 +548,18 @@ def culling_journeys(resp, request):
     """
     selected_sections_matrix = _build_selected_sections_matrix(sections_set, candidates_pool)
 
-    best_indexes, selection_matrix = _get_sorted_solutions_indexes(selected_sections_matrix,
-                                                                   nb_journeys_to_find,
-                                                                   idx_of_jrnys_must_keep)
+    pseudo_durations = [get_pseudo_duration(jrny, request['datetime'], request.get('clockwise', True))
+                        for jrny in candidates_pool]
 
-    logger.debug("Nb best solutions: {0}".format(best_indexes.shape[0]))
-
-    the_best_index = best_indexes[0]
-
-    logger.debug("Trying to find the best of best")
-    """
-    Let's find the best of best :)
-    """
-    # If there're several solutions which have the same score of integrity and nb_sections
-    if best_indexes.shape[0] != 1:
-        requested_dt = request['datetime']
-        is_clockwise = request.get('clockwise', True)
-
-        def combinations_sorter(v):
-            # Hoping to find We sort the solution by the sum of journeys' pseudo duration
-            return np.sum((get_pseudo_duration(jrny, requested_dt, is_clockwise)
-                           for jrny in np.array(candidates_pool)[np.where(selection_matrix[v, :])]))
-        the_best_index = min(best_indexes, key=combinations_sorter)
+    best_combination = set(_get_best_combination(selected_sections_matrix,
+                                                 nb_journeys_to_find,
+                                                 idx_of_jrnys_must_keep,
+                                                 pseudo_durations))
 
     logger.debug('Removing non selected journeys')
-    for jrny in candidates_pool[np.where(selection_matrix[the_best_index, :] == 0)]:
-        journey_filter.mark_as_dead(jrny, is_debug, 'Filtered by max_nb_journeys')
+    for i, jrny in enumerate(candidates_pool):
+        if i not in best_combination:
+            journey_filter.mark_as_dead(jrny, is_debug, 'Filtered by max_nb_journeys')
 
     journey_filter.delete_journeys((resp,), request)
 
@@ -782,6 +823,7 @@ class Scenario(simple.Scenario):
         super(Scenario, self).__init__()
         self.nb_kraken_calls = 0
 
+    @tracing.traced('scenario.fill_journeys')
     def fill_journeys(self, request_type, api_request, instance):
         logger = logging.getLogger(__name__)
 
@@ -818,7 +860,8 @@ class Scenario(simple.Scenario):
                  or nb_try < min_journeys_calls):
             nb_try = nb_try + 1
 
-            new_resp = self.call_kraken(request_type, request, instance, krakens_call)
+            with tracing.span('scenario.call_kraken'):
+                new_resp = self.call_kraken(request_type, request, instance, krakens_call)
             _tag_by_mode(new_resp)
             _tag_direct_path(new_resp)
             _tag_bike_in_pt(new_resp)
@@ -835,29 +878,20 @@ class Scenario(simple.Scenario):
             # note that filter_journeys returns a generator which will be evaluated later
             filtered_new_resp = journey_filter.filter_journeys(new_resp, instance, api_request)
 
-            # duplicate the generator
-            tmp1, tmp2 = itertools.tee(filtered_new_resp)
-            qualified_journeys = journey_filter.get_qualified_journeys(responses)
-
-            # now we want to filter similar journeys in the new response which is done in 2 steps
-            # In the first step, we compare journeys from the new response only , 2 by 2
-            # hopefully, it may lead to some early return for the second step to improve the perf a little
-            # In the second step, we compare the journeys from the new response with those that have been qualified
-            # already in the former iterations
-            # note that the journeys_pool is a list of 2-element tuple of journeys
-            journeys_pool = itertools.chain(
-                # First step: compare journeys from the new response only
-                itertools.combinations(tmp1, 2),
-                # Second step:
-                # we use the itertools.product to create combinations between qualified journeys and new journeys
-                # Ex:
-                # new_journeys = [n_1, n_2]
-                # qualified_journeys = [q_1, q_2, q_3]
-                # itertools.product(new_journeys, qualified_journeys) gives combinations as follows:
-                # (n_1, q_1), (n_1, q_2),(n_1, q_3),(n_2, q_1),(n_2, q_2),(n_2, q_3)
-                itertools.product(tmp2, qualified_journeys),
-            )
-            journey_filter.filter_similar_vj_journeys(journeys_pool, api_request)
+            # the span is where the filters are evaluated: get_similar_journeys_pool consumes the generator
+            with tracing.span('scenario.filter_journeys'):
+                qualified_journeys = journey_filter.get_qualified_journeys(responses)
+
+                # now we want to filter similar journeys in the new response which is done in 2 steps
+                # In the first step, we compare journeys from the new response only , 2 by 2
+                # In the second step, we compare the journeys from the new response with those that have been
+                # qualified already in the former iterations
+                # note that the journeys_pool is a list of 2-element tuple of journeys, only the journeys with the
+                # same signature are paired, so we don't compare all the journeys 2 by 2
+                journeys_pool = journey_filter.get_similar_journeys_pool(filtered_new_resp,
+                                                                         qualified_journeys,
+                                                                         journey_filter.similar_journeys_vj_generator)
+                journey_filter.filter_similar_vj_journeys(journeys_pool, api_request)
 
             responses.extend(new_resp)  # we keep the error for building the response
 
@@ -869,7 +903,8 @@ class Scenario(simple.Scenario):
 
         logger.debug('nb of call kraken: %i', nb_try)
 
-        journey_filter.final_filter_journeys(responses, instance, api_request)
+        with tracing.span('scenario.final_filter_journeys'):
+            journey_filter.final_filter_journeys(responses, instance, api_request)
         pb_resp = merge_responses(responses)
 
         sort_journeys(pb_resp, instance.journey_order, api_request['clockwise'])
@@ -881,7 +916,8 @@ class Scenario(simple.Scenario):
                  or 'ridesharing' in ridesharing_req['destination_mode']):
             logger.debug('trying to add ridesharing journeys')
             try:
-                decorate_journeys(pb_resp, instance, api_request)
+                with tracing.span('scenario.ridesharing'):
+                    decorate_journeys(pb_resp, instance, api_request)
             except Exception:
                 logger.exception('Error while retrieving ridesharing ads')
         else:
@@ -891,7 +927,8 @@ class Scenario(simple.Scenario):
 
         journey_filter.delete_journeys((pb_resp,), api_request)
         type_journeys(pb_resp, api_request)
-        culling_journeys(pb_resp, api_request)
+        with tracing.span('scenario.culling_journeys'):
+            culling_journeys(pb_resp, api_request)
 
         self._compute_pagination_links(pb_resp, instance, api_request['clockwise'])
         return pb_resp
@@ -917,7 +954,8 @@ class Scenario(simple.Scenario):
         for dep_mode, arr_mode in krakens_call:
             pb_request = create_pb_request(request_type, request, dep_mode, arr_mode)
             # we spawn a new greenlet, it won't have access to our thread local request object so we pass the request_id
-            futures.append(pool.spawn(worker, dep_mode, arr_mode, instance, pb_request, flask_request_id=flask.request.id))
+            futures.append(pool.spawn(tracing.bind(worker), dep_mode, arr_mode, instance, pb_request,
+                                      flask_request_id=flask.request.id))
 
         for future in gevent.iwait(futures):
             dep_mode, arr_mode, local_resp = future.get()
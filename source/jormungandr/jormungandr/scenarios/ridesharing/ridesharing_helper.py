@@ -29,16 +29,23 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
 
 import six
-from jormungandr import new_relic
+import gevent.pool
+from jormungandr import new_relic, app, tracing, utils
 from jormungandr.scenarios import journey_filter
 from jormungandr.scenarios.helper_classes.helper_utils import crowfly_distance_between
 from jormungandr.scenarios.ridesharing.ridesharing_journey import Gender
 from jormungandr.utils import get_pt_object_coord, generate_id
+from jormungandr.local_cache import LocalCache
 from navitiacommon import response_pb2
 from jormungandr.utils import PeriodExtremity
 import logging
 from jormungandr.scenarios.journey_filter import to_be_deleted
 
+# The pickup and dropoff places of the ridesharing offers are often the same from one request to another (car pools,
+# train stations...), the places found by kraken for their coord are kept by instance and publication_date
+_places_cache = LocalCache(app.config.get('RIDESHARING_PLACES_CACHE_SIZE', 0),
+                           app.config.get('RIDESHARING_PLACES_CACHE_TTL', 600))
+
 
 def _make_pb_fp(fp):
     pb_fp = response_pb2.FeedPublisher()
@@ -48,14 +55,16 @@ def _make_pb_fp(fp):
     pb_fp.license = fp.license
     return pb_fp
 
-def decorate_journeys(response, instance, request):
-    #TODO: disable same journey schedule link for ridesharing journey?
+def _get_ridesharing_sections(response, request):
+    """
+    :return: the list of (journey, section, period_extremity) to decorate
+    """
+    sections = []
     for journey in response.journeys:
         if 'ridesharing' not in journey.tags or to_be_deleted(journey):
             continue
         for i, section in enumerate(journey.sections):
             if section.street_network.mode == response_pb2.Ridesharing:
-                section.additional_informations.append(response_pb2.HAS_DATETIME_ESTIMATED)
                 period_extremity = None
                 if len(journey.sections) == 1:#direct path, we use the user input
                     period_extremity = PeriodExtremity(request['datetime'], request['clockwise'])
@@ -63,41 +72,117 @@ def decorate_journeys(response, instance, request):
                     period_extremity = PeriodExtremity(section.end_date_time, False)
                 else: #ridesharing at the end, we search for solution starting after the end of the pt sections
                     period_extremity = PeriodExtremity(section.begin_date_time, True)
+                sections.append((journey, section, period_extremity))
+    return sections
 
-                pb_rsjs, pb_tickets, pb_fps = build_ridesharing_journeys(section.origin, section.destination,
-                                                                         period_extremity, instance)
-                if not pb_rsjs:
-                    journey_filter.mark_as_dead(journey, 'no_matching_ridesharing_found')
-                else:
-                    section.ridesharing_journeys.extend(pb_rsjs)
-                    response.tickets.extend(pb_tickets)
 
-                response.feed_publishers.extend((fp for fp in pb_fps if fp not in response.feed_publishers))
+def _coord_str(pt_obj):
+    coord = get_pt_object_coord(pt_obj)
+    return "{},{}".format(coord.lat, coord.lon)
 
 
+def decorate_journeys(response, instance, request):
+    #TODO: disable same journey schedule link for ridesharing journey?
+    sections = _get_ridesharing_sections(response, request)
+    if not sections:
+        return
 
-def build_ridesharing_journeys(from_pt_obj, to_pt_obj, period_extremity, instance):
-    from_coord = get_pt_object_coord(from_pt_obj)
-    to_coord = get_pt_object_coord(to_pt_obj)
-    from_str="{},{}".format(from_coord.lat, from_coord.lon)
-    to_str="{},{}".format(to_coord.lat, to_coord.lon)
+    # the same search is often made for several journeys (same fallback to the same stop_point at the same time),
+    # the distinct searches are made once and concurrently
+    searches = {(_coord_str(section.origin), _coord_str(section.destination), period_extremity)
+                for _, section, period_extremity in sections}
+    # the request context is copied in the greenlets for the logs (request_id) of the ridesharing requests
+    reqctx = utils.copy_flask_request_context()
+
+    def worker(search):
+        with utils.copy_context_in_greenlet_stack(reqctx):
+            return get_ridesharing_journeys(instance, *search)
+
+    pool = gevent.pool.Pool(app.config.get('GREENLET_POOL_SIZE', 3))
+    futures = {search: pool.spawn(tracing.bind(worker), search) for search in searches}
+    results = {search: future.get() for search, future in futures.items()}
+
+    # all the pickup and dropoff places of all the searches are resolved at once
+    places = get_places(instance, [_place_uri(place)
+                                   for rsjs, _ in results.values()
+                                   for rsj in rsjs
+                                   for place in (rsj.pickup_place, rsj.dropoff_place)])
+
+    for journey, section, period_extremity in sections:
+        section.additional_informations.append(response_pb2.HAS_DATETIME_ESTIMATED)
+        rsjs, fps = results[(_coord_str(section.origin), _coord_str(section.destination), period_extremity)]
+        pb_rsjs, pb_tickets, pb_fps = build_ridesharing_journeys(section.origin, section.destination,
+                                                                 period_extremity, rsjs, fps, places)
+        if not pb_rsjs:
+            journey_filter.mark_as_dead(journey, 'no_matching_ridesharing_found')
+        else:
+            section.ridesharing_journeys.extend(pb_rsjs)
+            response.tickets.extend(pb_tickets)
+
+        response.feed_publishers.extend((fp for fp in pb_fps if fp not in response.feed_publishers))
+
+
+def _place_uri(place):
+    return "{};{}".format(place.lon, place.lat)
+
+
+def get_ridesharing_journeys(instance, from_str, to_str, period_extremity):
+    """
+    :return: the ridesharing journeys and the feed publishers of all the ridesharing services, nothing if one of
+    them has failed
+    """
     try:
-        rsjs, fps = instance.get_ridesharing_journeys_with_feed_publishers(from_str, to_str, period_extremity)
+        return instance.get_ridesharing_journeys_with_feed_publishers(from_str, to_str, period_extremity)
     except Exception as e:
         logging.exception('Error while retrieving ridesharing ads and feed_publishers from %s to %s: {}',
                           from_str, to_str)
         new_relic.record_custom_event('ridesharing_internal_failure', {'message': str(e)})
-        rsjs = []
-        fps = []
+        return [], []
+
+
+def get_places(instance, uris):
+    """
+    find the places of the uris, from the cache if possible, the others are requested to kraken at once
+
+    :return: a dict {uri: place}
+    """
+    if _places_cache.max_size <= 0:
+        return instance.georef.places(uris)
 
+    def key(uri):
+        return instance.name, instance.publication_date, uri
+
+    places = {}
+    missing = []
+    for uri in set(uris):
+        place = _places_cache.get(key(uri))
+        if place is None:
+            missing.append(uri)
+        else:
+            places[uri] = place
+    for uri, place in instance.georef.places(missing).items():
+        if place is not None:
+            _places_cache.set(key(uri), place)
+        places[uri] = place
+    return places
+
+
+def build_ridesharing_journeys(from_pt_obj, to_pt_obj, period_extremity, rsjs, fps, places):
+    """
+    build the ridesharing journeys between the 2 places from the offers of the ridesharing services
+
+    :param places: the places of the pickups and dropoffs, by uri (see _place_uri)
+    """
+    from_coord = get_pt_object_coord(from_pt_obj)
+    to_coord = get_pt_object_coord(to_pt_obj)
     pb_rsjs = []
     pb_tickets = []
     pb_feed_publishers = [_make_pb_fp(fp) for fp in fps if fp is not None]
 
     for rsj in rsjs:
         pb_rsj = response_pb2.Journey()
-        pb_rsj_pickup = instance.georef.place("{};{}".format(rsj.pickup_place.lon, rsj.pickup_place.lat))
-        pb_rsj_dropoff = instance.georef.place("{};{}".format(rsj.dropoff_place.lon, rsj.dropoff_place.lat))
+        pb_rsj_pickup = places[_place_uri(rsj.pickup_place)]
+        pb_rsj_dropoff = places[_place_uri(rsj.dropoff_place)]
         pickup_coord = get_pt_object_coord(pb_rsj_pickup)
         dropoff_coord = get_pt_object_coord(pb_rsj_dropoff)
 
@@ -0,0 +1,133 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+
+import flask
+import mock
+from jormungandr import app
+from jormungandr.local_cache import LocalCache
+from jormungandr.scenarios.ridesharing import ridesharing_helper
+from navitiacommon import response_pb2, type_pb2
+
+
+class FakeGeoref(object):
+    def __init__(self):
+        self.requested = []
+
+    def places(self, uris):
+        self.requested.append(sorted(set(uris)))
+        return {uri: 'place of {}'.format(uri) for uri in uris}
+
+
+class FakeInstance(object):
+    def __init__(self, name='fake', publication_date='20180101T000000'):
+        self.name = name
+        self.publication_date = publication_date
+        self.georef = FakeGeoref()
+
+
+def get_places_test():
+    """
+    the places are found in one call and kept in cache for the same instance and data
+    """
+    with mock.patch.object(ridesharing_helper, '_places_cache', LocalCache(10, 600)):
+        instance = FakeInstance()
+        places = ridesharing_helper.get_places(instance, ['1;2', '3;4', '1;2'])
+        assert places == {'1;2': 'place of 1;2', '3;4': 'place of 3;4'}
+        assert instance.georef.requested == [['1;2', '3;4']]
+
+        places = ridesharing_helper.get_places(instance, ['1;2', '5;6'])
+        assert places == {'1;2': 'place of 1;2', '5;6': 'place of 5;6'}
+        assert instance.georef.requested == [['1;2', '3;4'], ['5;6']]
+
+        # a new data, the places are requested again
+        instance.publication_date = '20180102T000000'
+        ridesharing_helper.get_places(instance, ['1;2'])
+        assert instance.georef.requested == [['1;2', '3;4'], ['5;6'], ['1;2']]
+
+
+def get_places_without_cache_test():
+    with mock.patch.object(ridesharing_helper, '_places_cache', LocalCache(0, 600)):
+        instance = FakeInstance()
+        ridesharing_helper.get_places(instance, ['1;2'])
+        ridesharing_helper.get_places(instance, ['1;2'])
+        assert instance.georef.requested == [['1;2'], ['1;2']]
+
+
+def get_ridesharing_journeys_failure_test():
+    """
+    a failing ridesharing service doesn't fail the journeys' request
+    """
+    instance = FakeInstance()
+    instance.get_ridesharing_journeys_with_feed_publishers = mock.MagicMock(side_effect=Exception('service down'))
+    assert ridesharing_helper.get_ridesharing_journeys(instance, '1,2', '3,4', None) == ([], [])
+
+
+def decorate_journeys_same_search_test():
+    """
+    the journeys with the same ridesharing search are decorated with the result of a single request
+    """
+    response = response_pb2.Response()
+    for _ in range(2):
+        journey = response.journeys.add()
+        journey.tags.append('ridesharing')
+        section = journey.sections.add()
+        section.street_network.mode = response_pb2.Ridesharing
+        section.origin.uri = 'origin'
+        section.origin.embedded_type = type_pb2.ADDRESS
+        section.origin.address.coord.lon = 1.
+        section.origin.address.coord.lat = 2.
+        section.destination.uri = 'destination'
+        section.destination.embedded_type = type_pb2.ADDRESS
+        section.destination.address.coord.lon = 3.
+        section.destination.address.coord.lat = 4.
+
+    instance = FakeInstance()
+    requested_paths = []
+
+    def get_ridesharing_journeys_with_feed_publishers(from_str, to_str, period_extremity):
+        # the request context is available in the greenlets
+        requested_paths.append(flask.request.path)
+        return [], []
+
+    instance.get_ridesharing_journeys_with_feed_publishers = \
+        mock.MagicMock(side_effect=get_ridesharing_journeys_with_feed_publishers)
+
+    with app.test_request_context('/journeys'), \
+            mock.patch.object(ridesharing_helper, '_places_cache', LocalCache(0, 600)), \
+            mock.patch.object(ridesharing_helper, 'build_ridesharing_journeys',
+                              return_value=([response_pb2.Journey()], [], [])):
+        ridesharing_helper.decorate_journeys(response, instance, {'datetime': 1514764800, 'clockwise': True})
+
+    instance.get_ridesharing_journeys_with_feed_publishers.assert_called_once_with(
+        '2.0,1.0', '4.0,3.0', ridesharing_helper.PeriodExtremity(1514764800, True))
+    assert requested_paths == ['/journeys']
+    for journey in response.journeys:
+        assert len(journey.sections[0].ridesharing_journeys) == 1
@@ -613,6 +613,41 @@ def test_similar_journeys_bss_park():
 
     assert journey_filter.compare(journey1, journey2, journey_filter.similar_journeys_vj_generator)
 
+def test_similar_journeys_pool():
+    """
+    the pool must contain the same similar pairs, in the same order, as the comparison of all the journeys
+    """
+    def make_journey(*vjs):
+        j = response_pb2.Journey()
+        for vj in vjs:
+            j.sections.add()
+            j.sections[-1].type = response_pb2.PUBLIC_TRANSPORT
+            j.sections[-1].pt_display_informations.uris.vehicle_journey = vj
+        return j
+
+    new_journeys = [make_journey('vj1'), make_journey('vj1', 'vj2'), make_journey('vj3'),
+                    make_journey('vj1'), make_journey('vj1', 'vj2'), make_journey('vj1')]
+    other_journeys = [make_journey('vj1'), make_journey('vj2'), make_journey('vj1', 'vj2')]
+
+    pool = journey_filter.get_similar_journeys_pool(new_journeys, other_journeys,
+                                                    journey_filter.similar_journeys_vj_generator)
+
+    # protobuf messages are not hashable and similar journeys are equal, so we work on their position
+    position = {id(j): i for i, j in enumerate(new_journeys + other_journeys)}
+    pool = [(position[id(j1)], position[id(j2)]) for j1, j2 in pool]
+
+    all_pairs = itertools.chain(itertools.combinations(new_journeys, 2),
+                                itertools.product(new_journeys, other_journeys))
+    similar_pairs = [(position[id(j1)], position[id(j2)]) for j1, j2 in all_pairs
+                     if journey_filter.compare(j1, j2, journey_filter.similar_journeys_vj_generator)]
+
+    assert len(pool) == 9
+    assert sorted(pool) == sorted(similar_pairs)
+    # the relative order of the pairs of a same group is kept
+    for i in range(len(new_journeys)):
+        assert [p for p in pool if i in p] == [p for p in similar_pairs if i in p]
+
+
 class MockInstance(object):
     def __init__(self):
         pass  #TODO when we'll got instances's param
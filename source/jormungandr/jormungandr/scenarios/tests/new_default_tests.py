@@ -32,7 +32,9 @@ import navitiacommon.response_pb2 as response_pb2
 import jormungandr.scenarios.tests.helpers_tests as helpers_tests
 from jormungandr.scenarios import new_default
 from jormungandr.scenarios.new_default import _tag_journey_by_mode, get_kraken_calls
+from jormungandr.scenarios.utils import gen_all_combin
 from werkzeug.exceptions import HTTPException
+import numpy as np
 import pytest
 """
  sections       0   1   2   3   4   5   6   7   8   9   10
@@ -180,17 +182,69 @@ def build_candidate_pool_and_sections_set_test():
     assert [0, 0, 0, 1, 0, 0, 0, 1, 1, 0, 1] in selected_sections_matrix
 
 
-def get_sorted_solutions_indexes_test():
+def _brute_force_best_combination(selected_sections_matrix, nb_journeys_to_find, idx_jrny_must_keep,
+                                  pseudo_durations):
+    """
+    enumerate all the combinations to find the best one, the first one in gen_all_combin order wins ties
+    """
+    best, best_score = None, None
+    for combination in gen_all_combin(selected_sections_matrix.shape[0], nb_journeys_to_find):
+        if not set(combination).issuperset(idx_jrny_must_keep):
+            continue
+        res = np.sum(selected_sections_matrix[combination], axis=0)
+        score = (np.count_nonzero(res == 0), np.sum(res), sum(pseudo_durations[i] for i in combination))
+        if best_score is None or score < best_score:
+            best, best_score = combination, score
+    return sorted(best)
+
+
+def get_best_combination_test():
     mocked_pb_response = build_mocked_response()
     candidates_pool, sections_set, idx_jrny_must_keep = \
         new_default._build_candidate_pool_and_sections_set(mocked_pb_response)
     selected_sections_matrix = new_default._build_selected_sections_matrix(sections_set, candidates_pool)
+    pseudo_durations = [j.arrival_date_time for j in candidates_pool]
     # 4 journeys are must-have, we'd like to select another 5 journeys
-    best_indexes, selection_matrix = \
-        new_default._get_sorted_solutions_indexes(selected_sections_matrix, (5 + 4), idx_jrny_must_keep)
+    best = new_default._get_best_combination(selected_sections_matrix, (5 + 4), idx_jrny_must_keep,
+                                             pseudo_durations)
+
+    assert best == [2, 3, 5, 7, 13, 14, 15, 16, 17]
+    assert best == _brute_force_best_combination(selected_sections_matrix, (5 + 4), idx_jrny_must_keep,
+                                                 pseudo_durations)
+
 
-    assert best_indexes.shape[0] == 33
-    assert all(selection_matrix[best_indexes[0]] == [0, 0, 1, 1, 0, 1, 0, 1, 1, 0, 0, 0, 0, 1, 1, 1, 1, 0, 0])
+def get_best_combination_same_as_brute_force_test():
+    """
+    the branch and bound must find the same combination as the enumeration of all the combinations
+    """
+    random_state = np.random.RandomState(42)
+    for _ in range(100):
+        nb_journeys = random_state.randint(3, 12)
+        selected_sections_matrix = (random_state.rand(nb_journeys, random_state.randint(1, 10)) < 0.3).astype(int)
+        nb_jrny_must_keep = random_state.randint(0, min(3, nb_journeys - 1))
+        idx_jrny_must_keep = sorted(random_state.choice(nb_journeys, nb_jrny_must_keep, replace=False))
+        nb_journeys_to_find = random_state.randint(len(idx_jrny_must_keep) + 1, nb_journeys)
+        # few different values to have some ties
+        pseudo_durations = random_state.choice([100, 200, 300], nb_journeys).tolist()
+
+        best = new_default._get_best_combination(selected_sections_matrix, nb_journeys_to_find,
+                                                 idx_jrny_must_keep, pseudo_durations)
+        assert best == _brute_force_best_combination(selected_sections_matrix, nb_journeys_to_find,
+                                                     idx_jrny_must_keep, pseudo_durations)
+
+
+def get_best_combination_max_nb_nodes_test():
+    """
+    with lots of journeys, the search is stopped but a valid combination is returned
+    """
+    random_state = np.random.RandomState(42)
+    selected_sections_matrix = (random_state.rand(60, 40) < 0.2).astype(int)
+    pseudo_durations = random_state.randint(0, 3600, 60).tolist()
+
+    best = new_default._get_best_combination(selected_sections_matrix, 15, [0, 1], pseudo_durations,
+                                             max_nb_nodes=1000)
+    assert len(best) == 15
+    assert {0, 1}.issubset(best)
 
 
 def culling_jounreys_1_test():
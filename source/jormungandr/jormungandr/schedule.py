@@ -36,7 +36,7 @@ from jormungandr import utils
 
 from navitiacommon import type_pb2, request_pb2, response_pb2
 from copy import deepcopy
-from jormungandr import new_relic
+from jormungandr import new_relic, app, tracing
 
 import gevent, gevent.pool
 import flask
@@ -185,17 +185,17 @@ class MixedSchedule(object):
             return None
         return rt_system
 
-    def _get_next_realtime_passages(self, rt_system, route_point, request):
+    def _get_next_realtime_passages(self, rt_system, route_points, request):
         log = logging.getLogger(__name__)
         next_rt_passages = None
 
         try:
-            next_rt_passages = rt_system.next_passage_for_route_point(route_point,
-                                                                      request['items_per_schedule'],
-                                                                      request['from_datetime'],
-                                                                      request['_current_datetime'],
-                                                                      request['duration'],
-                                                                      request['timezone'])
+            next_rt_passages = rt_system.next_passages_for_route_points(route_points,
+                                                                        request['items_per_schedule'],
+                                                                        request['from_datetime'],
+                                                                        request['_current_datetime'],
+                                                                        request['duration'],
+                                                                        request['timezone'])
         except Exception as e:
             log.exception('failure while requesting next passages to external RT system {}'.format(rt_system.rt_system_id))
             new_relic.record_custom_event('realtime_internal_failure', {'rt_system_id': unicode(rt_system.rt_system_id),
@@ -203,10 +203,66 @@ class MixedSchedule(object):
 
         if next_rt_passages is None:
             log.debug('no next passages, using base schedule')
-            return None
+            return [None] * len(route_points)
 
         return next_rt_passages
 
+    def _get_route_points_by_proxy(self, route_points):
+        """
+        :param route_points: iterable of (route_point, payload)
+        :return: dict {rt_proxy: [(route_point, payload)]}, the route points without realtime proxy are left out
+        """
+        route_points_by_proxy = {}
+        for route_point, payload in route_points:
+            rt_proxy = self._get_realtime_proxy(route_point)
+            if rt_proxy:
+                route_points_by_proxy.setdefault(rt_proxy, []).append((route_point, payload))
+        return route_points_by_proxy
+
+    def _fetch_realtime_passages(self, request, route_points_by_proxy):
+        """
+        query concurrently the realtime proxies of the route points
+
+        the route points of a proxy are grouped by batches of its max_batch_size, one call by batch
+
+        :param route_points_by_proxy: dict {rt_proxy: [(route_point, payload)]} (see _get_route_points_by_proxy),
+        the payload is given back with the result
+        :return: list of (rt_proxy, route_point, payload, next_rt_passages) for the proxies that have answered
+        before REALTIME_PROXY_GLOBAL_TIMEOUT_S, the others are abandoned and keep their base schedule
+        """
+        pool = gevent.pool.Pool(self.instance.realtime_pool_size)
+        futures = []
+        results = []
+
+        # Copy the current request context to be used in greenlet
+        reqctx = utils.copy_flask_request_context()
+
+        def worker(rt_proxy, batch):
+            # Use the copied request context in greenlet
+            with utils.copy_context_in_greenlet_stack(reqctx):
+                next_rt_passages = self._get_next_realtime_passages(rt_proxy, [rp for rp, _ in batch], request)
+                return [(rt_proxy, route_point, payload, passages)
+                        for (route_point, payload), passages in zip(batch, next_rt_passages)]
+
+        # the deadline covers the whole fan-out, spawning included since it waits for a free slot in the pool
+        with gevent.Timeout(app.config.get('REALTIME_PROXY_GLOBAL_TIMEOUT_S') or None, False):
+            for rt_proxy, proxy_route_points in route_points_by_proxy.items():
+                batch_size = max(rt_proxy.max_batch_size, 1)
+                for i in range(0, len(proxy_route_points), batch_size):
+                    futures.append(pool.spawn(tracing.bind(worker), rt_proxy, proxy_route_points[i:i + batch_size]))
+
+            for future in gevent.iwait(futures):
+                results.extend(future.get())
+
+        # the route points not answered in time, their call running or never spawned, are late
+        nb_late = sum(len(proxy_route_points) for proxy_route_points in route_points_by_proxy.values()) - len(results)
+        if nb_late:
+            logging.getLogger(__name__).warning('realtime proxies too slow, {} route points abandoned'
+                                                .format(nb_late))
+            pool.kill(block=False)
+
+        return results
+
     def __stop_times(self, request, api, departure_filter="", arrival_filter=""):
         req = request_pb2.Request()
         req.requested_api = api
@@ -260,25 +316,9 @@ class MixedSchedule(object):
                              _create_template_from_pb_route_point(rp))
                             for rp in resp.route_points)
 
-        rt_proxy = None
-        futures = []
-        pool = gevent.pool.Pool(self.instance.realtime_pool_size)
-
-        # Copy the current request context to be used in greenlet
-        reqctx = utils.copy_flask_request_context()
-
-        def worker(rt_proxy, route_point, template, request, resp):
-            # Use the copied request context in greenlet
-            with utils.copy_context_in_greenlet_stack(reqctx):
-                return resp, rt_proxy, route_point, template, self._get_next_realtime_passages(rt_proxy, route_point, request)
-
-        for route_point, template in route_points.items():
-            rt_proxy = self._get_realtime_proxy(route_point)
-            if rt_proxy:
-                futures.append(pool.spawn(worker, rt_proxy, route_point, template, request, resp))
-
-        for future in gevent.iwait(futures):
-            resp, rt_proxy, route_point, template, next_rt_passages = future.get()
+        route_points_by_proxy = self._get_route_points_by_proxy(route_points.items())
+        for rt_proxy, route_point, template, next_rt_passages in self._fetch_realtime_passages(request,
+                                                                                           route_points_by_proxy):
             rt_proxy._update_passages(resp.next_departures, route_point, template, next_rt_passages)
 
         # sort
@@ -289,7 +329,7 @@ class MixedSchedule(object):
 
         # handle pagination :
         # If real time information exist, we have to change pagination score.
-        if rt_proxy:
+        if route_points_by_proxy:
             resp.pagination.totalResult = len(resp.next_departures)
             resp.pagination.itemsOnPage = len(resp.next_departures)
 
@@ -301,10 +341,10 @@ class MixedSchedule(object):
         if request['data_freshness'] != RT_PROXY_DATA_FRESHNESS:
             return resp
 
-        for stop_schedule in resp.stop_schedules:
-            route_point = _get_route_point_from_stop_schedule(stop_schedule)
-            rt_proxy = self._get_realtime_proxy(route_point)
-            if rt_proxy:
-                next_rt_passages = self._get_next_realtime_passages(rt_proxy, route_point, request)
-                rt_proxy._update_stop_schedule(stop_schedule, next_rt_passages)
+        route_points = ((_get_route_point_from_stop_schedule(stop_schedule), stop_schedule)
+                        for stop_schedule in resp.stop_schedules)
+        route_points_by_proxy = self._get_route_points_by_proxy(route_points)
+        for rt_proxy, _, stop_schedule, next_rt_passages in self._fetch_realtime_passages(request,
+                                                                                          route_points_by_proxy):
+            rt_proxy._update_stop_schedule(stop_schedule, next_rt_passages)
         return resp
@@ -39,6 +39,7 @@ from jormungandr.authentication import get_user, get_token, get_app_name, get_us
 from jormungandr import utils
 import re
 from threading import Lock
+from collections import deque
 
 import pytz
 import time
@@ -47,6 +48,8 @@ import kombu
 import six
 import pybreaker
 import retrying
+import gevent
+import gevent.queue
 
 f_datetime = "%Y%m%dT%H%M%S"
 
@@ -136,6 +139,23 @@ class StatManager(object):
 
         self.breaker = pybreaker.CircuitBreaker(fail_max=fail_max, reset_timeout=reset_timeout)
 
+        # the stats are published to rabbitmq by a background greenlet, the requests only put them in a queue
+        # if the queue size is 0, the stats are published synchronously by the requests
+        queue_size = app.config.get('STAT_QUEUE_SIZE', 1000)
+        self.queue = gevent.queue.Queue(maxsize=queue_size) if queue_size > 0 else None
+        self.batch_size = app.config.get('STAT_BATCH_SIZE', 100)
+        # when the queue is full, either the stat is dropped or the request waits for some room in the queue
+        # (at most STAT_QUEUE_PUT_TIMEOUT seconds, the stat is dropped after that)
+        self.block_when_queue_full = app.config.get('STAT_BLOCK_WHEN_QUEUE_FULL', False)
+        self.queue_put_timeout = app.config.get('STAT_QUEUE_PUT_TIMEOUT', 0.1)
+        self.publisher = None
+
+        self.nb_dropped = 0
+        self.nb_published = 0
+        self.nb_publish_errors = 0
+        self.last_publish_latency = None
+        self.max_publish_latency = None
+
     def _init_rabbitmq(self):
         """
         connection to rabbitmq and initialize queues
@@ -166,9 +186,71 @@ class StatManager(object):
         self.fill_parameters(stat_request)
         self.fill_result(stat_request, call_result)
 
+        self._publish(stat_request.api, stat_request.SerializeToString())
+
+    def _publish(self, api, pbf):
+        if self.queue is None:
+            self._publish_batch([(api, pbf)])
+            return
+
+        if self.publisher is None or self.publisher.dead:
+            # the publisher is started lazily to have one in each worker
+            self.publisher = gevent.spawn(self._publisher_loop)
+        try:
+            self.queue.put((api, pbf), block=self.block_when_queue_full, timeout=self.queue_put_timeout)
+        except gevent.queue.Full:
+            self.nb_dropped += 1
+            logging.getLogger(__name__).warning('the stat queue is full, stat dropped')
+
+    def _publisher_loop(self):
+        """
+        wait for stats in the queue and publish all the available ones (at most batch_size) at once
+        """
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except gevent.queue.Empty:
+                    break
+            try:
+                self._publish_batch(batch)
+            except Exception:
+                logging.getLogger(__name__).exception('Error during stat publication')
+
+    def _publish_batch(self, batch):
+        start = time.time()
+        to_publish = deque(batch)
         retry = retrying.Retrying(stop_max_attempt_number=2,
                 retry_on_exception=lambda e: not isinstance(e, pybreaker.CircuitBreakerError))
-        retry.call(self.breaker.call, self.publish_request, stat_request.api, stat_request.SerializeToString())
+        try:
+            retry.call(self.breaker.call, self._publish_requests, to_publish)
+        except Exception:
+            self.nb_publish_errors += len(to_publish)
+            raise
+        finally:
+            self.nb_published += len(batch) - len(to_publish)
+            latency = time.time() - start
+            self.last_publish_latency = latency
+            self.max_publish_latency = max(latency, self.max_publish_latency or 0)
+
+    def _publish_requests(self, to_publish):
+        # the published stats are removed so that they are not published twice on a retry
+        while to_publish:
+            api, pbf = to_publish[0]
+            self.publish_request(api, pbf)
+            to_publish.popleft()
+
+    def status(self):
+        return {
+            'asynchronous': self.queue is not None,
+            'queue_size': self.queue.qsize() if self.queue is not None else 0,
+            'dropped': self.nb_dropped,
+            'published': self.nb_published,
+            'publish_errors': self.nb_publish_errors,
+            'last_publish_latency': self.last_publish_latency,
+            'max_publish_latency': self.max_publish_latency,
+        }
 
     def fill_info_response(self, stat_info_response, call_result):
         """
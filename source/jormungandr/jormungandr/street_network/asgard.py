@@ -34,10 +34,9 @@ from jormungandr.utils import get_pt_object_coord
 
 from jormungandr.street_network.valhalla import Valhalla
 
-from contextlib import contextmanager
-import queue
+from jormungandr.zmq_socket_pool import ZmqSocketPool
+from jormungandr import app
 from navitiacommon import response_pb2, request_pb2, type_pb2
-from zmq import green as zmq
 import six
 
 
@@ -45,7 +44,8 @@ class Asgard(Valhalla):
     def __init__(self, instance, service_url, asgard_socket, modes=[], id='asgard', timeout=10, api_key=None, **kwargs):
         super(Asgard, self).__init__(instance, service_url, modes, id, timeout, api_key, **kwargs)
         self.asgard_socket = asgard_socket
-        self._sockets = queue.Queue()
+        self.socket_pool = ZmqSocketPool(instance.context, asgard_socket,
+                                         max_idle_sockets=app.config.get('ZMQ_SOCKET_POOL_MAX_IDLE', 10))
 
     def get_street_network_routing_matrix(self, origins, destinations, mode, max_duration, request, **kwargs):
         speed_switcher = {
@@ -77,33 +77,13 @@ class Asgard(Valhalla):
             raise TechnicalError('routing matrix fail')
         return res.sn_routing_matrix
 
-    @contextmanager
-    def socket(self, context):
-        socket = None
-        try:
-            socket = self._sockets.get(block=False)
-        except queue.Empty:
-            socket = context.socket(zmq.REQ)
-            socket.connect(self.asgard_socket)
-        try:
-            yield socket
-        finally:
-            if not socket.closed:
-                self._sockets.put(socket)
-
-
     def _call_asgard(self, request):
-        with self.socket(self.instance.context) as socket:
-            socket.send(request.SerializeToString())
-            #timeout is in second, we need it on millisecond
-            if socket.poll(timeout=self.timeout*1000) > 0:
-                pb = socket.recv()
-                resp = response_pb2.Response()
-                resp.ParseFromString(pb)
-                return resp
-            else:
-                socket.setsockopt(zmq.LINGER, 0)
-                socket.close()
-                logger = logging.getLogger(__name__)
-                logger.error('request on %s failed: %s', self.asgard_socket, six.text_type(request))
-                raise TechnicalError('asgard on {} failed'.format(self.asgard_socket))
+        #timeout is in second, we need it on millisecond
+        pb = self.socket_pool.send_and_receive(request.SerializeToString(), self.timeout*1000)
+        if pb is None:
+            logger = logging.getLogger(__name__)
+            logger.error('request on %s failed: %s', self.asgard_socket, six.text_type(request))
+            raise TechnicalError('asgard on {} failed'.format(self.asgard_socket))
+        resp = response_pb2.Response()
+        resp.ParseFromString(pb)
+        return resp
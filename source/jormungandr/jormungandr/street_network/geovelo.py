@@ -33,7 +33,7 @@ import requests as requests
 import pybreaker
 import json
 from navitiacommon import response_pb2
-from jormungandr import app
+from jormungandr import app, http_pool
 from jormungandr.exceptions import TechnicalError, InvalidArguments, UnableToParse
 from jormungandr.street_network.street_network import AbstractStreetNetworkService, StreetNetworkPathKey
 from jormungandr.utils import get_pt_object_coord, is_url, decode_polyline
@@ -102,7 +102,7 @@ class Geovelo(AbstractStreetNetworkService):
             'transportModes': ['BIKE']
         }
 
-    def _call_geovelo(self, url, method=requests.post, data=None):
+    def _call_geovelo(self, url, method=http_pool.post, data=None):
         logging.getLogger(__name__).debug('Geovelo routing service , call url : {}'.format(url))
         try:
             return self.breaker.call(method, url, timeout=self.timeout, data=data,
@@ -165,7 +165,7 @@ class Geovelo(AbstractStreetNetworkService):
 
         data = self._make_request_arguments_isochrone(origins, destinations)
         r = self._call_geovelo('{}/{}'.format(self.service_url, 'api/v2/routes_m2m'),
-                               requests.post, json.dumps(data))
+                               http_pool.post, json.dumps(data))
         self._check_response(r)
         resp_json = r.json()
 
@@ -275,7 +275,7 @@ class Geovelo(AbstractStreetNetworkService):
                                                                 'single_result=true&'
                                                                 'bike_stations=false&'
                                                                 'objects_as_ids=true&'),
-                               requests.post, json.dumps(data))
+                               http_pool.post, json.dumps(data))
         self._check_response(r)
         resp_json = r.json()
 
@@ -34,7 +34,7 @@ from navitiacommon import response_pb2
 import logging
 import pybreaker
 import requests as requests
-from jormungandr import app
+from jormungandr import app, http_pool
 from jormungandr.exceptions import TechnicalError
 from jormungandr.utils import get_pt_object_coord
 from jormungandr.street_network.street_network import AbstractStreetNetworkService, StreetNetworkPathKey
@@ -104,7 +104,7 @@ class Here(AbstractStreetNetworkService):
     def _call_here(self, url, params):
         self.log.debug('Here routing service, url: {}'.format(url))
         try:
-            r = self.breaker.call(requests.get, url, timeout=self.timeout, params=params)
+            r = self.breaker.call(http_pool.get, url, timeout=self.timeout, params=params)
             self.record_call('ok')
             return r
         except pybreaker.CircuitBreakerError as e:
@@ -32,6 +32,8 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 import logging
 from jormungandr import utils, new_relic
 import abc
+import hashlib
+import json
 
 # Using abc.ABCMeta in a way it is compatible both with Python 2.7 and Python 3.x
 # http://stackoverflow.com/a/38668373/1614576
@@ -50,6 +52,9 @@ StreetNetworkPathKey = namedtuple('StreetNetworkPathKey', ['mode', 'orig_uri', '
 
 
 class AbstractStreetNetworkService(ABC):
+    # hash of the configuration of the service, set by StreetNetwork.get_street_network_services
+    config_hash = None
+
     @abc.abstractmethod
     def get_street_network_routing_matrix(self, origins, destinations, street_network_mode, max_duration, request, **kwargs):
         pass
@@ -135,7 +140,20 @@ class StreetNetwork(object):
                 raise KeyError('impossible to build a StreetNetwork, missing mandatory field in configuration: {}'
                                .format(e.message))
 
+            service.config_hash = _config_hash(config)
             street_network_services.append(service)
             log.info('** StreetNetwork {} used for direct_path with mode: {} **'
                      .format(type(service).__name__, service.modes))
         return street_network_services
+
+
+def _config_hash(config):
+    """
+    hash of the configuration of a street network service (class, url, costing options...)
+
+    the results of the service shared between the requests through the cache depend on it, they must not be
+    used anymore if the configuration changes
+    """
+    args = {k: v for k, v in config['args'].items() if k != 'instance'}
+    raw_config = json.dumps(dict(config, args=args), sort_keys=True, default=repr)
+    return hashlib.md5(raw_config.encode('utf-8')).hexdigest()
@@ -177,3 +177,28 @@ def valhalla_class_with_class_not_exist_test():
             }
         }]
         StreetNetwork.get_street_network_services(None, kraken_conf)
+
+
+def config_hash_test():
+    """
+    the services built with the same configuration have the same hash, whatever the instance
+    """
+    def valhalla_conf(walking_speed):
+        return [{
+            'modes': ALL_MODES,
+            'class': VALHALLA_CLASS,
+            'args': {
+                "service_url": "http://localhost:8002",
+                "costing_options": {
+                    "pedestrian": {
+                        "walking_speed": walking_speed
+                    }
+                }
+            }
+        }]
+    service = StreetNetwork.get_street_network_services(None, valhalla_conf(50.1))[0]
+    assert service.config_hash
+    assert StreetNetwork.get_street_network_services(object(), valhalla_conf(50.1))[0].config_hash == \
+        service.config_hash
+    assert StreetNetwork.get_street_network_services(None, valhalla_conf(4.2))[0].config_hash != \
+        service.config_hash
@@ -32,7 +32,7 @@ from navitiacommon import response_pb2
 import logging
 import pybreaker
 import requests as requests
-from jormungandr import app
+from jormungandr import app, http_pool
 import json
 from jormungandr.exceptions import TechnicalError, InvalidArguments, ApiNotFound
 from jormungandr.utils import is_url, kilometers_to_meters, get_pt_object_coord, decode_polyline
@@ -84,7 +84,7 @@ class Valhalla(AbstractStreetNetworkService):
                                     'reset_timeout': self.breaker.reset_timeout},
             }
 
-    def _call_valhalla(self, url, method=requests.post, data=None):
+    def _call_valhalla(self, url, method=http_pool.post, data=None):
         logging.getLogger(__name__).debug('Valhalla routing service , call url : {}'.format(url))
         logging.getLogger(__name__).debug('data : {}'.format(data))
         headers = {}
@@ -260,7 +260,7 @@ class Valhalla(AbstractStreetNetworkService):
 
     def _direct_path(self, mode, pt_object_origin, pt_object_destination, fallback_extremity, request, direct_path_type):
         data = self._make_request_arguments(mode, [pt_object_origin], [pt_object_destination], request, api='route')
-        r = self._call_valhalla('{}/{}'.format(self.service_url, 'route'), requests.post, data)
+        r = self._call_valhalla('{}/{}'.format(self.service_url, 'route'), http_pool.post, data)
         if r is not None and r.status_code == 400 and r.json()['error_code'] == 442:
             # error_code == 442 => No path could be found for input
             resp = response_pb2.Response()
@@ -300,7 +300,7 @@ class Valhalla(AbstractStreetNetworkService):
                 raise TechnicalError('routing matrix error, no unique center point')
 
         data = self._make_request_arguments(mode, origins, destinations, request, api='sources_to_targets')
-        r = self._call_valhalla('{}/{}'.format(self.service_url, 'sources_to_targets'), requests.post, data)
+        r = self._call_valhalla('{}/{}'.format(self.service_url, 'sources_to_targets'), http_pool.post, data)
         self._check_response(r)
         resp_json = r.json()
         return self._get_matrix(resp_json, mode_park_cost=self.mode_park_cost.get(mode))
@@ -30,10 +30,16 @@
 # www.navitia.io
 from __future__ import absolute_import, print_function, unicode_literals, division
 from jormungandr import app
-from jormungandr.authentication import get_token, get_used_coverages, register_used_coverages
+from jormungandr.authentication import get_token, get_used_coverages, register_used_coverages, has_access, \
+    get_user_from_token, get_app_name
+from jormungandr.authorization_table import AuthorizationSnapshot, AuthorizationTable
+from jormungandr.exceptions import RegionNotFound
+from jormungandr.tests.utils_test import FakeUser
 import base64
+import datetime
+import mock
 import pytest
-from werkzeug.exceptions import Unauthorized
+from werkzeug.exceptions import Unauthorized, Forbidden
 
 def get_token_direct_test():
     with app.test_request_context('/', headers={'Authorization': 'mykey'}):
@@ -74,3 +80,81 @@ def get_used_coverages_test():
         register_used_coverages('fr-bre')
         assert get_used_coverages() == ['fr-bre']
 
+
+def authorization_snapshot():
+    users = [FakeUser('bob', 1), FakeUser('tgv', 2, have_access_to_free_instances=False)]
+    keys = [('bob_key', 1, None, 'bob_app'), ('old_tgv_key', 2, datetime.date(2000, 1, 1), None)]
+    instances = [(10, 'fr-idf', False), (11, 'fr-bre', True)]
+    apis = [(1, 'ALL'), (2, 'journeys')]
+    authorizations = [(1, 10, 2), (2, 10, 1)]
+    return AuthorizationSnapshot(users, keys, instances, apis, authorizations)
+
+
+def has_access_with_authorization_table_test():
+    """
+    the authorizations are read from the in-memory snapshot, the db is never used
+    """
+    snapshot = authorization_snapshot()
+    bob, tgv = snapshot.users[1], snapshot.users[2]
+    with mock.patch('jormungandr.authentication.get_authorization_snapshot', return_value=snapshot), \
+            mock.patch('jormungandr.authentication.cache_has_access', side_effect=AssertionError), \
+            mock.patch.dict(app.config, {'PUBLIC': False}), app.test_request_context('/'):
+        assert has_access('fr-idf', 'journeys', abort=False, user=bob)
+        assert not has_access('fr-idf', 'ALL', abort=False, user=bob)
+        assert has_access('fr-bre', 'ALL', abort=False, user=bob)
+        assert has_access('fr-idf', 'ALL', abort=False, user=tgv)
+        assert not has_access('fr-bre', 'ALL', abort=False, user=tgv)
+        assert not has_access('fr-nw', 'ALL', abort=False, user=bob)
+
+        with pytest.raises(Forbidden):
+            has_access('fr-bre', 'ALL', abort=True, user=tgv)
+        with pytest.raises(RegionNotFound):
+            has_access('fr-nw', 'ALL', abort=True, user=bob)
+
+
+def get_user_with_authorization_table_test():
+    snapshot = authorization_snapshot()
+    with mock.patch('jormungandr.authentication.get_authorization_snapshot', return_value=snapshot), \
+            mock.patch('jormungandr.authentication.cache_get_user', return_value='user_from_db') as cache_get_user:
+        assert get_user_from_token('bob_key').login == 'bob'
+        # expired token
+        assert get_user_from_token('old_tgv_key') is None
+        assert not cache_get_user.called
+        # the token may have been created after the loading of the snapshot
+        assert get_user_from_token('new_key') == 'user_from_db'
+
+        assert get_app_name('bob_key') == 'bob_app'
+
+
+def authorization_table_update_test():
+    """
+    only the changes are read from the db, unless they cannot be applied on the snapshot
+    """
+    table = AuthorizationTable(app, refresh_period=60, full_reload_period=3600)
+    full_snapshot, updated_snapshot = authorization_snapshot(), authorization_snapshot()
+    with mock.patch.object(table, '_load', return_value=full_snapshot) as load, \
+            mock.patch.object(table, '_load_changes', return_value=updated_snapshot) as load_changes:
+        table.update()
+        assert table.snapshot is full_snapshot
+        assert not load_changes.called
+
+        table.update()
+        assert table.snapshot is updated_snapshot
+        assert load.call_count == 1
+        snapshot, since = load_changes.call_args[0]
+        assert snapshot is full_snapshot
+        # the rows changed a bit before the last update are read again
+        assert since < table.last_update
+
+        # the instances or the apis have changed
+        load_changes.return_value = None
+        table.update()
+        assert table.snapshot is full_snapshot
+        assert load.call_count == 2
+
+        # the whole table is also reloaded periodically
+        load_changes.reset_mock()
+        table.last_full_update -= datetime.timedelta(hours=2)
+        table.update()
+        assert load.call_count == 3
+        assert not load_changes.called
@@ -0,0 +1,82 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from six.moves import BaseHTTPServer, socketserver
+from jormungandr.http_connection_pool import HttpConnectionPool
+import pytest
+import threading
+
+
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = str('HTTP/1.1')
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header(str('Content-Length'), str(len(body)))
+        self.send_header(str('Set-Cookie'), str('session=bob'))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadedServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadedServer((str('127.0.0.1'), 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:{}/'.format(server.server_port)
+    server.shutdown()
+
+
+def connections_reused_test(server_url):
+    pool = HttpConnectionPool()
+    for _ in range(5):
+        assert pool.get(server_url, timeout=1).text == 'ok'
+    assert pool.post(server_url, data='{}', timeout=1).text == 'ok'
+
+    status = pool.status()
+    assert len(status) == 1
+    assert status[0]['connections_created'] == 1
+    assert status[0]['requests'] == 6
+
+
+def cookies_not_kept_test(server_url):
+    pool = HttpConnectionPool()
+    pool.get(server_url, timeout=1)
+    assert len(pool.session.cookies) == 0
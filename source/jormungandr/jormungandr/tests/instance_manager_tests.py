@@ -29,14 +29,22 @@
 from __future__ import absolute_import, print_function, unicode_literals, division
 
 from jormungandr import InstanceManager
-from pytest import fixture
+from jormungandr.instance_manager import choose_best_instance
+from jormungandr.exceptions import RegionNotFound
+from jormungandr.local_cache import LocalCache
+from pytest import fixture, raises
+from shapely import geometry
+import flask
+import gevent
 from pytest_mock import mocker
 
 from jormungandr import app
 
 class FakeInstance():
-    def __init__(self, name):
+    def __init__(self, name, geom=None):
         self.name = name
+        self.geom = geom
+        self.is_healthy = True
 
 @fixture
 def manager():
@@ -75,3 +83,166 @@ def get_instances_by_object_id_test(manager, mocker):
         assert mock.called
 
 
+
+def get_instances_by_ids_test(manager, mocker):
+    keys = {'sa:pdl': ['pdl'], 'sa:paris': ['paris'], 'sa:both': ['paris', 'pdl']}
+    mock = mocker.patch.object(manager, '_all_keys_of_id', side_effect=lambda object_id: keys[object_id])
+    with app.test_request_context('/'):
+        instances_by_id = manager.get_instances_by_ids(['sa:pdl', 'sa:both', 'sa:paris', 'sa:pdl'])
+        assert len(instances_by_id) == 3
+        assert ['pdl'] == [i.name for i in instances_by_id['sa:pdl']]
+        assert ['paris'] == [i.name for i in instances_by_id['sa:paris']]
+        assert {'paris', 'pdl'} == {i.name for i in instances_by_id['sa:both']}
+        # the duplicated id is only looked for once
+        assert mock.call_count == 3
+
+
+def get_instances_by_ids_not_found_test(manager, mocker):
+    """
+    the ids are looked for concurrently, but the error is always the one of the first id not found
+    """
+    def all_keys_of_id(object_id):
+        # the request context is available in the greenlets
+        assert flask.request.path == '/v1/journeys'
+        if object_id == 'sa:paris':
+            # the first id is the last one to fail
+            gevent.sleep(0.01)
+        raise RegionNotFound(object_id=object_id)
+
+    mocker.patch.object(manager, '_all_keys_of_id', side_effect=all_keys_of_id)
+    with app.test_request_context('/v1/journeys'):
+        with raises(RegionNotFound) as e:
+            manager.get_instances_by_ids(['sa:paris', 'sa:pdl'])
+        assert 'sa:paris' in e.value.data['error']['message']
+
+def all_keys_of_coords_test(manager):
+    manager.instances['paris'].geom = geometry.box(2, 48, 3, 49)
+    manager.instances['pdl'].geom = geometry.box(-3, 46, 2.5, 48.5)
+
+    keys = manager._all_keys_of_coords([(2.3, 48.8), (2.4, 48.4), (-1.5, 47.2), (5, 45)])
+    assert keys[0] == ['paris']
+    assert set(keys[1]) == {'paris', 'pdl'}
+    assert keys[2] == ['pdl']
+    assert keys[3] == []
+    with raises(RegionNotFound):
+        manager._all_keys_of_coord(5, 45)
+
+    # the index is rebuilt when a geometry changes
+    manager.instances['paris'].geom = geometry.box(4, 44, 6, 46)
+    assert manager._all_keys_of_coord(5, 45) == ['paris']
+    assert manager._all_keys_of_coords([(2.3, 48.8)]) == [[]]
+
+def find_external_code_test(manager, mocker):
+    manager.external_codes_cache = LocalCache(max_size=10, ttl=600)
+    manager.instances['paris'].publication_date = 1
+    manager.instances['pdl'].publication_date = 1
+
+    def has_external_code(region, delay, uri):
+        def get(type_, external_code):
+            # the request context is available in the greenlets
+            assert flask.request.path == '/coverage'
+            gevent.sleep(delay)
+            return uri
+        return mocker.patch.object(manager.instances[region], 'has_external_code', side_effect=get, create=True)
+
+    slow_paris = has_external_code('paris', 5, 'stop_area:paris:42')
+    pdl = has_external_code('pdl', 0, 'stop_area:pdl:42')
+    with app.test_request_context('/coverage'):
+        # the first region answering is used, the other request is cancelled
+        with gevent.Timeout(1):
+            assert manager.find_external_code('stop_area', '42') == ('pdl', 'stop_area:pdl:42')
+
+        # the result is cached
+        assert manager.find_external_code('stop_area', '42') == ('pdl', 'stop_area:pdl:42')
+        assert pdl.call_count == 1
+
+        # until the data of the region are reloaded
+        manager.instances['pdl'].publication_date = 2
+        has_external_code('pdl', 0, None)
+        has_external_code('paris', 0, 'stop_area:paris:42')
+        assert manager.find_external_code('stop_area', '42') == ('paris', 'stop_area:paris:42')
+
+        has_external_code('paris', 0, None)
+        assert manager.find_external_code('stop_area', '43') == (None, None)
+
+def regions_test(manager, mocker):
+    manager.instances['paris'].publication_date = 1
+    manager.instances['pdl'].publication_date = 1
+    manager.instances['empty'] = FakeInstance('empty')
+    manager.instances['empty'].publication_date = 1
+    metadata = {'paris': {'status': 'running', 'name': 'Paris'},
+                'pdl': {'status': 'dead'},
+                'empty': {'status': 'no_data'}}
+
+    def fetch_metadata(region, probe=False):
+        gevent.sleep(0.5)
+        return metadata[region]
+    fetch = mocker.patch.object(manager, '_fetch_metadata', side_effect=fetch_metadata)
+    with app.test_request_context('/'):
+        # the regions are queried concurrently
+        with gevent.Timeout(1):
+            response = manager.regions()
+        assert fetch.call_count == 3
+        # the regions without data are hidden
+        assert {r['region_id'] for r in response['regions']} == {'paris', 'pdl'}
+        paris = next(r for r in response['regions'] if r['region_id'] == 'paris')
+        assert paris['name'] == 'Paris'
+        assert paris['metadata_age'] == 0
+        # the snapshot is not modified by the response
+        assert 'region_id' not in manager.metadata_snapshot['paris'][0]
+
+        # then the regions are served from the snapshot
+        response = manager.regions(region='empty')
+        assert response['regions'][0]['status'] == 'no_data'
+        assert fetch.call_count == 3
+
+        # the outdated metadata are fetched again
+        manager.metadata_snapshot['paris'] = (metadata['paris'], 0)
+        metadata['paris'] = {'status': 'running', 'name': 'Paris 2'}
+        response = manager.regions(region='paris')
+        assert response['regions'][0]['name'] == 'Paris 2'
+        assert fetch.call_count == 4
+
+def refresh_metadata_test(manager, mocker):
+    manager.instances['paris'].publication_date = 1
+    manager.instances['pdl'].publication_date = 1
+    clear_cache = mocker.patch.object(manager, '_clear_cache')
+
+    def fetch_metadata(region, probe=False):
+        # the data of paris are reloaded
+        if region == 'paris':
+            manager.instances['paris'].publication_date = 2
+        return {'status': 'running', 'path': flask.request.path if flask.has_request_context() else None}
+    fetch = mocker.patch.object(manager, '_fetch_metadata', side_effect=fetch_metadata)
+
+    # for /coverage the request context is available in the greenlets
+    with app.test_request_context('/coverage'):
+        assert manager.refresh_metadata(['pdl']) == {'pdl': {'status': 'running', 'path': '/coverage'}}
+    assert set(manager.metadata_snapshot) == {'pdl'}
+    assert not clear_cache.called
+
+    # the monitoring thread probes the krakens
+    assert manager.refresh_metadata(probe=True)['paris']['path'] is None
+    assert set(manager.metadata_snapshot) == {'pdl', 'paris'}
+    assert clear_cache.called
+    fetch.assert_any_call('paris', True)
+
+def choose_best_instance_test():
+    def instance(name):
+        i = FakeInstance(name)
+        i.priority = 0
+        i.is_free = False
+        return i
+
+    first = instance('first')
+    second = instance('second')
+    # with the same priority, the last one wins
+    assert choose_best_instance([first, second]).name == 'second'
+
+    # an unhealthy instance is avoided
+    second.is_healthy = False
+    assert choose_best_instance([first, second]).name == 'first'
+
+    # unless there is nothing better
+    first.is_healthy = False
+    assert choose_best_instance([first, second]).name == 'second'
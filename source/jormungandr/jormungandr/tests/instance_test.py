@@ -0,0 +1,92 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from jormungandr import app
+from jormungandr.instance import Instance
+from navitiacommon import response_pb2, default_values
+import mock
+
+
+class FakeInstanceModel(object):
+    """
+    the parameters of an instance in the db, None means the default value
+    """
+    def __init__(self, **kwargs):
+        self.is_free = False
+        self.is_open_data = False
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, attr):
+        return None
+
+
+def create_instance():
+    return Instance(None, 'test_instance', 'ipc:///tmp/test_instance', [], None, [], 'persistent', 'kraken')
+
+
+def get_parameters_test():
+    """
+    the parameters are read from the db only when the snapshot has expired or new data have been loaded
+    """
+    instance = create_instance()
+    instance_db = FakeInstanceModel(walking_speed=1.5)
+    now = [1000]
+    with mock.patch.object(instance, 'get_models', return_value=instance_db) as get_models, \
+            mock.patch('jormungandr.instance.time.time', lambda: now[0]), \
+            mock.patch.dict(app.config, {'INSTANCE_PARAMETERS_REFRESH_S': 60}), \
+            app.test_request_context('/'):
+        assert instance.walking_speed == 1.5
+        assert instance.bike_speed == default_values.bike_speed
+        assert get_models.call_count == 1
+
+        # the snapshot is still fresh, the db is not read
+        instance_db.walking_speed = 2
+        now[0] = 1059
+        assert instance.walking_speed == 1.5
+        assert get_models.call_count == 1
+
+        # the snapshot has expired
+        now[0] = 1061
+        assert instance.walking_speed == 2
+        assert get_models.call_count == 2
+
+        # new data have been loaded by kraken
+        instance_db.walking_speed = 3
+        response = response_pb2.Response()
+        response.publication_date = 42
+        response.metadatas.timezone = 'Europe/Paris'
+        instance.update_property(response)
+        assert instance.walking_speed == 3
+        assert get_models.call_count == 3
+
+        # the same data are not reloaded
+        instance_db.walking_speed = 4
+        instance.update_property(response)
+        assert instance.walking_speed == 3
+        assert get_models.call_count == 3
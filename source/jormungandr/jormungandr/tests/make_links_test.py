@@ -0,0 +1,54 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from jormungandr import app
+from jormungandr.interfaces.v1.make_links import create_external_link, external_link_builder
+from six.moves.urllib.parse import urlparse, parse_qs
+
+
+def _parse_link(link):
+    href = urlparse(link.pop('href'))
+    return href.path, parse_qs(href.query), link
+
+
+def external_link_builder_test():
+    with app.test_request_context('/'):
+        args = {'from': 'stop_area:A', 'allowed_id[]': ['x', 'y'], 'count': 3, 'not_given': None}
+        for path_kwargs in ({'region': 'main_routing_test'}, {}):
+            builder = external_link_builder('v1.journeys', **path_kwargs)
+            link = builder(rel='same_journey_schedules', _type='journeys', **args)
+            expected = create_external_link('v1.journeys', rel='same_journey_schedules', _type='journeys',
+                                            **dict(path_kwargs, **args))
+            assert _parse_link(link) == _parse_link(expected)
+
+        # without query args
+        builder = external_link_builder('v1.journeys', region='main_routing_test')
+        assert builder(rel='journeys') == create_external_link('v1.journeys', rel='journeys',
+                                                               region='main_routing_test')
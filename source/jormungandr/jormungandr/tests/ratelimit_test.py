@@ -0,0 +1,175 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+from navitiacommon.ratelimit import RateLimiter
+import mock
+import pytest
+import redis
+import uuid
+
+
+@pytest.fixture
+def limiter():
+    """
+    a RateLimiter with a mocked redis, the result of the lua script is given by the test
+    """
+    with mock.patch('navitiacommon.ratelimit.redis.Redis') as redis, \
+            mock.patch('navitiacommon.ratelimit.time.time', return_value=1000.0) as now:
+        limiter = RateLimiter(conditions=[{'requests': 10, 'seconds': 1}, (100, 60)], redis_namespace='test')
+        limiter.script = redis.return_value.register_script.return_value
+        limiter.now = now
+        yield limiter
+
+
+def acquire_allowed_test(limiter):
+    limiter.script.return_value = [1, '0', -1]
+    assert limiter.acquire('tata', block=False)
+
+    limiter.script.assert_called_once_with(keys=['test:tata:log', 'test:tata:block'],
+                                           args=[1000.0, 60, 10, 1, 100, 60])
+
+
+def acquire_over_the_limit_test(limiter):
+    limiter.script.return_value = [0, '0.5', 1]
+    assert not limiter.acquire('tata', block=False)
+    assert limiter.script.call_count == 1
+
+    # the key is still limited, redis is not called
+    limiter.now.return_value = 1000.4
+    assert limiter._make_ping('tata') == (False, pytest.approx(0.1))
+    assert limiter.script.call_count == 1
+
+    # another key is not limited
+    limiter.script.return_value = [1, '0', -1]
+    assert limiter.acquire('toto', block=False)
+    assert limiter.script.call_count == 2
+
+    # redis is asked again once the waiting time is over
+    limiter.now.return_value = 1000.6
+    assert limiter.acquire('tata', block=False)
+    assert limiter.script.call_count == 3
+
+
+def acquire_manual_block_test(limiter):
+    limiter.script.return_value = [0, '30', -1]
+    assert limiter._make_ping('tata') == (False, 30.0)
+
+    limiter.now.return_value = 1029
+    assert not limiter.acquire('tata', block=False)
+    assert limiter.script.call_count == 1
+
+
+def block_test(limiter):
+    """
+    a key blocked by this limiter is refused without asking redis
+    """
+    assert limiter.block('tata', minutes=1) == 60
+    limiter.redis.pipeline.return_value.__enter__.return_value.expire.assert_called_once_with('test:tata:block', 60)
+
+    assert not limiter.acquire('tata', block=False)
+    assert not limiter.script.called
+
+
+def acquire_blocking_test(limiter):
+    """
+    a blocking acquire waits for the time given by redis
+    """
+    def sleep(seconds):
+        limiter.now.return_value += seconds
+
+    limiter.script.side_effect = [[0, '0.5', 0], [1, '0', -1]]
+    with mock.patch('navitiacommon.ratelimit.sleep', side_effect=sleep) as mock_sleep:
+        assert limiter.acquire('tata')
+    mock_sleep.assert_called_once_with(0.5)
+    assert limiter.script.call_count == 2
+
+
+@pytest.fixture
+def redis_limiter():
+    """
+    a RateLimiter on a real redis (localhost:6379) to check the lua script, the tests are skipped without redis
+    """
+    limiter = RateLimiter(conditions=[(2, 10), (3, 60)], redis_namespace='test_{}'.format(uuid.uuid4().hex))
+    try:
+        limiter.redis.ping()
+    except redis.ConnectionError:
+        pytest.skip('no redis available')
+    with mock.patch('navitiacommon.ratelimit.time.time', return_value=1000.0) as now:
+        limiter.now = now
+        yield limiter
+    for key in limiter.redis.keys('{}:*'.format(limiter.namespace)):
+        limiter.redis.delete(key)
+
+
+def redis_limit_test(redis_limiter):
+    """
+    the script refuses a request over one of the conditions and gives the time to wait
+    """
+    assert redis_limiter.acquire('tata', block=False)
+    redis_limiter.now.return_value = 1004.0
+    assert redis_limiter.acquire('tata', block=False)
+
+    # 2 requests in 10s
+    redis_limiter.now.return_value = 1006.0
+    assert redis_limiter._make_ping('tata') == (False, pytest.approx(4.0))
+    # another key is not limited
+    assert redis_limiter.acquire('toto', block=False)
+
+    redis_limiter.now.return_value = 1010.0
+    assert redis_limiter.acquire('tata', block=False)
+
+    # 3 requests in 60s
+    redis_limiter.now.return_value = 1015.0
+    assert redis_limiter._make_ping('tata') == (False, pytest.approx(45.0))
+
+
+def redis_block_test(redis_limiter):
+    """
+    a key blocked by another limiter (in another process) is refused by the script until the end of the block
+    """
+    other_limiter = RateLimiter(conditions=redis_limiter.conditions, redis_namespace=redis_limiter.namespace)
+    other_limiter.block('tata', seconds=30)
+
+    assert redis_limiter._make_ping('tata') == (False, pytest.approx(30, abs=1))
+    # a refused request is not logged
+    assert not redis_limiter.redis.exists('{}:tata:log'.format(redis_limiter.namespace))
+    assert redis_limiter.acquire('toto', block=False)
+
+
+def redis_trim_test(redis_limiter):
+    """
+    the log of a key keeps only the requests needed by the biggest condition and expires after the longest one
+    """
+    for i in range(5):
+        redis_limiter.now.return_value = 1000.0 + 100 * i
+        assert redis_limiter.acquire('tata', block=False)
+
+    log_key = '{}:tata:log'.format(redis_limiter.namespace)
+    assert [float(t) for t in redis_limiter.redis.lrange(log_key, 0, -1)] == [1400.0, 1300.0, 1200.0]
+    assert 0 < redis_limiter.redis.ttl(log_key) <= 60
@@ -0,0 +1,132 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+import gevent
+import logging
+import mock
+import time
+from jormungandr import app
+from jormungandr.schedule import MixedSchedule
+
+
+class FakeInstance(object):
+    def __init__(self, proxies, realtime_pool_size=2):
+        self.realtime_pool_size = realtime_pool_size
+        self.realtime_proxy_manager = proxies
+
+
+class FakeProxy(object):
+    def __init__(self, rt_system_id, delay, max_batch_size=1):
+        self.rt_system_id = rt_system_id
+        self.delay = delay
+        self.max_batch_size = max_batch_size
+        self.nb_calls = 0
+
+    def next_passages_for_route_points(self, route_points, *args):
+        self.nb_calls += 1
+        gevent.sleep(self.delay)
+        return [[route_point] for route_point in route_points]
+
+
+def fetch_realtime_passages(delays, global_timeout, route_points=None, proxies=None):
+    # a route point without delay has no realtime proxy
+    if proxies is None:
+        proxies = {name: FakeProxy(name, delay) for name, delay in delays.items() if delay is not None}
+    schedule = MixedSchedule(FakeInstance(proxies))
+    # the route point is named by its proxy and an optional suffix: "proxy:suffix"
+    schedule._get_realtime_proxy = lambda route_point: proxies.get(route_point.split(':')[0])
+    request = {'items_per_schedule': 1, 'from_datetime': None, '_current_datetime': None,
+               'duration': 3600, 'timezone': None}
+    app.config['REALTIME_PROXY_GLOBAL_TIMEOUT_S'] = global_timeout
+    try:
+        with app.test_request_context():
+            route_points = route_points or sorted(delays)
+            route_points_by_proxy = schedule._get_route_points_by_proxy((rp, 'payload') for rp in route_points)
+            return schedule._fetch_realtime_passages(request, route_points_by_proxy)
+    finally:
+        app.config['REALTIME_PROXY_GLOBAL_TIMEOUT_S'] = 0
+
+
+def fetch_realtime_passages_concurrently_test():
+    """
+    4 proxies of 0.1s on a pool of 2 take 0.2s, not 0.4s
+    """
+    start = time.time()
+    res = fetch_realtime_passages({'a': 0.1, 'b': 0.1, 'c': 0.1, 'd': 0.1}, global_timeout=0)
+    assert time.time() - start < 0.35
+
+    assert sorted(r[1] for r in res) == ['a', 'b', 'c', 'd']
+    for rt_proxy, route_point, payload, passages in res:
+        assert rt_proxy.rt_system_id == route_point
+        assert payload == 'payload'
+        assert passages == [route_point]
+
+
+def fetch_realtime_passages_deadline_test():
+    """
+    the slow proxy is abandoned when the deadline is reached, its route point keeps its base schedule
+    """
+    res = fetch_realtime_passages({'fast': 0.01, 'slow': 5, 'unknown': None}, global_timeout=0.2)
+    assert [r[1] for r in res] == ['fast']
+
+
+def fetch_realtime_passages_no_proxy_test():
+    res = fetch_realtime_passages({}, global_timeout=0.2)
+    assert res == []
+
+
+def fetch_realtime_passages_batch_test():
+    """
+    the route points of a proxy are queried by batches of its max_batch_size
+    """
+    proxies = {'a': FakeProxy('a', 0.01, max_batch_size=2), 'b': FakeProxy('b', 0.01)}
+    route_points = ['a:1', 'a:2', 'a:3', 'b:1', 'b:2']
+    res = fetch_realtime_passages({}, global_timeout=0, route_points=route_points, proxies=proxies)
+
+    assert proxies['a'].nb_calls == 2
+    assert proxies['b'].nb_calls == 2
+    assert sorted(r[1] for r in res) == route_points
+    for rt_proxy, route_point, payload, passages in res:
+        assert route_point.startswith(rt_proxy.rt_system_id)
+        assert passages == [route_point]
+
+
+def fetch_realtime_passages_late_count_test():
+    """
+    the route points whose call was never spawned before the deadline are counted as late too
+    """
+    proxies = {'slow': FakeProxy('slow', 5)}
+    route_points = ['slow:1', 'slow:2', 'slow:3']
+    with mock.patch.object(logging.getLogger('jormungandr.schedule'), 'warning') as warning:
+        res = fetch_realtime_passages({}, global_timeout=0.1, route_points=route_points, proxies=proxies)
+
+    assert res == []
+    # with a pool of 2, only 2 calls have been spawned
+    assert proxies['slow'].nb_calls == 2
+    warning.assert_called_once_with('realtime proxies too slow, 3 route points abandoned')
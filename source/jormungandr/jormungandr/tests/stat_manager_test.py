@@ -0,0 +1,101 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+import gevent
+import gevent.queue
+from jormungandr.stat_manager import StatManager
+
+
+class PublishMock(object):
+    def __init__(self, nb_failures=0):
+        self.published = []
+        self.nb_failures = nb_failures
+
+    def __call__(self, api, pbf):
+        if self.nb_failures and len(self.published) == 1:
+            self.nb_failures -= 1
+            raise Exception('rabbitmq is down')
+        self.published.append((api, pbf))
+
+
+def get_stat_manager(mocker, publish, queue_size=10):
+    manager = StatManager()
+    manager.queue = gevent.queue.Queue(maxsize=queue_size)
+    mocker.patch.object(manager, 'publish_request', side_effect=publish)
+    return manager
+
+
+def publish_in_background_test(mocker):
+    publish = PublishMock()
+    manager = get_stat_manager(mocker, publish)
+
+    for i in range(5):
+        manager._publish('v1.journeys', str(i))
+    # nothing is published while the request is running
+    assert publish.published == []
+    assert manager.status()['queue_size'] == 5
+
+    gevent.sleep(0.01)
+    assert publish.published == [('v1.journeys', str(i)) for i in range(5)]
+    status = manager.status()
+    assert status['queue_size'] == 0
+    assert status['published'] == 5
+    assert status['dropped'] == 0
+    assert status['last_publish_latency'] is not None
+
+
+def drop_when_queue_full_test(mocker):
+    publish = PublishMock()
+    manager = get_stat_manager(mocker, publish, queue_size=2)
+
+    for i in range(3):
+        manager._publish('v1.journeys', str(i))
+    assert manager.status()['dropped'] == 1
+
+    gevent.sleep(0.01)
+    assert publish.published == [('v1.journeys', '0'), ('v1.journeys', '1')]
+
+
+def retry_does_not_publish_twice_test(mocker):
+    publish = PublishMock(nb_failures=1)
+    manager = get_stat_manager(mocker, publish)
+
+    manager._publish_batch([('v1.journeys', str(i)) for i in range(3)])
+    assert publish.published == [('v1.journeys', str(i)) for i in range(3)]
+    assert manager.status()['published'] == 3
+
+
+def synchronous_publication_test(mocker):
+    publish = PublishMock()
+    manager = get_stat_manager(mocker, publish)
+    manager.queue = None
+
+    manager._publish('v1.journeys', 'pbf')
+    assert publish.published == [('v1.journeys', 'pbf')]
+    assert manager.status()['asynchronous'] is False
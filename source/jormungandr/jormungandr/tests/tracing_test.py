@@ -0,0 +1,83 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+from __future__ import absolute_import, print_function, unicode_literals, division
+import gevent
+from jormungandr.tracing import Tracer
+
+
+def span_in_spawned_greenlet_test():
+    """
+    the spans of a greenlet are traced with the request only if its function is bound
+    """
+    tracer = Tracer()
+
+    def worker():
+        with tracer.span('worker'):
+            pass
+
+    tracer.start_request('journeys')
+    gevent.spawn(tracer.bind(worker)).join()
+    gevent.spawn(worker).join()
+    tracer.finish_request()
+
+    spans = tracer.stats()['journeys']['spans']
+    assert spans['worker']['count'] == 1
+    assert spans['request']['count'] == 1
+
+
+def disabled_tracer_test():
+    tracer = Tracer(enabled=False)
+    tracer.start_request('journeys')
+    with tracer.span('kraken'):
+        pass
+    tracer.finish_request()
+    assert tracer.stats() == {}
+
+
+def profiling_sample_test():
+    """
+    one request out of profiling_sample_rate is profiled
+    """
+    tracer = Tracer(profiling_sample_rate=2)
+
+    def compute():
+        return sum(range(100))
+
+    for _ in range(3):
+        tracer.start_request('journeys')
+        compute()
+        tracer.finish_request()
+
+    stats = tracer.stats()['journeys']
+    assert stats['spans']['request']['count'] == 3
+    assert stats['profile']['nb_requests'] == 2
+    assert any('compute' in f['function'] for f in stats['profile']['functions'])
+
+    tracer.reset()
+    assert tracer.stats() == {}
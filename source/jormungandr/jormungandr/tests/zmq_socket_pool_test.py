@@ -0,0 +1,128 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from jormungandr.zmq_socket_pool import ZmqSocketPool
+from zmq import green as zmq
+import gevent
+
+
+def _echo_server(context, address, nb_requests):
+    socket = context.socket(zmq.REP)
+    socket.bind(address)
+
+    def serve():
+        for _ in range(nb_requests):
+            socket.send(b'echo ' + socket.recv())
+
+    return gevent.spawn(serve)
+
+
+def socket_reused_test():
+    context = zmq.Context()
+    server = _echo_server(context, 'inproc://socket_reused', 2)
+    pool = ZmqSocketPool(context, 'inproc://socket_reused')
+
+    assert pool.send_and_receive(b'a', 1000) == b'echo a'
+    assert pool.send_and_receive(b'b', 1000) == b'echo b'
+    server.join()
+
+    status = pool.status()
+    assert status['created'] == 1
+    assert status['idle'] == 1
+    assert status['in_use'] == 0
+    assert status['requests'] == 2
+
+
+def socket_closed_on_timeout_test():
+    context = zmq.Context()
+    server = _echo_server(context, 'inproc://socket_timeout', 1)
+    pool = ZmqSocketPool(context, 'inproc://socket_timeout')
+
+    assert pool.send_and_receive(b'a', 1000) == b'echo a'
+    server.join()
+    # nobody answers anymore
+    assert pool.send_and_receive(b'b', 10) is None
+
+    status = pool.status()
+    assert status['timeouts'] == 1
+    assert status['closed'] == 1
+    assert status['idle'] == 0
+
+
+def max_idle_sockets_test():
+    context = zmq.Context()
+    server = _echo_server(context, 'inproc://max_idle', 3)
+    pool = ZmqSocketPool(context, 'inproc://max_idle', max_idle_sockets=1)
+
+    workers = [gevent.spawn(pool.send_and_receive, b'a', 1000) for _ in range(3)]
+    gevent.joinall(workers)
+    server.join()
+
+    assert all(w.value == b'echo a' for w in workers)
+    status = pool.status()
+    assert status['created'] == 3
+    assert status['idle'] == 1
+    assert status['closed'] == 2
+
+
+def transient_socket_test():
+    context = zmq.Context()
+    server = _echo_server(context, 'inproc://transient', 2)
+    pool = ZmqSocketPool(context, 'inproc://transient', transient=True)
+
+    assert pool.send_and_receive(b'a', 1000) == b'echo a'
+    assert pool.send_and_receive(b'b', 1000) == b'echo b'
+    server.join()
+
+    status = pool.status()
+    assert status['created'] == 2
+    assert status['closed'] == 2
+    assert status['idle'] == 0
+
+
+def warm_up_test():
+    context = zmq.Context()
+    server = _echo_server(context, 'inproc://warm_up', 1)
+    pool = ZmqSocketPool(context, 'inproc://warm_up', max_idle_sockets=2)
+
+    pool.warm_up(3)
+    status = pool.status()
+    assert status['created'] == 2
+    assert status['idle'] == 2
+
+    # the warm sockets are used by the requests
+    assert pool.send_and_receive(b'a', 1000) == b'echo a'
+    server.join()
+    pool.warm_up(2)
+    assert pool.status()['created'] == 2
+
+    transient_pool = ZmqSocketPool(context, 'inproc://warm_up', transient=True)
+    transient_pool.warm_up(2)
+    assert transient_pool.status()['created'] == 0
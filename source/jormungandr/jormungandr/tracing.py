@@ -0,0 +1,239 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from contextlib import contextmanager
+from functools import wraps
+from threading import Lock
+import cProfile
+import itertools
+import logging
+import pstats
+import time
+import gevent.local
+from jormungandr import app
+
+
+class SpanStats(object):
+    """
+    aggregated durations of a span, in seconds
+    """
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_duration': self.total,
+            'mean_duration': self.total / self.count if self.count else 0.,
+            'max_duration': self.max,
+        }
+
+
+class _Trace(object):
+    __slots__ = ('endpoint', 'start', 'profile')
+
+    def __init__(self, endpoint, start):
+        self.endpoint = endpoint
+        self.start = start
+        self.profile = None
+
+
+class Tracer(object):
+    """
+    Aggregate in memory, by endpoint, the durations of the spans of the requests
+
+    A request is traced between start_request and finish_request, the spans are the timed blocks (kraken calls,
+    street network, realtime proxies, scenario stages, serialization) made during it. The spans made in a greenlet
+    spawned by the request are traced only if the greenlet's function has been wrapped by bind().
+    Nothing is recorded outside of a traced request.
+
+    With a profiling_sample_rate of N, one request out of N is profiled with cProfile and the profiles are
+    aggregated by endpoint. Only one request is profiled at a time: cProfile profiles the whole thread, so the work
+    of the other greenlets during the request is part of the profile.
+
+    >>> now = [0]
+    >>> tracer = Tracer(timer=lambda: now[0])
+    >>> tracer.start_request('journeys')
+    >>> with tracer.span('kraken'):
+    ...     now[0] += 2
+    >>> with tracer.span('kraken'):
+    ...     now[0] += 4
+    >>> tracer.finish_request()
+    >>> with tracer.span('kraken'):  # outside of a request
+    ...     now[0] += 1
+    >>> stats = tracer.stats()['journeys']['spans']
+    >>> stats['kraken']['count'], stats['kraken']['mean_duration'], stats['kraken']['max_duration']
+    (2, 3.0, 4)
+    >>> stats['request']['total_duration']
+    6.0
+    """
+    def __init__(self, enabled=True, profiling_sample_rate=0, profiling_nb_functions=30, timer=time.time):
+        self.enabled = enabled
+        self.profiling_sample_rate = profiling_sample_rate
+        self.profiling_nb_functions = profiling_nb_functions
+        self._timer = timer
+        self._local = gevent.local.local()
+        self._lock = Lock()
+        self._spans = {}
+        self._profiles = {}
+        self._nb_profiled_requests = {}
+        self._request_counter = itertools.count()
+        self._profiling = False
+
+    def _current_trace(self):
+        return getattr(self._local, 'trace', None)
+
+    def start_request(self, endpoint):
+        if not self.enabled:
+            return
+        trace = _Trace(endpoint or 'unknown', self._timer())
+        if self.profiling_sample_rate > 0 and not self._profiling and \
+                next(self._request_counter) % self.profiling_sample_rate == 0:
+            self._profiling = True
+            trace.profile = cProfile.Profile()
+            trace.profile.enable()
+        self._local.trace = trace
+
+    def finish_request(self):
+        trace = self._current_trace()
+        if trace is None:
+            return
+        self._local.trace = None
+        if trace.profile:
+            trace.profile.disable()
+            self._profiling = False
+            self._add_profile(trace.endpoint, trace.profile)
+        self.record(trace.endpoint, 'request', self._timer() - trace.start)
+
+    def _add_profile(self, endpoint, profile):
+        try:
+            with self._lock:
+                if endpoint in self._profiles:
+                    self._profiles[endpoint].add(profile)
+                else:
+                    self._profiles[endpoint] = pstats.Stats(profile)
+                self._nb_profiled_requests[endpoint] = self._nb_profiled_requests.get(endpoint, 0) + 1
+        except Exception:
+            logging.getLogger(__name__).exception('impossible to aggregate the profile of a request')
+
+    def record(self, endpoint, name, duration):
+        with self._lock:
+            spans = self._spans.setdefault(endpoint, {})
+            if name not in spans:
+                spans[name] = SpanStats()
+            spans[name].add(duration)
+
+    @contextmanager
+    def span(self, name):
+        trace = self._current_trace()
+        if trace is None:
+            yield
+            return
+        start = self._timer()
+        try:
+            yield
+        finally:
+            self.record(trace.endpoint, name, self._timer() - start)
+
+    def traced(self, name):
+        """
+        decorator tracing all the calls of a function in a span
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def bind(self, f):
+        """
+        wrap a function that will be run in another greenlet to trace it with the current request
+        """
+        trace = self._current_trace()
+        if trace is None:
+            return f
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            self._local.trace = trace
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self._local.trace = None
+        return wrapper
+
+    def _profile_to_dict(self, endpoint):
+        stats = self._profiles.get(endpoint)
+        if not stats:
+            return None
+        functions = sorted(stats.stats.items(), key=lambda s: s[1][3], reverse=True)
+        return {
+            'nb_requests': self._nb_profiled_requests.get(endpoint, 0),
+            'functions': [{
+                'function': '{}:{}({})'.format(*func),
+                'nb_calls': nb_calls,
+                'total_time': total_time,
+                'cumulative_time': cumulative_time,
+            } for func, (_, nb_calls, total_time, cumulative_time, _) in functions[:self.profiling_nb_functions]]
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'spans': {name: s.to_dict() for name, s in spans.items()},
+                    'profile': self._profile_to_dict(endpoint),
+                } for endpoint, spans in self._spans.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._spans = {}
+            self._profiles = {}
+            self._nb_profiled_requests = {}
+
+
+tracer = Tracer(enabled=app.config.get('TRACING_ENABLED', False),
+                profiling_sample_rate=app.config.get('TRACING_PROFILING_SAMPLE_RATE', 0),
+                profiling_nb_functions=app.config.get('TRACING_PROFILING_NB_FUNCTIONS', 30))
+span = tracer.span
+traced = tracer.traced
+bind = tracer.bind
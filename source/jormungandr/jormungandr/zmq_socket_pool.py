@@ -0,0 +1,142 @@
+# Copyright (c) 2001-2018, Canal TP and/or its affiliates. All rights reserved.
+#
+# This file is part of Navitia,
+#     the software to build cool stuff with public transport.
+#
+# Hope you'll enjoy and contribute to this project,
+#     powered by Canal TP (www.canaltp.fr).
+# Help us simplify mobility and open public transport:
+#     a non ending quest to the responsive locomotion way of traveling!
+#
+# LICENCE: This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+# Stay tuned using
+# twitter @navitia
+# IRC #navitia on freenode
+# https://groups.google.com/d/forum/navitia
+# www.navitia.io
+
+from __future__ import absolute_import, print_function, unicode_literals, division
+from contextlib import contextmanager
+import queue
+from zmq import green as zmq
+
+
+class ZmqSocketPool(object):
+    """
+    A pool of zmq REQ sockets connected to the same address (a kraken or an asgard)
+
+    The REQ/REP protocol is kept on purpose: the load balancer in front of the kraken's workers handles only one
+    envelope frame and the responses do not contain any id to correlate them with their request, so we cannot
+    multiplex several requests on a DEALER socket.
+
+    A socket is given back to the pool after a successful exchange.
+    A socket whose request has timed out still waits for its response, it cannot be reused and is closed right
+    away without lingering.
+    At most 'max_idle_sockets' are kept in the pool, the extra ones are closed when released so a burst of
+    requests doesn't keep its file descriptors forever.
+    With 'transient' a new socket is used for each request.
+    """
+    def __init__(self, context, address, max_idle_sockets=10, transient=False):
+        self.context = context
+        self.address = address
+        self.max_idle_sockets = max_idle_sockets
+        self.transient = transient
+        self._sockets = queue.Queue()
+        self.nb_in_use = 0
+        self.nb_created = 0
+        self.nb_closed = 0
+        self.nb_requests = 0
+        self.nb_timeouts = 0
+
+    def _create_socket(self):
+        socket = self.context.socket(zmq.REQ)
+        # nothing is kept in memory nor blocks when a socket is closed
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.connect(self.address)
+        self.nb_created += 1
+        return socket
+
+    def _close_socket(self, socket):
+        if not socket.closed:
+            socket.close()
+            self.nb_closed += 1
+
+    def _release_socket(self, socket):
+        if socket.closed:
+            return
+        if self.transient or self._sockets.qsize() >= self.max_idle_sockets:
+            self._close_socket(socket)
+        else:
+            self._sockets.put(socket)
+
+    @contextmanager
+    def socket(self):
+        socket = None
+        if not self.transient:
+            try:
+                socket = self._sockets.get(block=False)
+            except queue.Empty:
+                pass
+        if socket is None:
+            socket = self._create_socket()
+        self.nb_in_use += 1
+        try:
+            yield socket
+        except:
+            # we don't know in which state the socket is, it's safer not to reuse it
+            self._close_socket(socket)
+            raise
+        finally:
+            self.nb_in_use -= 1
+            self._release_socket(socket)
+
+    def send_and_receive(self, data, timeout):
+        """
+        send the data on a socket of the pool and wait for the response
+
+        :param timeout: max time to wait for the response in ms
+        :return: the response, None if it hasn't been received in time
+        """
+        self.nb_requests += 1
+        with self.socket() as socket:
+            socket.send(data)
+            if socket.poll(timeout=timeout) > 0:
+                return socket.recv()
+            self.nb_timeouts += 1
+            self._close_socket(socket)
+            return None
+
+    def warm_up(self, nb_sockets):
+        """
+        create idle sockets up to 'nb_sockets' (and at most max_idle_sockets) so they are already connected
+        when the requests come, does nothing for a transient pool
+        """
+        if self.transient:
+            return
+        while self._sockets.qsize() < min(nb_sockets, self.max_idle_sockets):
+            self._sockets.put(self._create_socket())
+
+    def status(self):
+        return {
+            'address': self.address,
+            'transient': self.transient,
+            'in_use': self.nb_in_use,
+            'idle': self._sockets.qsize(),
+            'max_idle': self.max_idle_sockets,
+            'created': self.nb_created,
+            'closed': self.nb_closed,
+            'requests': self.nb_requests,
+            'timeouts': self.nb_timeouts,
+        }
@@ -504,29 +504,29 @@ class TestOverlappingAuthentication(AbstractTestAuthentication):
         # bob is a normal user, it can access the open_data, and it can access main_routing_test
         # he thus can use main_routing_test and empty_routing_test (because it's opendata)
         with user_set(app, FakeUserAuth, 'bob'):
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test', 'empty_routing_test'})):
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test', 'empty_routing_test'})):
                 r, status = self.query_no_assert('/v1/places?q=bob')
                 assert status == 200
 
         # user_without_any_coverage cannot access anything, so no pt_dataset is given
         with user_set(app, FakeUserAuth, 'user_without_any_coverage'):
-            with mock.patch('requests.get', no_check):
+            with mock.patch('jormungandr.http_pool.get', no_check):
                 r, status = self.query_no_assert('/v1/places?q=bob')
                 assert status == 403
 
         # tgv has not access to the open_data but can use main_routing_test, it cannot use the global place
         with user_set(app, FakeUserAuth, 'tgv'):
-            with mock.patch('requests.get', no_check):
+            with mock.patch('jormungandr.http_pool.get', no_check):
                 _, status = self.query_no_assert('/v1/places?q=bob')
                 assert status == 403
             # but it can use the main_routing_test places
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test'})):
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test'})):
                 _, status = self.query_no_assert('/v1/coverage/main_routing_test/places?q=bob')
                 assert status == 200
 
         # super_user can use all the instances
         with user_set(app, FakeUserAuth, 'super_user'):
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test',
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test',
                                                             'empty_routing_test',
                                                             'departure_board_test'})):
                 _, status = self.query_no_assert('/v1/places?q=bob')
@@ -534,16 +534,16 @@ class TestOverlappingAuthentication(AbstractTestAuthentication):
 
         # but when querying /v1/coverage/<something>/places only one pt_dataset is given to bragi
         with user_set(app, FakeUserAuth, 'super_user'):
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test'})):
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test'})):
                 _, status = self.query_no_assert('/v1/coverage/main_routing_test/places?q=bob')
                 assert status == 200
-            with mock.patch('requests.get', DatasetChecker({'departure_board_test'})):
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'departure_board_test'})):
                 _, status = self.query_no_assert('/v1/coverage/departure_board_test/places?q=bob')
                 assert status == 200
 
     def test_places_authentication_no_user(self):
         """a user is mandatory to use the places api API"""
-        with mock.patch('requests.get', DatasetChecker({})):
+        with mock.patch('jormungandr.http_pool.get', DatasetChecker({})):
             _, status = self.query_no_assert('/v1/places?q=bob')
             assert status == 401
             _, status = self.query_no_assert('/v1/coverage/departure_board_test/places?q=bob')
@@ -558,7 +558,7 @@ class AuthenticationPublicNavitia(AbstractTestFixture):
         On a public navitia, a user can use all the instances
         """
         with user_set(app, FakeUserAuth, 'bob'):
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test',
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test',
                                                             'empty_routing_test',
                                                             'departure_board_test'})):
                 r, status = self.query_no_assert('/v1/places?q=bob')
@@ -569,16 +569,16 @@ class AuthenticationPublicNavitia(AbstractTestFixture):
         for a specific coverage's places, there is still only one coverage
         """
         with user_set(app, FakeUserAuth, 'bob'):
-            with mock.patch('requests.get', DatasetChecker({'main_routing_test'})):
+            with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test'})):
                 _, status = self.query_no_assert('/v1/coverage/main_routing_test/places?q=bob')
                 assert status == 200
 
     def test_global_places_authentication_no_user(self):
         """even without a user we can access all the places apis"""
-        with mock.patch('requests.get', DatasetChecker({'main_routing_test'})):
+        with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test'})):
             _, status = self.query_no_assert('/v1/coverage/main_routing_test/places?q=bob')
             assert status == 200
-        with mock.patch('requests.get', DatasetChecker({'main_routing_test',
+        with mock.patch('jormungandr.http_pool.get', DatasetChecker({'main_routing_test',
                                                         'empty_routing_test',
                                                         'departure_board_test'})):
             _, status = self.query_no_assert('/v1/places?q=bob')
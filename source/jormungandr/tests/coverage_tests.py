@@ -50,6 +50,7 @@ class TestNullStatus(AbstractTestFixture):
         assert response['regions'][0]['id'] == 'main_routing_test'
         assert 'last_load_at' in response['regions'][0]
         assert get_valid_datetime(response['regions'][0]["last_load_at"])
+        assert 'metadata_age' in response['regions'][0]
         assert 'name' in response['regions'][0]
         assert response['regions'][0]['name'] == 'routing api data'
         self.check_context(response)
@@ -175,3 +175,13 @@ class TestEndPoint(AbstractTestFixture):
         response = self.query('/v1/coverage/main_routing_test/lines', display=True)
         self.check_context(response)
         assert response['context']['timezone'] == 'UTC'
+
+    def test_tracing(self):
+        self.query('/v1/coverage/main_routing_test/lines')
+        response = self.query('/v1/tracing')
+
+        endpoints = get_not_null(response, 'endpoints')
+        ptref_spans = [e['spans'] for e in endpoints.values() if 'kraken.PTREFERENTIAL' in e['spans']]
+        assert ptref_spans
+        assert ptref_spans[0]['request']['count'] >= 1
+        assert ptref_spans[0]['kraken.PTREFERENTIAL']['mean_duration'] > 0
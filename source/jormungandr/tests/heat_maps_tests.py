@@ -32,6 +32,9 @@ from __future__ import absolute_import, print_function, unicode_literals, divisi
 from .tests_mechanism import AbstractTestFixture, dataset
 from .check_utils import *
 from jormungandr import app
+import array
+import base64
+import zlib
 
 
 def get_duration(coord, response):
@@ -123,6 +126,26 @@ class TestHeatMap(AbstractTestFixture):
         assert(get_duration(s_coord, response) == 73)# about 60 + 18
         self.check_context(response)
 
+    def test_heat_maps_binary_format(self):
+        q = "v1/coverage/main_routing_test/heat_maps?datetime={}&from={}&max_duration={}"
+        q = q.format('20120614T080100', 'stopB', '3600')
+        json_matrix = self.query(q)['heat_maps'][0]['heat_matrix']
+
+        for heat_matrix_format, decode in (('binary', lambda d: d), ('binary_zlib', zlib.decompress)):
+            response = self.query(q + '&heat_matrix_format=' + heat_matrix_format)
+            matrix = response['heat_maps'][0]['heat_matrix']
+            assert matrix['line_headers'] == json_matrix['line_headers']
+            assert all('duration' not in l for l in matrix['lines'])
+            durations = matrix['durations']
+            assert durations['encoding'] == 'int32le'
+            assert durations['nb_lines'] == len(json_matrix['lines'])
+            assert durations['nb_columns'] == len(json_matrix['line_headers'])
+
+            values = array.array(str('i'))
+            values.fromstring(decode(base64.b64decode(durations['data'])))
+            expected = [-1 if d is None else d for l in json_matrix['lines'] for d in l['duration']]
+            assert values.tolist() == expected
+
     def test_heat_maps_no_datetime(self):
         current_datetime = '20120614T080000'
         q_no_dt = "v1/coverage/main_routing_test/heat_maps?from={}&max_duration={}&_current_datetime={}"
@@ -38,6 +38,10 @@ DISABLE_DATABASE = True
 INSTANCE_TIMEOUT = int(os.environ.get('CUSTOM_INSTANCE_TIMEOUT', 500))
 STAT_CIRCUIT_BREAKER_MAX_FAIL = int(os.getenv('JORMUNGANDR_STAT_CIRCUIT_BREAKER_MAX_FAIL', 1000))
 STAT_CIRCUIT_BREAKER_TIMEOUT_S = int(os.getenv('JORMUNGANDR_STAT_CIRCUIT_BREAKER_TIMEOUT_S', 1))
+# the tests check the published stats right after the request
+STAT_QUEUE_SIZE = 0
+# the authentication tests mock the users and the authorizations of the db
+AUTHORIZATION_TABLE_REFRESH_S = 0
 
 # do not authenticate for tests
 PUBLIC = True
@@ -75,6 +79,11 @@ CACHE_CONFIGURATION = {
     'CACHE_TYPE': 'null'
 }
 
+# the street network is often mocked in the tests, we don't want to keep results between them
+FALLBACK_DURATIONS_CACHE_SIZE = 0
+# the coords of the test data are too close to be rounded
+CROW_FLY_CACHE_SIZE = 0
+
 # List of enabled modules
 MODULES = {
     'v1': {  # API v1 of Navitia
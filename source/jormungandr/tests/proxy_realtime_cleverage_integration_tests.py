@@ -141,7 +141,7 @@ class TestCleverageSchedules(AbstractTestFixture):
                  }
                  ], 200)
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template_scs.format(sp='SP_1')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -218,7 +218,7 @@ class TestCleverageSchedules(AbstractTestFixture):
                  }
                  ], 200)
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template_scs.format(sp='SP_1')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -214,7 +214,7 @@ class TestSiriLite(AbstractTestFixture):
     }
 }, 200)
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             # first we make a base schedule call for the test to be more readable
             query = self.query_template.format(sp='SP_21') + "&data_freshness=base_schedule"
             response = self.query_region(query)
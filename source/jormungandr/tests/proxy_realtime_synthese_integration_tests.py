@@ -113,7 +113,7 @@ class TestSyntheseSchedules(AbstractTestFixture):
                 </timeTable>
             """, 200)
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template.format(sp='SP_1')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -152,7 +152,7 @@ class TestSyntheseSchedules(AbstractTestFixture):
                 </timeTable>
              """, 200),
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template.format(sp='SP_11')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -182,7 +182,7 @@ class TestSyntheseSchedules(AbstractTestFixture):
                 </timeTable>
              """, 200),
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template.format(sp='SP_11')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -227,7 +227,7 @@ class TestSyntheseSchedules(AbstractTestFixture):
                 </timeTable>
              """, 200),
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template.format(sp='SP_11')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
@@ -257,7 +257,7 @@ class TestSyntheseSchedules(AbstractTestFixture):
                 </timeTable>
             """, 200)
         })
-        with mock.patch('requests.get', mock_requests.get):
+        with mock.patch('jormungandr.http_pool.get', mock_requests.get):
             query = self.query_template.format(sp='SP_21')
             response = self.query_region(query)
             scs = get_not_null(response, 'stop_schedules')
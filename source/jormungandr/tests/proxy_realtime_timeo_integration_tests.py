@@ -51,8 +51,9 @@ class MockTimeo(Timeo):
 
     def __init__(self, id, service_url, service_args, timezone,
                  object_id_tag=None, destination_id_tag=None, instance=None, timeout=10):
+        # the mocked responses are given by stop point, the route points are queried one by one
         Timeo.__init__(self, id, service_url, service_args, timezone,
-                       object_id_tag, destination_id_tag, instance, timeout)
+                       object_id_tag, destination_id_tag, instance, timeout, max_batch_size=1)
 
     def _call_timeo(self, url):
         resp = Obj()
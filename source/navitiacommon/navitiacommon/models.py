@@ -103,7 +103,7 @@ class Host(db.Model):
         return self.value
 
 
-class User(db.Model):
+class User(db.Model, TimestampMixin):
     __table_args__ = (UniqueConstraint('login', 'end_point_id', name='user_login_end_point_idx'),
                       UniqueConstraint('email', 'end_point_id', name='user_email_end_point_idx'))
     id = db.Column(db.Integer, primary_key=True)
@@ -214,7 +214,7 @@ class User(db.Model):
         return instances
 
 
-class Key(db.Model):
+class Key(db.Model, TimestampMixin):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'),
                         nullable=False)
@@ -542,7 +542,7 @@ class Api(db.Model):
         return '<Api %r>' % self.name
 
 
-class Authorization(db.Model):
+class Authorization(db.Model, TimestampMixin):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'),
                         primary_key=True, nullable=False)
     instance_id = db.Column(db.Integer,
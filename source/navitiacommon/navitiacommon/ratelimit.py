@@ -33,7 +33,47 @@ import logging
 import math
 import redis
 import time
-from builtins import zip
+
+try:
+    # under gevent a blocking acquire must only suspend the current greenlet
+    from gevent import sleep
+except ImportError:
+    from time import sleep
+
+# sliding window check done atomically by redis, in one round trip
+# KEYS: log key, block key
+# ARGV: timestamp of the request, ttl of the log, then (requests, seconds) of each condition sorted by requests
+# returns {allowed, seconds to wait, index of the limiting condition (-1 for a manual block)}
+# Note: the waiting times are returned as strings since redis truncates the lua numbers to integers
+_PING_SCRIPT = """
+if redis.call('exists', KEYS[2]) == 1 then
+    local block_ttl = redis.call('ttl', KEYS[2])
+    -- the ttl is 0 for the last second of the key's life
+    if block_ttl < 1 then
+        block_ttl = 0.5
+    end
+    return {0, tostring(block_ttl), -1}
+end
+
+local timestamp = tonumber(ARGV[1])
+local max_requests = 0
+for i = 3, #ARGV, 2 do
+    local requests = tonumber(ARGV[i])
+    local seconds = tonumber(ARGV[i + 1])
+    local boundry_timestamp = redis.call('lindex', KEYS[1], requests - 1)
+    if boundry_timestamp and tonumber(boundry_timestamp) + seconds > timestamp then
+        return {0, tostring(tonumber(boundry_timestamp) + seconds - timestamp), (i - 3) / 2}
+    end
+    max_requests = requests
+end
+
+redis.call('lpush', KEYS[1], ARGV[1])
+redis.call('ltrim', KEYS[1], 0, max_requests - 1)
+-- if we never use this key again, let it fall out of the DB after max seconds has past
+redis.call('expire', KEYS[1], ARGV[2])
+return {1, '0', -1}
+"""
+
 
 class RateLimiter(object):
     """
@@ -41,6 +81,10 @@ class RateLimiter(object):
     These rules are checked on .acquire() and we either return True or False based on if we can make the request,
     or we can block until we make the request.
     Manual blocks are also supported with the block method.
+
+    A key limited by redis (or blocked by this instance) is refused locally until its waiting time is over,
+    without asking redis. But every allowed call still costs one redis round trip: the conditions are shared
+    by all the processes, they are checked and the request is logged by a lua script run by redis.
     """
 
     def __init__(self, conditions=None,
@@ -65,6 +109,9 @@ class RateLimiter(object):
         self.namespace = redis_namespace
         self.conditions = []
         self.list_ttl = 0
+        self._ping_script = self.redis.register_script(_PING_SCRIPT)
+        # local pre-check: the limited keys are refused until this timestamp without asking redis
+        self._limited_until = {}
 
         if conditions:
             self.add_condition(*conditions)
@@ -142,6 +189,7 @@ class RateLimiter(object):
         if not isinstance(seconds, int):
             seconds = int(math.ceil(seconds))
 
+        self._limited_until[key] = time.time() + seconds
         key = ':'.join((self.namespace, key, 'block'))
         self.log.warn('block key (%s) for %ds', key, seconds)
         with self.redis.pipeline() as pipe:
@@ -163,7 +211,7 @@ class RateLimiter(object):
                 if success:
                     return True
                 self.log.debug('blocking acquire sleeping for %.1fs', wait)
-                time.sleep(wait)
+                sleep(wait)
         else:
             success, wait = self._make_ping(key)
             return success
@@ -184,52 +232,34 @@ class RateLimiter(object):
             return False, min_request_seconds
 
 
+        # a key limited by redis stays limited at least until the returned time,
+        # no need to ask redis before that
+        timestamp = time.time()
+        limited_until = self._limited_until.get(key)
+        if limited_until is not None:
+            if limited_until > timestamp:
+                return False, limited_until - timestamp
+            del self._limited_until[key]
+
         log_key = ':'.join((self.namespace, key, 'log'))
         block_key = ':'.join((self.namespace, key, 'block'))
-        lock_key = ':'.join((self.namespace, key, 'lock'))
-
-        with self.redis.lock(lock_key, timeout=10):
-
-            with self.redis.pipeline() as pipe:
-                for requests, _ in self.conditions:
-                    pipe.lindex(log_key, requests-1) # subtract 1 as 0 indexed
-
-                # check manual block keys
-                pipe.ttl(block_key)
-                pipe.get(block_key)
-                boundry_timestamps = pipe.execute()
-
-            blocked = boundry_timestamps.pop()
-            block_ttl = boundry_timestamps.pop()
-
-            if blocked is not None:
-                # block_ttl is None for last second of a keys life. set min of 0.5
-                if block_ttl is None:
-                    block_ttl = 0.5
-                self.log.warn('(%s) hit manual block. %ss remaining', key, block_ttl)
-                return False, block_ttl
-
-            timestamp = time.time()
-
-            for boundry_timestamp, (requests, seconds) in zip(boundry_timestamps, self.conditions):
-                # if we dont yet have n number of requests boundry_timestamp will be None and this condition wont be limiting
-                if boundry_timestamp is not None:
-                    boundry_timestamp = float(boundry_timestamp)
-                    if boundry_timestamp + seconds > timestamp:
-                        self.log.warn('(%s) hit limit (%s/%s) time to allow %.1fs',
-                                key, requests, seconds, boundry_timestamp + seconds - timestamp)
-                        return False, boundry_timestamp + seconds - timestamp
-
-            # record our success
-            with self.redis.pipeline() as pipe:
-                pipe.lpush(log_key, timestamp)
-                max_requests, _ = self.conditions[-1]
-                pipe.ltrim(log_key, 0, max_requests-1) # 0 indexed so subtract 1
-                # if we never use this key again, let it fall out of the DB after max seconds has past
-                pipe.expire(log_key, self.list_ttl)
-                pipe.execute()
-
-        return True, 0.0
+
+        args = [timestamp, self.list_ttl]
+        for condition in self.conditions:
+            args.extend(condition)
+        allowed, wait, condition_index = self._ping_script(keys=[log_key, block_key], args=args)
+        wait = float(wait)
+
+        if allowed:
+            return True, 0.0
+
+        if condition_index < 0:
+            self.log.warn('(%s) hit manual block. %ss remaining', key, wait)
+        else:
+            requests, seconds = self.conditions[condition_index]
+            self.log.warn('(%s) hit limit (%s/%s) time to allow %.1fs', key, requests, seconds, wait)
+        self._limited_until[key] = timestamp + wait
+        return False, wait
 
 
 if __name__ == '__main__':
@@ -0,0 +1,29 @@
+"""add created_at and updated_at on users, keys and authorizations
+
+The authorization table of jormungandr only reads the rows modified since its last refresh
+
+Revision ID: 1e3d7b8a2f45
+Revises: 465a7431358a
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '1e3d7b8a2f45'
+down_revision = '465a7431358a'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    for table in ('user', 'key', 'authorization'):
+        op.add_column(table, sa.Column('created_at', sa.DateTime(), nullable=False,
+                                       server_default=sa.text("timezone('utc', now())")))
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in ('user', 'key', 'authorization'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'created_at')